@@ -0,0 +1,203 @@
+import enum
+import gzip
+import io
+from pathlib import Path
+from typing import IO, List, Optional
+
+# zstandard is only required to read and write zstd compressed files.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+@enum.unique
+class Compression(str, enum.Enum):
+    NONE = "none"
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+# File extension added to the name of a file of each compression.
+COMPRESSION_SUFFIXES = {Compression.NONE: '', Compression.GZIP: '.gz',
+                        Compression.ZSTD: '.zst'}
+# Compression level used when no level is given.
+DEFAULT_LEVELS = {Compression.NONE: 0, Compression.GZIP: 6, Compression.ZSTD: 3}
+# The first bytes of a gzip member and a zstd frame, used to detect the
+# compression of a file that is being read.
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# Largest number of bytes in a zstd block.
+ZSTD_MAX_BLOCK_SIZE = 131072
+
+def available_compressions() -> List[Compression]:
+    '''
+    :returns: The compressions that can be used, zstd is only available if
+              zstandard is installed.
+    '''
+    return [compression for compression in Compression
+            if compression != Compression.ZSTD or zstandard is not None]
+
+def _check_available(compression: Compression) -> None:
+    if compression not in available_compressions():
+        raise ValueError(f'{compression.value} compression requires the zstandard '
+                         'package to be installed')
+
+def compressed_path(file_path: Path, compression: Compression) -> Path:
+    '''
+    :param file_path: File path e.g. `book.tsv`.
+    :param compression: Compression of the file.
+    :returns: The file path with the file extension of the compression
+              added e.g. `book.tsv.gz`.
+    '''
+    return file_path.with_name(f'{file_path.name}{COMPRESSION_SUFFIXES[compression]}')
+
+def suffix_compression(file_path: Path) -> Compression:
+    '''
+    :param file_path: File path e.g. `results.jsonl.zst`.
+    :returns: The compression given by the file extension, `none` if the
+              file extension is not that of a compression.
+    '''
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and file_path.suffix == suffix:
+            return compression
+    return Compression.NONE
+
+def file_compression(file_path: Path) -> Compression:
+    '''
+    :param file_path: An existing file.
+    :returns: The compression of the file detected from its first bytes,
+              rather than its file extension.
+    '''
+    with file_path.open('rb') as file_fp:
+        magic = file_fp.read(len(ZSTD_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        return Compression.GZIP
+    if magic == ZSTD_MAGIC:
+        return Compression.ZSTD
+    return Compression.NONE
+
+class _ClosingGzipFile(gzip.GzipFile):
+    '''
+    A `gzip.GzipFile` that writes to a file object and closes the file object
+    when it is closed, like a file opened through `gzip.open`.
+    '''
+    def __init__(self, raw_fp: IO[bytes], level: int) -> None:
+        super().__init__(fileobj=raw_fp, mode='wb', compresslevel=level)
+        self._raw_fp = raw_fp
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._raw_fp.close()
+
+def stream_writer(raw_fp: IO[bytes], compression: Compression,
+                  level: Optional[int] = None, closefd: bool = True
+                  ) -> IO[bytes]:
+    '''
+    :param raw_fp: A file opened for writing in binary mode.
+    :param compression: Compression to write with.
+    :param level: Compression level, by default the `DEFAULT_LEVELS`.
+    :param closefd: Whether closing the returned file object also closes
+                    `raw_fp`. If False more can be written to `raw_fp` after
+                    the gzip member or zstd frame has been ended e.g. another
+                    gzip member or zstd frame.
+    :returns: A binary file object that compresses what is written to it into
+              `raw_fp`, as one gzip member or zstd frame, which is ended when
+              it is closed.
+    '''
+    _check_available(compression)
+    if level is None:
+        level = DEFAULT_LEVELS[compression]
+    if compression == Compression.GZIP:
+        if not closefd:
+            return gzip.GzipFile(fileobj=raw_fp, mode='wb', compresslevel=level)
+        return _ClosingGzipFile(raw_fp, level)
+    if compression == Compression.ZSTD:
+        return zstandard.ZstdCompressor(level=level).stream_writer(raw_fp, closefd=closefd)
+    return raw_fp
+
+def open_output(file_path: Path, mode: str = 'w',
+                compression: Optional[Compression] = None,
+                level: Optional[int] = None, newline: Optional[str] = None
+                ) -> IO:
+    '''
+    :param file_path: File to write to.
+    :param mode: `w` or `a`, with `b` for binary mode e.g. `ab`. Appending
+                 to a compressed file adds a new gzip member or zstd frame,
+                 which `open_input` reads as one file.
+    :param compression: Compression to write with, by default the
+                        compression given by the file extension, see
+                        `suffix_compression`.
+    :param level: Compression level, by default the `DEFAULT_LEVELS`.
+    :param newline: As for `open` in text mode.
+    :returns: A file object that compresses what is written to it.
+    :raises ValueError: If the compression is zstd and zstandard is not
+                        installed.
+    '''
+    if compression is None:
+        compression = suffix_compression(file_path)
+    if compression == Compression.NONE:
+        if 'b' in mode:
+            return file_path.open(mode)
+        return file_path.open(mode, newline=newline)
+    _check_available(compression)
+    raw_mode = f"{mode.replace('b', '')}b"
+    binary_fp = stream_writer(file_path.open(raw_mode), compression, level)
+    if 'b' in mode:
+        return binary_fp
+    return io.TextIOWrapper(binary_fp, encoding='utf-8', newline=newline)
+
+def open_input(file_path: Path, mode: str = 'r', newline: Optional[str] = None
+               ) -> IO:
+    '''
+    :param file_path: File to read, it can be uncompressed, gzip, or zstd
+                      compressed, including more than one gzip member or zstd
+                      frame, the compression is detected through
+                      `file_compression`.
+    :param mode: `r` or `rb` for binary mode.
+    :param newline: As for `open` in text mode.
+    :returns: A file object that reads the uncompressed content of the file.
+    :raises ValueError: If the file is zstd compressed and zstandard is not
+                        installed.
+    '''
+    compression = file_compression(file_path)
+    if compression == Compression.NONE:
+        if 'b' in mode:
+            return file_path.open('rb')
+        return file_path.open('r', newline=newline)
+    _check_available(compression)
+    if compression == Compression.GZIP:
+        binary_fp: IO[bytes] = gzip.open(file_path, 'rb')
+    else:
+        reader = zstandard.ZstdDecompressor().stream_reader(file_path.open('rb'),
+                                                            read_across_frames=True,
+                                                            closefd=True)
+        binary_fp = io.BufferedReader(reader)
+    if 'b' in mode:
+        return binary_fp
+    return io.TextIOWrapper(binary_fp, encoding='utf-8', newline=newline)
+
+def stored_frame(data: bytes, compression: Compression) -> bytes:
+    '''
+    :param data: Data to store.
+    :param compression: The gzip or zstd compression.
+    :returns: A gzip member or zstd frame that stores the data without
+              compressing it, therefore its length only depends on the length
+              of the data. This allows space to be reserved at the start of a
+              compressed file, for data that is only known once the rest of
+              the file has been written, that can be over written with a
+              stored frame of data of the same length.
+    '''
+    if compression == Compression.GZIP:
+        return gzip.compress(data, compresslevel=0, mtime=0)
+    if compression == Compression.ZSTD:
+        # A frame with a known content size, in 4 bytes, and a single raw
+        # (uncompressed) block, see RFC 8878.
+        if len(data) > ZSTD_MAX_BLOCK_SIZE:
+            raise ValueError(f'Only {ZSTD_MAX_BLOCK_SIZE} bytes can be stored in a zstd frame')
+        frame_header_descriptor = (2 << 6) | (1 << 5)
+        block_header = (1 | (len(data) << 3)).to_bytes(3, 'little')
+        return (ZSTD_MAGIC + bytes([frame_header_descriptor])
+                + len(data).to_bytes(4, 'little') + block_header + data)
+    raise ValueError(f'{compression.value} is not a compression')
@@ -0,0 +1,277 @@
+import contextlib
+import fcntl
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import uuid
+
+import numpy as np
+import typer
+
+from binary_book import (ATTRIBUTE_TABLES, BINARY_BOOK_SUFFIX,
+                         VOCABULARY_ID_DTYPE, BinaryBook, binary_book_files)
+import json_backend
+
+app = typer.Typer()
+
+VOCABULARY_VERSION = 1
+
+class CorpusVocabulary:
+    '''
+    Integer IDs, shared by all books of the corpus, for the strings of each
+    string table of the binary book files (`word` for tokens and lemmas,
+    `tag`, and `entity`), see `binary_book.py`. The ID of a string is the
+    number of strings that were added to its string table before it,
+    therefore once a string has an ID it never changes, and the IDs of books
+    that are added later do not change the IDs of books added before.
+
+    The vocabulary is stored as a JSON lines file, the first line is
+    `{"version": 1, "identifier": ...}`, whereby the identifier is unique to
+    the vocabulary file, and each other line is the string table and string
+    of one ID in ID order e.g. `["word", "London"]`. New strings are appended,
+    and flushed, to the file as soon as they are added, therefore the
+    vocabulary file always contains the strings of every ID that has been
+    given out.
+
+    More than one process can add strings to the same vocabulary file, e.g.
+    HEC jobs tagging different batches of books, as the file is exclusively
+    locked, through `fcntl.flock`, whilst the strings added by other
+    processes are read, the IDs of the new strings are given out, and the
+    new strings are appended. As the lock is held whilst a line is written,
+    an incomplete last line can only be from a process that was killed
+    whilst writing it, and it is removed when the file is next locked.
+    '''
+    def __init__(self, vocabulary_file: Path, read_only: bool = False) -> None:
+        '''
+        :param vocabulary_file: The vocabulary file, it is created if it does
+                                not exist, unless `read_only`.
+        :param read_only: If True the vocabulary file is never written to,
+                          strings that are not in the vocabulary are given
+                          IDs, after those of the file, in memory only.
+        :raises ValueError: If the vocabulary file is not a corpus vocabulary
+                            file.
+        '''
+        self.vocabulary_file = vocabulary_file
+        self.read_only = read_only
+        self._strings: Dict[str, List[str]] = {table_name: [] for table_name
+                                               in dict.fromkeys(ATTRIBUTE_TABLES.values())}
+        self._string_ids: Dict[str, Dict[str, int]] = {table_name: {} for table_name in self._strings}
+        self.identifier: Optional[str] = None
+        # The number of bytes of the vocabulary file that have been read.
+        self._read_length = 0
+        self._vocabulary_fp = vocabulary_file.open('rb' if read_only else 'a+b')
+        try:
+            with self._locked():
+                self._read_new_lines()
+                if self.identifier is None:
+                    if read_only:
+                        raise ValueError(f'{self.vocabulary_file} is not a corpus vocabulary file')
+                    self.identifier = uuid.uuid4().hex
+                    header = {'version': VOCABULARY_VERSION, 'identifier': self.identifier}
+                    self._append([f'{json.dumps(header)}\n'])
+        except Exception:
+            self._vocabulary_fp.close()
+            raise
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        '''
+        Holds a lock on the vocabulary file, exclusive unless `read_only`.
+        '''
+        fcntl.flock(self._vocabulary_fp, fcntl.LOCK_SH if self.read_only else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._vocabulary_fp, fcntl.LOCK_UN)
+
+    def _read_new_lines(self) -> None:
+        '''
+        Adds the strings that have been appended to the vocabulary file since
+        it was last read, e.g. by another process. Has to be called whilst
+        the file is locked.
+
+        :raises ValueError: If the first line of the vocabulary file is not
+                            a version `VOCABULARY_VERSION` header.
+        '''
+        self._vocabulary_fp.seek(self._read_length)
+        new_data = self._vocabulary_fp.read()
+        complete_length = new_data.rfind(b'\n') + 1
+        if complete_length < len(new_data) and not self.read_only:
+            os.truncate(self.vocabulary_file, self._read_length + complete_length)
+        lines = new_data[:complete_length].split(b'\n')[:-1]
+        if lines and self.identifier is None:
+            header = json_backend.loads(lines.pop(0))
+            if not isinstance(header, dict) or header.get('version') != VOCABULARY_VERSION:
+                raise ValueError(f'{self.vocabulary_file} is not version {VOCABULARY_VERSION} '
+                                 'of the corpus vocabulary format')
+            self.identifier = header['identifier']
+        for line in lines:
+            table_name, string = json_backend.loads(line)
+            self._add_strings(table_name, [string])
+        self._read_length += complete_length
+
+    def _append(self, lines: List[str]) -> None:
+        '''
+        Appends, and flushes, the lines to the vocabulary file. Has to be
+        called whilst the file is locked, after `_read_new_lines`.
+        '''
+        new_data = ''.join(lines).encode('utf-8')
+        self._vocabulary_fp.write(new_data)
+        self._vocabulary_fp.flush()
+        self._read_length += len(new_data)
+
+    def _add_strings(self, table_name: str, strings: List[str]) -> None:
+        table_strings = self._strings[table_name]
+        table_string_ids = self._string_ids[table_name]
+        for string in strings:
+            table_string_ids[string] = len(table_strings)
+            table_strings.append(string)
+
+    def __enter__(self) -> 'CorpusVocabulary':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._vocabulary_fp.close()
+
+    def strings(self, table_name: str) -> List[str]:
+        '''
+        :param table_name: A string table e.g. `word`.
+        :returns: The strings of the string table in ID order, the ID of a
+                  string is its index.
+        '''
+        return self._strings[table_name]
+
+    def string_id(self, table_name: str, string: str) -> Optional[int]:
+        '''
+        :param table_name: A string table e.g. `word`.
+        :param string: A string e.g. `London`.
+        :returns: The ID of the string, None if it is not in the vocabulary.
+        '''
+        return self._string_ids[table_name].get(string)
+
+    def ids(self, table_name: str, strings: Iterable[str]) -> np.ndarray:
+        '''
+        :param table_name: A string table e.g. `word`.
+        :param strings: Strings of the string table.
+        :returns: The ID of each of the strings, strings that are not in the
+                  vocabulary are added to it.
+        '''
+        strings = list(strings)
+        table_string_ids = self._string_ids[table_name]
+        new_strings = [string for string in dict.fromkeys(strings)
+                       if string not in table_string_ids]
+        if new_strings:
+            if self.read_only:
+                self._add_strings(table_name, new_strings)
+            else:
+                with self._locked():
+                    # Another process may have added some of the strings.
+                    self._read_new_lines()
+                    new_strings = [string for string in new_strings
+                                   if string not in table_string_ids]
+                    self._add_strings(table_name, new_strings)
+                    self._append([f'{json.dumps([table_name, string])}\n'
+                                  for string in new_strings])
+        return np.array([table_string_ids[string] for string in strings],
+                        dtype=VOCABULARY_ID_DTYPE)
+
+    def add_book(self, binary_book: BinaryBook) -> bool:
+        '''
+        :param binary_book: A book, its vocabulary IDs are set to the IDs of
+                            the strings of its string tables in this
+                            vocabulary.
+        :returns: False if the book already had the IDs of this vocabulary,
+                  in which case it is not changed.
+        '''
+        if binary_book.vocabulary_identifier == self.identifier:
+            return False
+        binary_book.vocabulary_ids = {table_name: self.ids(table_name, strings)
+                                      for table_name, strings in binary_book.string_tables.items()}
+        binary_book.vocabulary_identifier = self.identifier
+        return True
+
+    def add_book_file(self, binary_book_file: Path) -> bool:
+        '''
+        :param binary_book_file: A binary book file, it is re-written, through
+                                 a `.partial` file, with the vocabulary IDs of
+                                 its strings, see `add_book`.
+        :returns: False if the book already had the IDs of this vocabulary,
+                  in which case it is not re-written.
+        '''
+        binary_book = BinaryBook.load(binary_book_file, memory_map=False)
+        if not self.add_book(binary_book):
+            return False
+        partial_binary_book_file = binary_book_file.with_name(f'{binary_book_file.name}.partial')
+        binary_book.save(partial_binary_book_file)
+        os.replace(partial_binary_book_file, binary_book_file)
+        return True
+
+@app.command()
+def add(binary_books: Path = typer.Argument(..., exists=True, dir_okay=True, file_okay=True, help=f"A binary book file, or a folder of binary book files (`{BINARY_BOOK_SUFFIX}` files)."),
+        vocabulary_file: Path = typer.Argument(..., dir_okay=False, file_okay=True, help="Corpus vocabulary file, it is created if it does not exist.")
+        ) -> None:
+    '''
+    Adds the strings of the binary book files, written by `spacy_tagging.py
+    --output-format binary`, to the corpus vocabulary and re-writes each
+    binary book file with the vocabulary ID of each of its strings. Books
+    that already have the IDs of the vocabulary are skipped.
+    '''
+    number_added = 0
+    book_files = binary_book_files(binary_books)
+    with CorpusVocabulary(vocabulary_file) as vocabulary:
+        for binary_book_file in book_files:
+            number_added += vocabulary.add_book_file(binary_book_file)
+        table_sizes = ', '.join(f'{len(vocabulary.strings(table_name))} {table_name}'
+                                for table_name in dict.fromkeys(ATTRIBUTE_TABLES.values()))
+    typer.echo(f'Added {number_added} of {len(book_files)} books, the vocabulary '
+               f'contains {table_sizes} strings')
+
+@app.command()
+def frequencies(binary_books: Path = typer.Argument(..., exists=True, dir_okay=True, file_okay=True, help=f"A binary book file, or a folder of binary book files (`{BINARY_BOOK_SUFFIX}` files)."),
+                vocabulary_file: Path = typer.Argument(..., exists=True, dir_okay=False, file_okay=True, help="Corpus vocabulary file."),
+                attribute: str = typer.Option('token', "--attribute", help="Token attribute to count e.g. `lemma`."),
+                top: Optional[int] = typer.Option(None, "--top", min=1, help="Only output this many of the most frequent values, by default all values are output.")
+                ) -> None:
+    '''
+    Counts each value of the token `attribute` across all of the binary book
+    files, as integers through the corpus vocabulary IDs rather than as
+    strings, and outputs them from most to least frequent, one JSON object
+    per line, e.g.:
+
+    {"lemma": "the", "count": 1043}
+
+    The vocabulary file is only read, binary book files that do not have the
+    IDs of the vocabulary are given IDs in memory, their strings that are
+    not in the vocabulary are not added to the vocabulary file, and the
+    binary book files are not re-written, see `add`.
+    '''
+    if attribute not in ATTRIBUTE_TABLES:
+        raise typer.BadParameter(f'`--attribute` has to be one of {list(ATTRIBUTE_TABLES)}')
+    if not isinstance(top, int):
+        top = None
+    table_name = ATTRIBUTE_TABLES[attribute]
+    counts = np.zeros(0, dtype=np.int64)
+    with CorpusVocabulary(vocabulary_file, read_only=True) as vocabulary:
+        for binary_book_file in binary_book_files(binary_books):
+            binary_book = BinaryBook.load(binary_book_file)
+            if attribute not in binary_book.columns:
+                continue
+            vocabulary.add_book(binary_book)
+            book_counts = np.bincount(binary_book.vocabulary_codes(attribute))
+            if len(book_counts) > len(counts):
+                counts = np.pad(counts, (0, len(book_counts) - len(counts)))
+            counts[:len(book_counts)] += book_counts
+        strings = vocabulary.strings(table_name)
+    string_ids = np.flatnonzero(counts)
+    # Most frequent first, ties in ID order.
+    string_ids = string_ids[np.argsort(-counts[string_ids], kind='stable')][:top]
+    for string_id in string_ids.tolist():
+        typer.echo(json.dumps({attribute: strings[string_id],
+                               'count': int(counts[string_id])}))
+
+if __name__ == "__main__":
+    app()
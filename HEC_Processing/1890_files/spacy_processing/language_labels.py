@@ -0,0 +1,82 @@
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from langcodes import Language, standardize_tag
+
+from corpus_source import BookFile
+import json_backend
+
+# FastText language label, e.g. `__label__en`, to its BCP 47 code and English 
+# language name, e.g. `('en', 'English')`, as resolving a label through 
+# langcodes is slow compared to identifying the language of a page. Labels 
+# are added as they are resolved, see `label_language`, or all at once from 
+# a label table, see `create_label_table` and `load_label_table`.
+_label_languages: Dict[str, Tuple[str, str]] = {}
+
+def label_language(language_label: str) -> Tuple[str, str]:
+    '''
+    :param language_label: A FastText language label e.g. `__label__en`.
+    :returns: The BCP 47 code and English name of the label's language e.g. 
+              `('en', 'English')`, of which each label is only resolved 
+              through langcodes once.
+    '''
+    if language_label not in _label_languages:
+        language = language_label.replace('__label__', '', 1)
+        _label_languages[language_label] = (standardize_tag(language),
+                                            Language.get(language).describe('en')['language'])
+    return _label_languages[language_label]
+
+def create_label_table(model: Any) -> Dict[str, Tuple[str, str]]:
+    '''
+    :param model: A FastText language identification model.
+    :returns: The BCP 47 code and English language name, see 
+              `label_language`, of every label of the model.
+    '''
+    return {language_label: label_language(language_label) 
+            for language_label in model.get_labels()}
+
+def load_label_table(label_table_file: Path) -> None:
+    '''
+    :param label_table_file: A JSON object of FastText language label to a 
+                             BCP 47 code and English language name, created 
+                             through the `label-table` command. The labels 
+                             are then used by `label_language` rather than 
+                             resolving them through langcodes.
+    '''
+    with label_table_file.open('r') as label_table_fp:
+        for language_label, (language_code, language_name) in json_backend.load(label_table_fp).items():
+            _label_languages[language_label] = (language_code, language_name)
+
+def language_output(language_counts: Counter, book_file: BookFile,
+                    exclude_filename: bool) -> Dict[str, Any]:
+    '''
+    :param language_counts: The number of pages in the book file that have 
+                            been identified as each FastText language label.
+    :param book_file: File path to the British library book file the 
+                      `language_counts` came from.
+    :param exclude_filename: If True the `filename` key will not be in the 
+                             returned output.
+    :returns: The JSON output for the book file as described in `process_file`.
+    '''
+    total_count = sum(language_counts.values())
+    # Add detailed language data
+    language_specific_data = {}
+    for language, count in language_counts.items():
+        language_code, language_name = label_language(language)
+        language_specific_data[language_name] = {'BCP 47 code': language_code,
+                                                 'count': count,
+                                                 'proportion': count / total_count}
+    
+    most_common_language = language_counts.most_common(1)
+    output_data = {}
+    if not exclude_filename:
+        output_data["filename"] = book_file.stem
+    
+    if most_common_language:
+        _, most_common_language = label_language(most_common_language[0][0])
+        output_data["language"] = most_common_language
+        output_data["language_extras"] = language_specific_data
+    else:
+        output_data["language"] = None
+    return output_data
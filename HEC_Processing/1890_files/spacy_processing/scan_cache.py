@@ -0,0 +1,144 @@
+import json
+from pathlib import Path
+import sqlite3
+from typing import Any, Dict, Iterable, Optional
+
+import typer
+
+import json_backend
+
+app = typer.Typer()
+
+class ScanCache:
+    '''
+    A persistent cache of facts derived from British library book files, e.g.
+    the number of pages or the language of a book, stored in a SQLite
+    database. The facts of a book file are keyed by its absolute file path,
+    size, and modification time, therefore if a book file changes its facts
+    are no longer returned and are replaced the next time a fact is set.
+
+    Each fact has a name, e.g. `statistics`, and a JSON serialisable value.
+    Facts are committed to the database every `commit_every` facts that are
+    set and when the cache is closed.
+    '''
+    def __init__(self, cache_file: Path, commit_every: int = 100) -> None:
+        '''
+        :param cache_file: The SQLite database file, it is created if it does
+                           not exist.
+        :param commit_every: Number of facts set between commits.
+        '''
+        self.cache_file = cache_file
+        self.commit_every = commit_every
+        self._number_uncommitted = 0
+        self._connection = sqlite3.connect(str(cache_file))
+        self._connection.execute('CREATE TABLE IF NOT EXISTS books '
+                                 '(path TEXT PRIMARY KEY, size INTEGER NOT NULL, '
+                                 'mtime INTEGER NOT NULL, facts TEXT NOT NULL)')
+        self._connection.commit()
+
+    def __enter__(self) -> 'ScanCache':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @staticmethod
+    def _key(book_file: Path) -> str:
+        return str(book_file.resolve())
+
+    def _facts(self, book_file: Path) -> Optional[Dict[str, Any]]:
+        '''
+        :returns: All of the facts of the book file, None if the book file is
+                  not in the cache or has changed since its facts were set.
+        '''
+        row = self._connection.execute('SELECT size, mtime, facts FROM books '
+                                       'WHERE path = ?',
+                                       (self._key(book_file),)).fetchone()
+        if row is None:
+            return None
+        size, mtime, facts = row
+        book_file_stat = book_file.stat()
+        if (size, mtime) != (book_file_stat.st_size, book_file_stat.st_mtime_ns):
+            return None
+        return json_backend.loads(facts)
+
+    def get(self, book_file: Path, fact_name: str) -> Optional[Any]:
+        '''
+        :param book_file: File path to a British library book file.
+        :param fact_name: Name of the fact.
+        :returns: The value of the fact, None if the fact has not been set or
+                  the book file has changed since it was set.
+        '''
+        facts = self._facts(book_file)
+        if facts is None:
+            return None
+        return facts.get(fact_name)
+
+    def set(self, book_file: Path, fact_name: str, value: Any) -> None:
+        '''
+        :param book_file: File path to a British library book file.
+        :param fact_name: Name of the fact.
+        :param value: JSON serialisable value of the fact. If the book file
+                      has changed since its other facts were set those facts
+                      are removed.
+        '''
+        facts = self._facts(book_file) or {}
+        facts[fact_name] = value
+        book_file_stat = book_file.stat()
+        self._connection.execute('INSERT OR REPLACE INTO books VALUES (?, ?, ?, ?)',
+                                 (self._key(book_file), book_file_stat.st_size,
+                                  book_file_stat.st_mtime_ns, json.dumps(facts)))
+        self._number_uncommitted += 1
+        if self._number_uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        '''
+        Commits the facts that have been set to the database.
+        '''
+        self._connection.commit()
+        self._number_uncommitted = 0
+
+    def close(self) -> None:
+        '''
+        Commits the facts that have been set and closes the database.
+        '''
+        self.commit()
+        self._connection.close()
+
+    def books(self) -> Iterable[Dict[str, Any]]:
+        '''
+        :returns: Yields for every book file in the cache, in file path order,
+                  a dictionary of its `path`, `size`, `mtime`, and `facts`.
+                  Book files that have changed since their facts were set are
+                  included.
+        '''
+        rows = self._connection.execute('SELECT path, size, mtime, facts FROM books '
+                                        'ORDER BY path')
+        for path, size, mtime, facts in rows:
+            yield {'path': path, 'size': size, 'mtime': mtime,
+                   'facts': json_backend.loads(facts)}
+
+@app.command()
+def show(cache_file: Path = typer.Argument(..., exists=True, dir_okay=False, file_okay=True, help="Scan cache file."),
+         fact_name: Optional[str] = typer.Option(None, "--fact", help="Only show this fact, and only the book files that have this fact.")
+         ) -> None:
+    '''
+    Writes every book file in the scan cache, one JSON object per line, with
+    the keys `path`, `size`, `mtime` (in nanoseconds), and `facts`, for
+    example:
+
+    {"path": "/home/json/0118/011833856_01_text.json", "size": 3547, "mtime": 1630000000000000000, "facts": {"statistics": {"pages": 3}}}
+    '''
+    if not isinstance(fact_name, str):
+        fact_name = None
+    with ScanCache(cache_file) as scan_cache:
+        for book in scan_cache.books():
+            if fact_name is not None:
+                if fact_name not in book['facts']:
+                    continue
+                book['facts'] = {fact_name: book['facts'][fact_name]}
+            typer.echo(json.dumps(book))
+
+if __name__ == "__main__":
+    app()
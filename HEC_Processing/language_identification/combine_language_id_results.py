@@ -1,22 +1,169 @@
+import enum
 import json
 from pathlib import Path
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import typer
 
+from compressed_files import open_input, open_output
+import json_backend
+
 
 app = typer.Typer()
 
+# Number of bytes of lines read from a results file at a time when copying.
+COPY_CHUNK_SIZE = 1048576
+
+@enum.unique
+class MergeMethod(str, enum.Enum):
+    PARSE = "parse"
+    COPY = "copy"
+
+def is_json_object_line(line: bytes) -> bool:
+    '''
+    :param line: A line, without surrounding whitespace, from a results file.
+    :returns: True if the line starts and ends like a JSON object. This is a
+              cheap check that catches truncated lines, e.g. from a batch job
+              that was killed while writing, without parsing the line.
+    '''
+    return line[:1] == b'{' and line[-1:] == b'}'
+
+def result_lines(result_file: Path) -> Iterable[Tuple[int, List[bytes]]]:
+    '''
+    :param result_file: A file that contains a JSON object on each new line,
+                        it can be gzip or zstd compressed, see
+                        `compressed_files.open_input`.
+    :returns: Yields the number of lines read so far and the non empty lines,
+              without surrounding whitespace, read `COPY_CHUNK_SIZE` bytes of
+              lines at a time.
+    :raises ValueError: If a line is not a JSON object according to
+                        `is_json_object_line`.
+    '''
+    number_lines = 0
+    with open_input(result_file, 'rb') as result_fp:
+        while True:
+            chunk = result_fp.readlines(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            lines: List[bytes] = []
+            for line in chunk:
+                number_lines += 1
+                line = line.strip()
+                if not line:
+                    continue
+                if not is_json_object_line(line):
+                    raise ValueError(f'Line {number_lines} of {result_file} is '
+                                     f'not a JSON object: {line[:100]!r}')
+                lines.append(line)
+            yield number_lines, lines
+
+def language_index(filename_languages: Dict[str, Optional[str]]
+                   ) -> Dict[str, Optional[str]]:
+    '''
+    :param filename_languages: The `filename` and `language` of each language
+                               identification result, see
+                               `../../language_identification/language_id.py`.
+    :returns: A dictionary of book identifier, e.g. `000228355` from the
+              filename `000228355_01_text`, to the language of the book.
+              Books with more than one volume, of which at least two volumes
+              have a different language, have the language None.
+    '''
+    index: Dict[str, Optional[str]] = {}
+    mixed_language_ids = set()
+    for filename, language in filename_languages.items():
+        _id = filename.split('_')[0]
+        if index.get(_id, language) != language:
+            mixed_language_ids.add(_id)
+        index[_id] = language
+    for _id in mixed_language_ids:
+        index[_id] = None
+    return index
+
 @app.command()
 def combine_results(results_directory: Path = typer.Argument(..., exists=True, dir_okay=True, file_okay=False, help="Directory that contains a list of files, whereby each file contains a JSON string on each new line."),
-                    combined_results_file: Path = typer.Argument(..., help="A file to write each JSON string from each file in the `results_directory` too, whereby each JSON string will be on a new line.")) -> None:
-    with combined_results_file.open('w') as combined_fp:
-        for result_file in results_directory.iterdir():
-            with result_file.open('r') as result_fp:
-                for line in result_fp:
-                    line = line.strip()
-                    if line:
-                        result = json.loads(line)
-                        combined_fp.write(f'{json.dumps(result)}\n')
+                    combined_results_file: Path = typer.Argument(..., help="A file to write each JSON string from each file in the `results_directory` too, whereby each JSON string will be on a new line. If the file name ends in `.gz` or `.zst` it is gzip or zstd compressed."),
+                    method: MergeMethod = typer.Option(MergeMethod.PARSE, "--method", case_sensitive=False, help="`parse` parses and re-serialises each JSON string, `copy` copies the bytes of each line after checking it looks like a JSON object."),
+                    sort: bool = typer.Option(False, "--sort", help="Sort the JSON strings by `filename`, keeping only the last JSON string of each `filename`."),
+                    index_file: Optional[Path] = typer.Option(None, "--index-file", dir_okay=False, file_okay=True, help="File to write a JSON object of book identifier to language to.")) -> None:
+    '''
+    Combines the language identification results files, one per batch, in
+    the `results_directory`, in file name order, into one file.
+
+    With `--method copy` each line is only checked to start with `{` and end
+    with `}`, rather than being parsed and re-serialised, and the lines are
+    read and written in large chunks of bytes, therefore the results are
+    combined at close to the speed of the disk. The output is the same as
+    `--method parse` for results files written by `language_id.py`.
+
+    With `--sort` the results are sorted by `filename`, whereby if a
+    `filename` is in more than one results file, e.g. a batch that was run
+    twice, only the last result is kept. With `--index-file` a JSON object
+    of book identifier to language is also written, see `language_index`.
+    Both of these require the `filename` and `language` of each result,
+    therefore each line is parsed through `json_backend` but the line that is
+    written is the line as it was read, when using `--method copy`.
+
+    The results files can be gzip or zstd compressed, e.g. from
+    `language_id.py process-files` with an output file that ends in `.gz` or
+    `.zst`, they are decompressed as they are read. If the
+    `combined_results_file` ends in `.gz` or `.zst` it is compressed as it is
+    written. The number of MB in the throughput line is the size of the
+    results files on disk.
+    '''
+    if not isinstance(method, MergeMethod):
+        method = MergeMethod.PARSE
+    if not isinstance(sort, bool):
+        sort = False
+    if not isinstance(index_file, Path):
+        index_file = None
+
+    t = time.perf_counter()
+    number_bytes = 0
+    number_results = 0
+    # Line of each filename when sorting, in the order the filename was
+    # first seen.
+    filename_lines: Dict[str, bytes] = {}
+    # Language of each filename when creating the index.
+    filename_languages: Dict[str, Optional[str]] = {}
+    result_files = sorted(result_file for result_file in results_directory.iterdir()
+                          if result_file.is_file())
+    with open_output(combined_results_file, 'wb') as combined_fp:
+        for result_file in result_files:
+            number_bytes += result_file.stat().st_size
+            for _, lines in result_lines(result_file):
+                if method == MergeMethod.PARSE or sort or index_file is not None:
+                    results = [json_backend.loads(line) for line in lines]
+                    if (sort or index_file is not None) and not all('filename' in result for result in results):
+                        raise ValueError(f'`--sort` and `--index-file` require every result '
+                                         f'in {result_file} to have a `filename`')
+                    if method == MergeMethod.PARSE:
+                        lines = [json.dumps(result).encode('utf-8') for result in results]
+                    if index_file is not None:
+                        for result in results:
+                            filename_languages[result['filename']] = result['language']
+                    if sort:
+                        for result, line in zip(results, lines):
+                            filename_lines[result['filename']] = line
+                        continue
+                number_results += len(lines)
+                combined_fp.write(b'\n'.join(lines))
+                if lines:
+                    combined_fp.write(b'\n')
+        if sort:
+            number_results = len(filename_lines)
+            for filename in sorted(filename_lines):
+                combined_fp.write(filename_lines[filename])
+                combined_fp.write(b'\n')
+
+    if index_file is not None:
+        with index_file.open('w') as index_fp:
+            json.dump(language_index(filename_languages), index_fp, sort_keys=True)
+
+    total_time = time.perf_counter() - t
+    megabytes = number_bytes / 1000000
+    typer.echo(f'Combined {number_results} results from {len(result_files)} '
+               f'files ({megabytes:.2f}MB) in {total_time:.2f} seconds')
 
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    app()
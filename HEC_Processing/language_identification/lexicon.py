@@ -0,0 +1,119 @@
+import json
+from pathlib import Path
+import re
+from typing import Iterable, Iterator
+
+import typer
+
+import json_backend
+
+app = typer.Typer()
+
+# Used to split text into words when the text has not been tokenised by spaCy
+# e.g. the text of a page at the language identification stage.
+WORD_PATTERN = re.compile(r'\w+')
+
+class Lexicon:
+    '''
+    A fixed set of words, whereby checking if a word is in the lexicon takes
+    constant time. Used to measure the OCR quality of a book, see `OCRQuality`.
+    '''
+    def __init__(self, words: Iterable[str]) -> None:
+        '''
+        :param words: The words in the lexicon. These are copied, therefore
+                      the lexicon does not change if `words` changes e.g.
+                      `nlp.vocab.strings` of a spaCy model.
+        '''
+        self._words = frozenset(words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._words)
+
+    def save(self, lexicon_file: Path) -> None:
+        '''
+        :param lexicon_file: File to save the lexicon to as a JSON Array of
+                             words.
+        '''
+        with lexicon_file.open('w') as lexicon_fp:
+            json.dump(sorted(self._words), lexicon_fp)
+
+    @classmethod
+    def load(cls, lexicon_file: Path) -> 'Lexicon':
+        '''
+        :param lexicon_file: File that was created through `Lexicon.save`.
+        :returns: The lexicon saved in the `lexicon_file`.
+        '''
+        with lexicon_file.open('r') as lexicon_fp:
+            return cls(json_backend.load(lexicon_fp))
+
+class OCRQuality:
+    '''
+    Measures the OCR quality of some text as the proportion of tokens,
+    excluding punctuation, that are in a lexicon, the higher the quality the
+    better.
+    '''
+    def __init__(self, lexicon: Lexicon) -> None:
+        self.lexicon = lexicon
+        self.number_tokens = 0
+        self.number_tokens_found = 0
+
+    def add_token(self, token: str) -> None:
+        '''
+        :param token: A token that is not punctuation. The lower cased token
+                      is looked up in the lexicon.
+        '''
+        self.number_tokens += 1
+        if token.lower() in self.lexicon:
+            self.number_tokens_found += 1
+
+    def add_counts(self, number_tokens: int, number_tokens_found: int
+                   ) -> None:
+        '''
+        :param number_tokens: Number of tokens, that are not punctuation, to 
+                              add.
+        :param number_tokens_found: Number of those tokens whose lower cased 
+                                    token is in the lexicon.
+        '''
+        self.number_tokens += number_tokens
+        self.number_tokens_found += number_tokens_found
+
+    def add_text(self, text: str) -> None:
+        '''
+        :param text: Text that has not been tokenised, the words in the text
+                     are found through `WORD_PATTERN` and added through
+                     `add_token`.
+        '''
+        for word in WORD_PATTERN.findall(text):
+            self.add_token(word)
+
+    @property
+    def quality(self) -> float:
+        '''
+        :returns: The proportion of tokens added that are in the lexicon
+                  rounded to 4 decimal places, 0 if no tokens have been added.
+        '''
+        if self.number_tokens == 0:
+            return 0
+        return round(self.number_tokens_found / self.number_tokens, 4)
+
+@app.command()
+def create_lexicon(lexicon_file: Path = typer.Argument(..., help="File to save the lexicon to.")) -> None:
+    '''
+    Saves the vocabulary of the English medium spaCy model, which is the
+    lexicon `spacy_tagging.py` uses to measure OCR quality, to the
+    `lexicon_file`. This file can then be loaded through `Lexicon.load`
+    without needing spaCy e.g. at the language identification stage.
+    '''
+    # Imported here so that the rest of this module does not require spaCy.
+    import en_core_web_md
+    nlp = en_core_web_md.load()
+    Lexicon(nlp.vocab.strings).save(lexicon_file)
+
+if __name__ == "__main__":
+    app()
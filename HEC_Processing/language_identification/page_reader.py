@@ -0,0 +1,115 @@
+import json
+from pathlib import Path
+from typing import Any, Iterable, Tuple
+
+import json_backend
+
+# Number of characters read from a book file at a time.
+READ_SIZE = 65536
+# Book files up to this size, in bytes, are loaded whole through the fastest 
+# JSON parser installed, see `json_backend`, rather than one page at a time.
+LOAD_SIZE = 1048576
+
+_WHITESPACE = ' \t\n\r'
+
+def read_pages(book_file: Path, read_size: int = READ_SIZE,
+               load_size: int = LOAD_SIZE) -> Iterable[Tuple[Any, str]]:
+    '''
+    Reads the pages of a British library book file, a JSON Array of pages
+    whereby each page is a JSON Array of page number and text e.g.
+    `[[1, "text"], [2, "more text"]]`, one page at a time. Unlike `json.load`
+    the whole book is never in memory, at most one page and `read_size`
+    characters are, unless the book file is no larger than `load_size` bytes 
+    in which case the whole book is loaded through `json_backend.loads` as 
+    that is faster.
+
+    :param book_file: File path to a British library book file.
+    :param read_size: Number of characters to read from the file at a time. If
+                      a page is larger than this more is read until the whole
+                      page has been read.
+    :param load_size: Book files up to this size, in bytes, are loaded whole.
+    :returns: Yields the page number and text of each page in the given book
+              file, including pages that contain no text.
+    :raises json.decoder.JSONDecodeError: If the file is not a JSON Array e.g.
+                                          the file is empty. As the pages are
+                                          read one at a time this can be
+                                          raised after some pages have been
+                                          yielded.
+    '''
+    if book_file.stat().st_size <= load_size:
+        with book_file.open('rb') as fp:
+            pages = json_backend.load(fp)
+        if not isinstance(pages, list):
+            raise json.decoder.JSONDecodeError('Expecting a JSON Array', '', 0)
+        for page in pages:
+            yield (page[0], page[1])
+        return
+
+    decoder = json.JSONDecoder()
+    with book_file.open('r') as fp:
+        buffer = ''
+        position = 0
+        end_of_file = False
+
+        def read_more(number_characters: int) -> None:
+            nonlocal buffer, position, end_of_file
+            data = fp.read(number_characters)
+            if not data:
+                end_of_file = True
+            buffer = buffer[position:] + data
+            position = 0
+
+        def skip_whitespace() -> bool:
+            '''
+            :returns: True if there is a non whitespace character at
+                      `position`, False if the end of the file is reached
+                      first.
+            '''
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in _WHITESPACE:
+                    position += 1
+                if position < len(buffer):
+                    return True
+                if end_of_file:
+                    return False
+                read_more(read_size)
+
+        def error(message: str) -> json.decoder.JSONDecodeError:
+            return json.decoder.JSONDecodeError(message, buffer, position)
+
+        if not skip_whitespace() or buffer[position] != '[':
+            raise error('Expecting value')
+        position += 1
+
+        expecting_page = True
+        while True:
+            if not skip_whitespace():
+                raise error('Expecting value')
+            if buffer[position] == ']':
+                return
+            if not expecting_page:
+                if buffer[position] != ',':
+                    raise error("Expecting ',' delimiter")
+                position += 1
+                if not skip_whitespace():
+                    raise error('Expecting value')
+
+            # A page has been decoded when the character after it has been
+            # read, as otherwise the page could be cut off.
+            number_characters = read_size
+            while True:
+                try:
+                    page, page_end = decoder.raw_decode(buffer, position)
+                    if page_end < len(buffer) or end_of_file:
+                        break
+                except json.decoder.JSONDecodeError:
+                    if end_of_file:
+                        raise
+                # Reading double the amount each time ensures that a large
+                # page is decoded a few times rather than once per read.
+                number_characters = max(number_characters, len(buffer) - position)
+                read_more(number_characters)
+            position = page_end
+            expecting_page = False
+            yield (page[0], page[1])
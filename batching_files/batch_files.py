@@ -1,24 +1,147 @@
-from typing import List
+import enum
+import heapq
+import os
+from typing import List, Optional
 from pathlib import Path
 import shutil
 
 import typer
 
+from corpus_source import ArchiveBookFile, BookFile, open_corpus_source
+import json_backend
+
+@enum.unique
+class BatchMethod(str, enum.Enum):
+    COPY = "copy"
+    HARDLINK = "hardlink"
+    SYMLINK = "symlink"
+    MANIFEST = "manifest"
+
+@enum.unique
+class BalanceBy(str, enum.Enum):
+    BYTES = "bytes"
+    CHARACTERS = "characters"
+    COST = "cost"
+
+# The Spacy benchmark results and the size, in bytes, of the 10 page book they 
+# were benchmarked on, `../spacy_processing/test_data/real_book_data/10_page_example.json`.
+BENCHMARK_RESULTS_FILE = Path(__file__, '..', '..', 'spacy_processing', 
+                              'benchmark_results.json').resolve()
+BENCHMARK_BOOK_BYTES = 21142
+
 app = typer.Typer()
 
+def link_or_copy_files_to_folder(files_to_copy: List[BookFile], 
+                                 folder_to_copy_too: Path,
+                                 method: BatchMethod) -> None:
+    '''
+    Given a list of files, it will copy, hardlink, or symlink (depending on 
+    the `method`) these files to the folder, whereby it will be saved in that 
+    folder as same file name. Book files within an archive file can only be 
+    copied, which extracts them from the archive file.
+    '''
+    for file_to_copy in files_to_copy:
+        copy_file_path = Path(folder_to_copy_too, file_to_copy.name)
+        if isinstance(file_to_copy, ArchiveBookFile):
+            with file_to_copy.open('rb') as book_fp:
+                with copy_file_path.open('wb') as copy_fp:
+                    shutil.copyfileobj(book_fp, copy_fp)
+        elif method == BatchMethod.HARDLINK:
+            os.link(file_to_copy, copy_file_path)
+        elif method == BatchMethod.SYMLINK:
+            copy_file_path.symlink_to(file_to_copy.resolve())
+        else:
+            shutil.copyfile(file_to_copy, copy_file_path)
+
+def book_characters(book_file: BookFile) -> int:
+    '''
+    :param book_file: File path to a British library book file, or a book file 
+                      within an archive file.
+    :returns: The number of characters in the text of all pages of the book.
+    '''
+    with book_file.open('r') as book_fp:
+        return sum(len(page[1]) for page in json_backend.load(book_fp))
+
+def seconds_per_byte(benchmark_results_file: Path, components: List[str]
+                     ) -> float:
+    '''
+    :param benchmark_results_file: The Spacy benchmark results file, see 
+                                   `../spacy_processing/benchmark_results.json`.
+    :param components: The Spacy components that will be used e.g. `tagger`.
+    :returns: The estimated time, in seconds, it takes Spacy with the given 
+              components to process one byte of a book file. Based on the 
+              benchmark time of the 10 page book.
+    :raises ValueError: If the components were not benchmarked.
+    '''
+    with benchmark_results_file.open('r') as benchmark_fp:
+        for benchmark_result in json_backend.load(benchmark_fp):
+            if sorted(benchmark_result['compoenets']) == sorted(components):
+                return benchmark_result['time'] / BENCHMARK_BOOK_BYTES
+    raise ValueError(f'The components {components} have not been benchmarked '
+                     f'in {benchmark_results_file}')
+
+def balance_batches(file_weights: List[float], number_batches: int
+                    ) -> List[List[int]]:
+    '''
+    Assigns each file to a batch so that the total weight of each batch is as 
+    even as possible, through the Longest Processing Time first algorithm: 
+    going from the heaviest file to the lightest, each file is assigned to the 
+    batch that has the lowest total weight so far.
+
+    :param file_weights: The weight of each file e.g. its size in bytes.
+    :param number_batches: Number of batches.
+    :returns: For each batch the indexes of the files in that batch, in 
+              ascending order.
+    '''
+    batch_weights = [(0.0, batch_number) for batch_number in range(number_batches)]
+    batches: List[List[int]] = [[] for _ in range(number_batches)]
+    file_indexes = sorted(range(len(file_weights)), 
+                          key=lambda file_index: file_weights[file_index], 
+                          reverse=True)
+    for file_index in file_indexes:
+        batch_weight, batch_number = heapq.heappop(batch_weights)
+        batches[batch_number].append(file_index)
+        heapq.heappush(batch_weights, 
+                       (batch_weight + file_weights[file_index], batch_number))
+    return [sorted(batch) for batch in batches]
+
+def write_manifest(files_to_list: List[BookFile], manifest_file: Path) -> None:
+    '''
+    Given a list of files, it will write the absolute file path of each file 
+    on a new line of the `manifest_file`. For book files within an archive 
+    file the file path relative to the top level directory of the book corpus 
+    is written instead, e.g. `0118/011833856_01_text.json`, as the manifest 
+    file is given along with the archive file, e.g. `spacy_tagging.py 
+    --book-folder ARCHIVE_FILE`.
+    '''
+    with manifest_file.open('w') as manifest_fp:
+        for file_to_list in files_to_list:
+            if isinstance(file_to_list, ArchiveBookFile):
+                manifest_fp.write(f'{file_to_list.member_name}\n')
+            else:
+                manifest_fp.write(f'{file_to_list.resolve()}\n')
+
 @app.command()
 def batch(batch_size: int = typer.Argument(..., help="Maximum number of files per batch folder."),
           book_folder: Path = typer.Argument(..., 
                                              exists=True,
                                              dir_okay=True,
-                                             file_okay=False,
-                                             help="The top level directory the books were downloaded to e.g. /home/json. In the root directory of this repositories README this is called the `DIRECTORY_TO_BOOKS`"), 
+                                             file_okay=True,
+                                             help="The top level directory the books were downloaded to e.g. /home/json. In the root directory of this repositories README this is called the `DIRECTORY_TO_BOOKS`. It can instead be an archive file of the book corpus, see `corpus_source.py`."), 
           extracted_file_names_file: Path = typer.Argument(...,
                                                            exists=True,
                                                            dir_okay=False,
                                                            file_okay=True,
                                                            help="The file that contains the relative file paths of all books that are to be batched. The file paths will be relative to the `book_folder`. e.g. `0118/011833856_01_text.json`"),
-          batch_folder: Path = typer.Argument(..., exists=False, help="Folder that will contain all of the batch folders.")
+          batch_folder: Path = typer.Argument(..., exists=False, help="Folder that will contain all of the batch folders."),
+          method: BatchMethod = typer.Option(BatchMethod.COPY, "--method", case_sensitive=False,
+                                             help="How the files are batched: `copy` copies the files to each batch folder, `hardlink` and `symlink` link the files to each batch folder, and `manifest` writes each batch as a manifest file that lists the absolute file paths of the batch."),
+          balance: Optional[BalanceBy] = typer.Option(None, "--balance", case_sensitive=False,
+                                                      help="Balance the batches so that each batch has roughly the same total number of `bytes`, `characters`, or estimated Spacy processing time (`cost`). The number of batches is the same as without balancing, but a batch can contain more than `batch_size` files."),
+          cost_components: Optional[List[str]] = typer.Option(None, "--cost-component",
+                                                              help="The Spacy components, e.g. tagger, used to estimate the processing time when balancing by `cost`. By default `tagger`."),
+          benchmark_results_file: Optional[Path] = typer.Option(None, "--benchmark-results", dir_okay=False, file_okay=True,
+                                                                help="The Spacy benchmark results used to estimate the processing time when balancing by `cost`. By default `../spacy_processing/benchmark_results.json`.")
     ) -> None:
     '''
     Given a batch size, *N*, it will copy *N* files from the book folder to a 
@@ -29,22 +152,89 @@ def batch(batch_size: int = typer.Argument(..., help="Maximum number of files pe
     sub folder within `batch_folder` whereby the first batch will be saved to 
     sub folder `0` and the last to sub folder *M* if there are *M* batches of 
     *N* files in the `extracted_file_names_file`.
+
+    Instead of copying the files the `method` can be `hardlink` or `symlink` 
+    whereby the files in each sub folder are links to the files in the book 
+    folder, or `manifest` whereby no sub folders are created and instead each 
+    batch is a manifest file within `batch_folder`, e.g. `0.txt` to *M*`.txt`,
+    that contains the absolute file path of each file in the batch on a new 
+    line. These manifest files can be given to `language_id.py process-files` 
+    and `spacy_tagging.py` instead of a folder of book files.
+
+    The `book_folder` can instead be an archive file of the book corpus, see 
+    `corpus_source.py`, whereby `copy` extracts the book files of each batch 
+    from the archive file and `manifest` writes the relative file path of each 
+    file, e.g. `0118/011833856_01_text.json`, as the manifest files are given 
+    along with the archive file through `--book-folder`. Book files within an 
+    archive file cannot be linked.
+
+    With `balance` the files are not batched in the order they are listed, 
+    instead the same number of batches are created but the files are assigned 
+    to the batches so that each batch has roughly the same total number of 
+    bytes, characters, or estimated Spacy processing time (`cost`), so that 
+    each batch takes roughly the same time to process. The `cost` is estimated 
+    from the number of bytes in each file and the Spacy benchmark results. The 
+    total of each batch, and the largest total (makespan), is printed.
     '''
+    if not isinstance(method, BatchMethod):
+        method = BatchMethod.COPY
+    if (not book_folder.is_dir() 
+            and method in (BatchMethod.HARDLINK, BatchMethod.SYMLINK)):
+        raise typer.BadParameter(f'The book files within an archive file cannot '
+                                 f'be batched through `{method.value}`, use '
+                                 '`copy` or `manifest`')
+    source = open_corpus_source(book_folder)
 
-    def copy_files_to_folder(files_to_copy: List[Path], folder_to_copy_too: Path
-                             ) -> None:
-        '''
-        Given a list of files to copy, it will copy these files to the folder, 
-        whereby it will be saved in that folder as same file name.
-        '''
-        for file_to_copy in files_to_copy:
-            copy_file_path = Path(folder_to_copy_too, file_to_copy.name)
-            shutil.copyfile(file_to_copy, copy_file_path)
+    def save_batch(file_paths: List[BookFile], batch_number: int) -> None:
+        if method == BatchMethod.MANIFEST:
+            batch_folder.mkdir(parents=True, exist_ok=True)
+            write_manifest(file_paths, Path(batch_folder, f'{batch_number}.txt'))
+        else:
+            sub_batch_folder = Path(batch_folder, str(batch_number))
+            sub_batch_folder.mkdir(parents=True)
+            link_or_copy_files_to_folder(file_paths, sub_batch_folder, method)
+
+    if isinstance(balance, BalanceBy):
+        file_paths: List[BookFile] = []
+        with extracted_file_names_file.open('r') as extracted_fp:
+            for line in extracted_fp:
+                line = line.strip()
+                if line:
+                    file_paths.append(source.book_file(line))
+        
+        unit = balance.value
+        if balance == BalanceBy.CHARACTERS:
+            file_weights = [book_characters(file_path) for file_path in file_paths]
+        else:
+            file_weights = [file_path.stat().st_size for file_path in file_paths]
+        if balance == BalanceBy.COST:
+            if not isinstance(cost_components, list) or not cost_components:
+                cost_components = ['tagger']
+            if not isinstance(benchmark_results_file, Path):
+                benchmark_results_file = BENCHMARK_RESULTS_FILE
+            if not benchmark_results_file.is_file():
+                raise typer.BadParameter(f'The benchmark results file {benchmark_results_file} '
+                                         'does not exist, balancing by `cost` requires the '
+                                         'Spacy benchmark results, see `--benchmark-results`')
+            cost_per_byte = seconds_per_byte(benchmark_results_file, cost_components) / 3600
+            file_weights = [file_weight * cost_per_byte for file_weight in file_weights]
+            unit = 'hours'
+        
+        number_batches = -(-len(file_paths) // batch_size)
+        batch_weights: List[float] = []
+        for batch_number, file_indexes in enumerate(balance_batches(file_weights, number_batches)):
+            save_batch([file_paths[file_index] for file_index in file_indexes], batch_number)
+            batch_weight = sum(file_weights[file_index] for file_index in file_indexes)
+            batch_weights.append(batch_weight)
+            typer.echo(f'Batch {batch_number}: {len(file_indexes)} files, {batch_weight:.2f} {unit}')
+        if batch_weights:
+            typer.echo(f'Makespan (largest batch): {max(batch_weights):.2f} {unit}')
+        return
 
     batch_number = 0
     
     with extracted_file_names_file.open('r') as extracted_fp:
-        file_paths: List[Path] = []
+        file_paths: List[BookFile] = []
         for index, line in enumerate(extracted_fp):
             # If the count starts at 0, 0 modules (%) anything is 0
             count = index + 1
@@ -52,18 +242,14 @@ def batch(batch_size: int = typer.Argument(..., help="Maximum number of files pe
             if not line:
                 continue
             
-            file_path = Path(book_folder, *line.split('/'))
+            file_path = source.book_file(line)
             file_paths.append(file_path)
             if (count % batch_size) == 0:
-                sub_batch_folder = Path(batch_folder, str(batch_number))
-                sub_batch_folder.mkdir(parents=True)
-                copy_files_to_folder(file_paths, sub_batch_folder)
+                save_batch(file_paths, batch_number)
                 batch_number += 1
                 file_paths = []
         if file_paths:
-            sub_batch_folder = Path(batch_folder, str(batch_number))
-            sub_batch_folder.mkdir(parents=True)
-            copy_files_to_folder(file_paths, sub_batch_folder)
+            save_batch(file_paths, batch_number)
             file_paths = []
 
 if __name__ == "__main__":
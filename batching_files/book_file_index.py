@@ -0,0 +1,103 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import typer
+
+from corpus_source import open_corpus_source
+import json_backend
+
+app = typer.Typer()
+
+BookFileIndex = Dict[str, List[Tuple[str, int]]]
+
+def create_book_file_index(input_folder: Path) -> BookFileIndex:
+    '''
+    Walks the `input_folder` once and indexes every book file by the
+    identifier of the book, the identifier is the start of the file name up
+    to the first `_` e.g. `011834197` for `0118/011834197_01_text.json`.
+
+    :param input_folder: The top level directory the books were downloaded to
+                         e.g. /home/json, this directory contains sub folders
+                         named after the first 4 characters of the book
+                         identifiers. It can instead be an archive file of the
+                         book corpus, see `corpus_source.py`, whereby the book
+                         files are listed from the index of the archive file.
+    :returns: A dictionary of book identifier to a list of the book's
+              volume files, sorted by file path, whereby each volume file is
+              represented by its file path relative to the `input_folder`
+              e.g. `0118/011834197_01_text.json` and its size in bytes. Some
+              books have multiple volumes, therefore have multiple book files.
+    '''
+    book_file_index: BookFileIndex = {}
+    source = open_corpus_source(input_folder)
+    # Book files are only named if they are in the sub folder named after the 
+    # identifier.
+    for relative_file_path in source.book_names():
+        book_file = source.book_file(relative_file_path)
+        _id = book_file.stem.split('_')[0]
+        book_file_index.setdefault(_id, []).append((relative_file_path,
+                                                    book_file.stat().st_size))
+    return book_file_index
+
+def save_book_file_index(book_file_index: BookFileIndex, index_file: Path) -> None:
+    '''
+    :param book_file_index: The index created by `create_book_file_index`.
+    :param index_file: File to save the index to as a JSON Object.
+    '''
+    with index_file.open('w') as index_fp:
+        json.dump(book_file_index, index_fp)
+
+def load_book_file_index(index_file: Path) -> BookFileIndex:
+    '''
+    :param index_file: File that was created through `save_book_file_index`.
+    :returns: The index saved in the `index_file`.
+    '''
+    with index_file.open('r') as index_fp:
+        return {_id: [(relative_file_path, file_size)
+                      for relative_file_path, file_size in book_files]
+                for _id, book_files in json_backend.load(index_fp).items()}
+
+def get_book_file_index(input_folder: Path, index_file: Optional[Path] = None
+                        ) -> BookFileIndex:
+    '''
+    :param input_folder: The top level directory the books were downloaded to.
+    :param index_file: If given and it exists the index is loaded from this
+                       file, if it does not exist the index is created and
+                       saved to this file so that it can be re-used.
+    :returns: The index of book identifier to the book's volume files, see
+              `create_book_file_index`.
+    '''
+    if isinstance(index_file, Path) and index_file.exists():
+        return load_book_file_index(index_file)
+    book_file_index = create_book_file_index(input_folder)
+    if isinstance(index_file, Path):
+        save_book_file_index(book_file_index, index_file)
+    return book_file_index
+
+@app.command()
+def create_index(input_folder: Path = typer.Argument(...,
+                                                     exists=True,
+                                                     dir_okay=True,
+                                                     file_okay=True,
+                                                     help="The top level directory the books were downloaded to e.g. /home/json. In the root directory of this repositories README this is called the `DIRECTORY_TO_BOOKS`. It can instead be an archive file of the book corpus, see `corpus_source.py`."),
+                 index_file: Path = typer.Argument(..., help="File to save the book file index to.")
+                 ) -> None:
+    '''
+    Walks the `input_folder` once and saves to the `index_file`, as a JSON
+    Object, the relative file path and size in bytes of each volume file of
+    each book, indexed by the book identifier, for example:
+
+    {"011834197": [["0118/011834197_01_text.json", 5], ["0118/011834197_02_text.json", 5]]}
+
+    The `index_file` can then be given to the filtering scripts through
+    `--index-file` so that the `input_folder` does not need to be walked again.
+    If the books in the `input_folder` change the index needs to be re-created.
+    '''
+    book_file_index = create_book_file_index(input_folder)
+    save_book_file_index(book_file_index, index_file)
+    number_files = sum(len(book_files) for book_files in book_file_index.values())
+    typer.echo(f'Indexed {number_files} files from {len(book_file_index)} books')
+
+if __name__ == "__main__":
+    app()
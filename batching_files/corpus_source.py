@@ -0,0 +1,540 @@
+import io
+import json
+import os
+from pathlib import Path, PurePosixPath
+import shutil
+import tarfile
+from typing import (IO, Any, Dict, Iterable, List, NamedTuple, Optional,
+                    Tuple, Union)
+import zlib
+
+import typer
+
+from compressed_files import (Compression, available_compressions,
+                              file_compression, stream_writer)
+import json_backend
+
+# zstandard is only required to read and write zstd compressed archives.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+app = typer.Typer()
+
+ARCHIVE_INDEX_VERSION = 1
+# File extension added to the name of an archive file for its index file.
+ARCHIVE_INDEX_SUFFIX = '.index.json'
+# Number of bytes read from an archive file at a time.
+READ_SIZE = 65536
+
+# The offset, in bytes, of a book file within an archive file, the number of
+# bytes it takes up in the archive file, its size, in bytes, once
+# uncompressed, and its modification time in nanoseconds.
+ArchiveEntry = Tuple[int, int, int, int]
+
+def relative_book_name(file_path: str) -> Optional[str]:
+    '''
+    :param file_path: A `/` separated file path of a file within the book
+                      corpus e.g. `json/0118/011834197_01_text.json`, as found
+                      in the downloaded tar file.
+    :returns: The file path of the book file relative to the top level
+              directory of the book corpus, e.g. `0118/011834197_01_text.json`,
+              None if the file is not a book file, a book file has a `.json`
+              extension and is within the sub folder named after the first 4
+              characters of the book identifier.
+    '''
+    parts = PurePosixPath(file_path).parts
+    if len(parts) < 2 or PurePosixPath(parts[-1]).suffix != '.json':
+        return None
+    _id = parts[-1].split('_')[0]
+    if _id[:4] != parts[-2]:
+        return None
+    return f'{parts[-2]}/{parts[-1]}'
+
+class ArchiveBookStat(NamedTuple):
+    st_size: int
+    st_mtime: float
+    st_mtime_ns: int
+
+class _ArchiveMemberReader(io.RawIOBase):
+    '''
+    Reads, and if compressed decompresses, the bytes of one book file from an
+    archive file.
+    '''
+    def __init__(self, archive_file: Path, offset: int, length: int,
+                 compression: Compression) -> None:
+        self._archive_fp = archive_file.open('rb')
+        self._archive_fp.seek(offset)
+        self._remaining = length
+        self._decompressor: Any = None
+        if compression == Compression.GZIP:
+            self._decompressor = zlib.decompressobj(wbits=31)
+        elif compression == Compression.ZSTD:
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        self._buffer = b''
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while self._position == len(self._buffer) and self._remaining:
+            data = self._archive_fp.read(min(READ_SIZE, self._remaining))
+            if not data:
+                raise EOFError(f'{self._archive_fp.name} ended before the end '
+                               'of the book file')
+            self._remaining -= len(data)
+            if self._decompressor is not None:
+                data = self._decompressor.decompress(data)
+            self._buffer = data
+            self._position = 0
+        number_bytes = min(len(buffer), len(self._buffer) - self._position)
+        buffer[:number_bytes] = self._buffer[self._position:self._position + number_bytes]
+        self._position += number_bytes
+        return number_bytes
+
+    def close(self) -> None:
+        self._archive_fp.close()
+        super().close()
+
+class ArchiveBookFile:
+    '''
+    A book file within an archive file, which can be used in place of the
+    `Path` of a book file, in the same way as `zipfile.Path`, by all of the
+    functions that read book files, e.g. `page_reader.read_pages`, as it has
+    the `name`, `stem`, and `suffix` of the book file, can be opened for
+    reading, and has a `stat` with the size, once uncompressed, and the
+    modification time of the book file.
+    '''
+    def __init__(self, archive_file: Path, member_name: str,
+                 entry: ArchiveEntry, compression: Compression) -> None:
+        '''
+        :param archive_file: The archive file that contains the book file.
+        :param member_name: The file path of the book file relative to the
+                            top level directory of the book corpus e.g.
+                            `0118/011834197_01_text.json`.
+        :param entry: Where the book file is within the archive file.
+        :param compression: Compression of the book file within the archive
+                            file.
+        '''
+        self.archive_file = archive_file
+        self.member_name = member_name
+        self.entry = entry
+        self.compression = compression
+        member_path = PurePosixPath(member_name)
+        self.name = member_path.name
+        self.stem = member_path.stem
+        self.suffix = member_path.suffix
+
+    def __str__(self) -> str:
+        return f'{self.archive_file}/{self.member_name}'
+
+    def __repr__(self) -> str:
+        return f'ArchiveBookFile({str(self.archive_file)!r}, {self.member_name!r})'
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ArchiveBookFile):
+            return NotImplemented
+        return (self.archive_file, self.member_name) == (other.archive_file, other.member_name)
+
+    def __hash__(self) -> int:
+        return hash((self.archive_file, self.member_name))
+
+    def resolve(self) -> 'ArchiveBookFile':
+        '''
+        :returns: The book file within the absolute file path of the archive
+                  file.
+        '''
+        return ArchiveBookFile(self.archive_file.resolve(), self.member_name,
+                               self.entry, self.compression)
+
+    def stat(self) -> ArchiveBookStat:
+        _, _, size, mtime_ns = self.entry
+        return ArchiveBookStat(size, mtime_ns / 1e9, mtime_ns)
+
+    def open(self, mode: str = 'r') -> IO:
+        '''
+        :param mode: `r` or `rb` for binary mode.
+        :returns: A file object that reads the book file, the book file is
+                  read from the archive file as it is read rather than all at
+                  once.
+        :raises ValueError: If the archive file is zstd compressed and
+                            zstandard is not installed.
+        '''
+        if mode not in ('r', 'rb'):
+            raise ValueError(f'Book files within an archive file can only be '
+                             f'opened for reading, not {mode}')
+        if self.compression not in available_compressions():
+            raise ValueError(f'{self.compression.value} compression requires the '
+                             'zstandard package to be installed')
+        offset, length, _, _ = self.entry
+        book_fp = io.BufferedReader(_ArchiveMemberReader(self.archive_file, offset,
+                                                         length, self.compression),
+                                    READ_SIZE)
+        if mode == 'rb':
+            return book_fp
+        return io.TextIOWrapper(book_fp, encoding='utf-8')
+
+BookFile = Union[Path, ArchiveBookFile]
+
+class CorpusSource:
+    '''
+    The book files of the book corpus, each book file is named by its file
+    path relative to the top level directory of the book corpus e.g.
+    `0118/011834197_01_text.json`.
+    '''
+    def book_names(self) -> List[str]:
+        '''
+        :returns: The names of all of the book files, in name order.
+        '''
+        raise NotImplementedError
+
+    def book_file(self, name: str) -> BookFile:
+        '''
+        :param name: Name of a book file e.g. `0118/011834197_01_text.json`.
+        :returns: The book file, which can be read through
+                  `page_reader.read_pages`.
+        '''
+        raise NotImplementedError
+
+    def identifier_book_names(self, identifier: str) -> List[str]:
+        '''
+        :param identifier: A book identifier e.g. `011834197`.
+        :returns: The name of the book file of each volume of the book, in
+                  name order, an empty list if the book is not in the corpus.
+                  Unlike `book_names` this does not list every book file.
+        '''
+        raise NotImplementedError
+
+    def identifier_book_files(self, identifier: str) -> List[BookFile]:
+        '''
+        :param identifier: A book identifier e.g. `011834197`.
+        :returns: The book file of each volume of the book, see
+                  `identifier_book_names`.
+        '''
+        return [self.book_file(name) for name in self.identifier_book_names(identifier)]
+
+    def book_files(self) -> Iterable[BookFile]:
+        '''
+        :returns: Yields all of the book files, in name order.
+        '''
+        for name in self.book_names():
+            yield self.book_file(name)
+
+class FolderSource(CorpusSource):
+    '''
+    The book corpus once it has been un-compressed into the top level
+    directory e.g. `/home/json`, the book files are `Path`s.
+    '''
+    def __init__(self, folder: Path) -> None:
+        '''
+        :param folder: The top level directory the books were downloaded to,
+                       this directory contains sub folders named after the
+                       first 4 characters of the book identifiers.
+        '''
+        self.folder = folder
+
+    def book_names(self) -> List[str]:
+        names: List[str] = []
+        for sub_folder in sorted(self.folder.iterdir()):
+            if not sub_folder.is_dir():
+                continue
+            for book_file in sorted(sub_folder.iterdir()):
+                name = relative_book_name(f'{sub_folder.name}/{book_file.name}')
+                if name is not None:
+                    names.append(name)
+        return names
+
+    def book_file(self, name: str) -> Path:
+        return Path(self.folder, *name.split('/'))
+
+    def identifier_book_names(self, identifier: str) -> List[str]:
+        sub_folder = Path(self.folder, identifier[:4])
+        if not sub_folder.is_dir():
+            return []
+        names = [relative_book_name(f'{sub_folder.name}/{book_file.name}')
+                 for book_file in sorted(sub_folder.glob(f'{identifier}_*'))]
+        return [name for name in names if name is not None]
+
+class ArchiveSource(CorpusSource):
+    '''
+    The book corpus within one archive file, whereby an index of where each
+    book file is within the archive file gives random access to each book
+    file without reading the archive file from the start. The archive file is
+    either:
+
+    1. The downloaded tar file once it has been un-compressed through `bzip2
+    -d`, the book files are stored as is, see `from_tar`.
+    2. An archive file created by `repack`, in which each book file is
+    compressed on its own, as a gzip member or zstd frame, one after another.
+    As the archive file is one gzip or zstd compressed file of many members
+    or frames, un-compressing the whole archive file, e.g. through `zstd -d`,
+    gives all of the book files joined together.
+
+    The index is stored in an index file, the name of the archive file
+    followed by `ARCHIVE_INDEX_SUFFIX`, see `save_index`.
+    '''
+    def __init__(self, archive_file: Path, compression: Compression,
+                 entries: Dict[str, ArchiveEntry]) -> None:
+        '''
+        :param archive_file: The archive file.
+        :param compression: Compression of each book file within the archive
+                            file.
+        :param entries: The name of each book file to where it is within the
+                        archive file.
+        '''
+        self.archive_file = archive_file
+        self.compression = compression
+        self.entries = entries
+        self._identifier_names: Optional[Dict[str, List[str]]] = None
+
+    @staticmethod
+    def index_file(archive_file: Path) -> Path:
+        '''
+        :param archive_file: An archive file.
+        :returns: The index file of the archive file.
+        '''
+        return archive_file.with_name(f'{archive_file.name}{ARCHIVE_INDEX_SUFFIX}')
+
+    @classmethod
+    def from_tar(cls, tar_file: Path) -> 'ArchiveSource':
+        '''
+        :param tar_file: An un-compressed tar file of the book corpus, e.g.
+                         the downloaded tar file after `bzip2 -d`. Only the
+                         headers of the tar file are read, which are spread
+                         throughout the tar file.
+        :returns: The book files within the tar file, which are read directly
+                  from the tar file.
+        :raises tarfile.ReadError: If the file is not an un-compressed tar
+                                   file.
+        '''
+        entries: Dict[str, ArchiveEntry] = {}
+        with tarfile.open(tar_file, 'r:') as tar_fp:
+            for member in tar_fp:
+                name = relative_book_name(member.name)
+                if member.isfile() and name is not None:
+                    entries[name] = (member.offset_data, member.size, member.size,
+                                     int(member.mtime) * 1_000_000_000)
+        return cls(tar_file, Compression.NONE, entries)
+
+    @classmethod
+    def load(cls, archive_file: Path) -> 'ArchiveSource':
+        '''
+        :param archive_file: An archive file that has an index file, see
+                             `save_index`.
+        :returns: The book files within the archive file.
+        :raises ValueError: If the index file is not a version of the index
+                            format that can be read.
+        '''
+        index_file = cls.index_file(archive_file)
+        with index_file.open('rb') as index_fp:
+            index = json_backend.load(index_fp)
+        if not isinstance(index, dict) or index.get('version') != ARCHIVE_INDEX_VERSION:
+            raise ValueError(f'{index_file} is not version {ARCHIVE_INDEX_VERSION} '
+                             'of the archive index format')
+        entries = {name: (offset, length, size, mtime_ns)
+                   for name, offset, length, size, mtime_ns in index['books']}
+        return cls(archive_file, Compression(index['compression']), entries)
+
+    def save_index(self) -> None:
+        '''
+        Saves the index, through a `.partial` file, to the index file of the
+        archive file as a JSON Object, for example:
+
+        {"version": 1, "compression": "zstd", "books": [["0118/011834197_01_text.json", 0, 1305, 5230, 1630000000000000000]]}
+
+        Whereby each book file is its name, offset and number of bytes within
+        the archive file, size once uncompressed, and modification time in
+        nanoseconds.
+        '''
+        index = {'version': ARCHIVE_INDEX_VERSION, 'compression': self.compression.value,
+                 'books': [[name, *entry] for name, entry in self.entries.items()]}
+        index_file = self.index_file(self.archive_file)
+        partial_index_file = index_file.with_name(f'{index_file.name}.partial')
+        with partial_index_file.open('w') as index_fp:
+            json.dump(index, index_fp)
+        os.replace(partial_index_file, index_file)
+
+    def book_names(self) -> List[str]:
+        return sorted(self.entries)
+
+    def book_file(self, name: str) -> ArchiveBookFile:
+        '''
+        :raises FileNotFoundError: If the book file is not in the archive
+                                   file.
+        '''
+        if name not in self.entries:
+            raise FileNotFoundError(f'{name} is not in {self.archive_file}')
+        return ArchiveBookFile(self.archive_file, name, self.entries[name],
+                               self.compression)
+
+    def identifier_book_names(self, identifier: str) -> List[str]:
+        if self._identifier_names is None:
+            self._identifier_names = {}
+            for name in self.book_names():
+                _id = PurePosixPath(name).name.split('_')[0]
+                self._identifier_names.setdefault(_id, []).append(name)
+        return list(self._identifier_names.get(identifier, []))
+
+def _is_uncompressed_tar(file_path: Path) -> bool:
+    try:
+        with tarfile.open(file_path, 'r:') as tar_fp:
+            return tar_fp.next() is not None
+    except tarfile.ReadError:
+        return False
+
+def is_corpus_archive(file_path: Path) -> bool:
+    '''
+    :param file_path: A file path.
+    :returns: True if the file is an archive file that has an index file, or
+              a tar file, which can be compressed.
+    '''
+    if not file_path.is_file():
+        return False
+    return ArchiveSource.index_file(file_path).exists() or tarfile.is_tarfile(file_path)
+
+def open_corpus_source(books: Path) -> CorpusSource:
+    '''
+    :param books: Either the top level directory the books were downloaded
+                  to, an archive file that has an index file, see
+                  `ArchiveSource`, or an un-compressed tar file of the book
+                  corpus, whose index is created by reading its headers.
+    :returns: The book files of the book corpus.
+    :raises ValueError: If `books` is none of the above e.g. a compressed tar
+                        file, which has to be re-packed, see `repack`.
+    '''
+    if books.is_dir():
+        return FolderSource(books)
+    if ArchiveSource.index_file(books).exists():
+        return ArchiveSource.load(books)
+    if file_compression(books) == Compression.NONE and _is_uncompressed_tar(books):
+        return ArchiveSource.from_tar(books)
+    raise ValueError(f'{books} is not a folder of book files, an archive file that '
+                     'has an index file, or an un-compressed tar file. A compressed '
+                     'tar file has to be re-packed first, see `corpus_source.py repack`')
+
+def stream_book_files(books: Path) -> Iterable[Tuple[str, int, int, IO[bytes]]]:
+    '''
+    :param books: Anything `open_corpus_source` accepts, or a compressed tar
+                  file of the book corpus, e.g. the downloaded bzip2
+                  compressed tar file, which is read from start to end
+                  without un-compressing it to disk.
+    :returns: Yields the name, size in bytes, modification time in
+              nanoseconds, and a binary file object of each book file. The
+              file object can only be read until the next book file is
+              yielded. Book files are in name order, except for compressed
+              tar files whereby they are in the order they are in the tar
+              file.
+    '''
+    if (books.is_dir() or ArchiveSource.index_file(books).exists()
+            or _is_uncompressed_tar(books)):
+        source = open_corpus_source(books)
+        for name in source.book_names():
+            book_file = source.book_file(name)
+            book_file_stat = book_file.stat()
+            with book_file.open('rb') as book_fp:
+                yield (name, book_file_stat.st_size, book_file_stat.st_mtime_ns, book_fp)
+        return
+    with tarfile.open(books, 'r|*') as tar_fp:
+        for member in tar_fp:
+            name = relative_book_name(member.name)
+            if not member.isfile() or name is None:
+                continue
+            book_fp = tar_fp.extractfile(member)
+            yield (name, member.size, int(member.mtime) * 1_000_000_000, book_fp)
+
+def repack(books: Path, archive_file: Path, compression: Compression,
+           level: Optional[int] = None) -> ArchiveSource:
+    '''
+    :param books: Anything `stream_book_files` accepts e.g. the downloaded
+                  bzip2 compressed tar file.
+    :param archive_file: The archive file to create, through a `.partial`
+                         file, along with its index file.
+    :param compression: Compression of each book file within the archive
+                        file.
+    :param level: Compression level, by default the
+                  `compressed_files.DEFAULT_LEVELS`.
+    :returns: The book files within the created archive file.
+    '''
+    entries: Dict[str, ArchiveEntry] = {}
+    partial_archive_file = archive_file.with_name(f'{archive_file.name}.partial')
+    with partial_archive_file.open('wb') as archive_fp:
+        for name, size, mtime_ns, book_fp in stream_book_files(books):
+            offset = archive_fp.tell()
+            if compression == Compression.NONE:
+                shutil.copyfileobj(book_fp, archive_fp)
+            else:
+                with stream_writer(archive_fp, compression, level, closefd=False) as compressed_fp:
+                    shutil.copyfileobj(book_fp, compressed_fp)
+            entries[name] = (offset, archive_fp.tell() - offset, size, mtime_ns)
+    os.replace(partial_archive_file, archive_file)
+    archive_source = ArchiveSource(archive_file, compression, entries)
+    archive_source.save_index()
+    return archive_source
+
+@app.command()
+def index(tar_file: Path = typer.Argument(..., exists=True, dir_okay=False, file_okay=True, help="Un-compressed tar file of the book corpus e.g. the downloaded `dig19cbooksjsontext` file after `bzip2 -d`.")
+          ) -> None:
+    '''
+    Reads the headers of the un-compressed `tar_file` and saves the index of
+    where each book file is within the `tar_file` to the index file, the name
+    of the `tar_file` followed by `.index.json`, so that the headers do not
+    need to be read again each time the `tar_file` is given in place of the
+    top level directory of the book corpus.
+    '''
+    archive_source = ArchiveSource.from_tar(tar_file)
+    archive_source.save_index()
+    typer.echo(f'Indexed {len(archive_source.entries)} book files')
+
+@app.command(name='repack')
+def repack_books(books: Path = typer.Argument(..., exists=True, dir_okay=True, file_okay=True, help="The downloaded tar file, compressed or not, the top level directory of the book corpus, or an archive file."),
+                 archive_file: Path = typer.Argument(..., dir_okay=False, file_okay=True, help="Archive file to create, its index file is the same name followed by `.index.json`."),
+                 compression: Compression = typer.Option(Compression.ZSTD, "--compression", case_sensitive=False, help="Compression of each book file within the archive file, `zstd` requires zstandard to be installed."),
+                 compression_level: Optional[int] = typer.Option(None, "--compression-level", help="Compression level, by default 6 for gzip and 3 for zstd.")
+                 ) -> None:
+    '''
+    Re-packs the book corpus into the `archive_file`, whereby each book file
+    is compressed on its own, one after another, and the index of where each
+    book file is within the `archive_file` is saved to the index file, so
+    that any book file can be read without reading the `archive_file` from
+    the start. The `books` can be the downloaded bzip2 compressed tar file,
+    which is read from start to end once without un-compressing it to disk.
+
+    The `archive_file` can then be given, in place of the top level directory
+    of the book corpus (`DIRECTORY_TO_BOOKS`) or a folder of book files, to
+    the scripts that read the book files.
+    '''
+    if not isinstance(compression, Compression):
+        compression = Compression.ZSTD
+    if not isinstance(compression_level, int):
+        compression_level = None
+    if compression not in available_compressions():
+        raise typer.BadParameter(f'`--compression {compression.value}` requires the '
+                                 'zstandard package to be installed')
+    archive_source = repack(books, archive_file, compression, compression_level)
+    typer.echo(f'Re-packed {len(archive_source.entries)} book files')
+
+@app.command(name='list')
+def list_books(books: Path = typer.Argument(..., exists=True, dir_okay=True, file_okay=True, help="The top level directory of the book corpus, an un-compressed tar file, or an archive file."),
+               identifiers: Optional[List[str]] = typer.Option(None, "--identifier", help="Only list the book files of this book identifier, e.g. `011834197`, can be given more than once.")
+               ) -> None:
+    '''
+    Outputs the name of each book file, relative to the top level directory
+    of the book corpus, e.g. `0118/011834197_01_text.json`, on a new line.
+    With `--identifier` only the book files of the given books are output,
+    which are found without listing every book file. The output is in the
+    same format as the files of relative file paths created by the scripts in
+    `../batching_files`.
+    '''
+    source = open_corpus_source(books)
+    if not identifiers or not isinstance(identifiers, list):
+        for name in source.book_names():
+            typer.echo(name)
+        return
+    for identifier in identifiers:
+        for name in source.identifier_book_names(identifier):
+            typer.echo(name)
+
+if __name__ == "__main__":
+    app()
@@ -1,9 +1,12 @@
 import json
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+import numpy as np
 import typer
 
+from meta_data_cache import get_meta_data_cache
+
 app = typer.Typer()
 
 @app.command()
@@ -13,19 +16,18 @@ def extract_id_date_from_meta_data(meta_data_file: Path = typer.Argument(...,
                                                                          file_okay=True,  
                                                                          help="The file path to the British Library 19th Century book META data."),
                                    output_file: Path = typer.Argument(...,
-                                                                      help="File that will contain a JSON Array, where each element in the Array is an Object with two keys: 1. identifier and 2. date. Each Object element represents one book from the `meta_data_file`")
+                                                                      help="File that will contain a JSON Array, where each element in the Array is an Object with two keys: 1. identifier and 2. date. Each Object element represents one book from the `meta_data_file`"),
+                                   cache_file: Optional[Path] = typer.Option(None, "--cache-file", dir_okay=False, file_okay=True,
+                                                                              help="Meta data cache created by `meta_data_cache.py`, if the file does not exist, or the cache was created from different files, the cache is created and saved to this file so that it can be re-used.")
                                                                          ) -> None:
-    with meta_data_file.open('r') as meta_fp:
-        book_data = json.load(meta_fp)
-        id_date: List[Dict[str, str]] = []
-        for book in book_data:
-            if 'date' in book:
-                _id = book['identifier']
-                date = book['date']
-                id_date.append({'identifier': _id, 'date': date})
-        with output_file.open('w') as output_fp:
-            json.dump(id_date, output_fp)
-
+    meta_data_cache = get_meta_data_cache(meta_data_file, cache_file)
+    id_date: List[Dict[str, str]] = []
+    for book_index in np.flatnonzero(meta_data_cache.has_date):
+        _id = str(meta_data_cache.identifier[book_index])
+        date = int(meta_data_cache.date[book_index])
+        id_date.append({'identifier': _id, 'date': str(date) if date != -1 else ''})
+    with output_file.open('w') as output_fp:
+        json.dump(id_date, output_fp)
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -1,9 +1,11 @@
-import json
 from pathlib import Path
 from typing import Optional
 
 import typer
 
+from book_file_index import get_book_file_index
+from meta_data_cache import get_meta_data_cache
+
 app = typer.Typer()
 
 @app.command()
@@ -15,12 +17,16 @@ def filter_files(meta_data_file: Path = typer.Argument(...,
                  input_folder: Path = typer.Argument(..., 
                                                      exists=True,
                                                      dir_okay=True,
-                                                     file_okay=False,
-                                                     help="The top level directory the books were downloaded to e.g. /home/json. In the root directory of this repositories README this is called the `DIRECTORY_TO_BOOKS`"), 
+                                                     file_okay=True,
+                                                     help="The top level directory the books were downloaded to e.g. /home/json. In the root directory of this repositories README this is called the `DIRECTORY_TO_BOOKS`. It can instead be an archive file of the book corpus, see `corpus_source.py`."), 
                  output_file: Path = typer.Argument(...,
                                                     help="The file that will contain the relative file paths of all books that have been selected given the filters used. The file paths will be relative to the `input_folder`. e.g. `0118/011833856_01_text.json`"),
                  language: Optional[str] = typer.Option(None, help="(NOTE this is case in-sensitive) Filter by the language of that the book was written in e.g. english. The language name comes from the description tag of the BCP: 47 registry which can be found here: https://www.iana.org/assignments/language-subtag-registry/language-subtag-registry"),
                  decade: Optional[int] = typer.Option(None, help="Filter by the decade the book was published e.g. 1890 or 1880."),
+                 index_file: Optional[Path] = typer.Option(None, "--index-file", dir_okay=False, file_okay=True,
+                                                           help="Book file index created by `book_file_index.py`, if the file does not exist the index is created and saved to this file so that it can be re-used."),
+                 cache_file: Optional[Path] = typer.Option(None, "--cache-file", dir_okay=False, file_okay=True,
+                                                            help="Meta data cache created by `meta_data_cache.py`, if the file does not exist, or the cache was created from different files, the cache is created and saved to this file so that it can be re-used."),
                  ) -> None:
     '''
     Given a filter(s) such as decade and/or language it will find all books 
@@ -34,35 +40,18 @@ def filter_files(meta_data_file: Path = typer.Argument(...,
     if isinstance(language, str):
         language = language.lower()
 
-    with meta_data_file.open('r') as meta_fp:
-        book_data = json.load(meta_fp)
-        with output_file.open('w') as output_fp:
-            for book in book_data:
-                # Filter by decade
-                if isinstance(decade, int):
-                    if 'date' not in book:
-                        continue
-                    date = int(book['date'])
-                    book_decade = (date // 10) * 10
-                    if book_decade != decade:
-                        continue
-                # Filter by language
-                if isinstance(language, str):
-                    if 'language' not in book:
-                        continue
-                    book_language = book['language'].lower()
-                    if book_language != language:
-                        continue
-                
-                _id = book['identifier']
-                sub_folder_name = _id[:4]
-                sub_folder = Path(input_folder, sub_folder_name)
-                if not sub_folder.exists():
-                    continue
-                # Some books have multiple volumes, therefore have multiple book files
-                for file_name in sub_folder.iterdir():
-                    if _id in file_name.stem:
-                        output_fp.write(f'{sub_folder_name}/{file_name.name}\n') 
+    book_file_index = get_book_file_index(input_folder, index_file)
+
+    meta_data_cache = get_meta_data_cache(meta_data_file, cache_file)
+    book_indexes = meta_data_cache.select(decade=decade if isinstance(decade, int) else None,
+                                          language=language if isinstance(language, str) else None)
+
+    with output_file.open('w') as output_fp:
+        for book_index in book_indexes:
+            _id = str(meta_data_cache.identifier[book_index])
+            # Some books have multiple volumes, therefore have multiple book files
+            for relative_file_path, _ in book_file_index.get(_id, []):
+                output_fp.write(f'{relative_file_path}\n')
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -1,8 +1,11 @@
-import json
 from pathlib import Path
+from typing import Optional
 
 import typer
 
+from book_file_index import get_book_file_index
+from meta_data_cache import get_meta_data_cache
+
 app = typer.Typer()
 
 @app.command()
@@ -15,10 +18,14 @@ def filter_by_decade(deacde: int = typer.Argument(..., help="Decade the book was
                      input_folder: Path = typer.Argument(..., 
                                                          exists=True,
                                                          dir_okay=True,
-                                                         file_okay=False,
-                                                         help="The top level directory the books were downloaded to e.g. /home/json. In the root directory of this repositories README this is called the `DIRECTORY_TO_BOOKS`"), 
+                                                         file_okay=True,
+                                                         help="The top level directory the books were downloaded to e.g. /home/json. In the root directory of this repositories README this is called the `DIRECTORY_TO_BOOKS`. It can instead be an archive file of the book corpus, see `corpus_source.py`."), 
                      output_file: Path = typer.Argument(...,
-                                                        help="The file that will contain the relative file paths of all books that are in the given decade. The file paths will be relative to the `input_folder`. e.g. `0118/011833856_01_text.json`")
+                                                        help="The file that will contain the relative file paths of all books that are in the given decade. The file paths will be relative to the `input_folder`. e.g. `0118/011833856_01_text.json`"),
+                     index_file: Optional[Path] = typer.Option(None, "--index-file", dir_okay=False, file_okay=True,
+                                                               help="Book file index created by `book_file_index.py`, if the file does not exist the index is created and saved to this file so that it can be re-used."),
+                     cache_file: Optional[Path] = typer.Option(None, "--cache-file", dir_okay=False, file_okay=True,
+                                                                help="Meta data cache created by `meta_data_cache.py`, if the file does not exist, or the cache was created from different files, the cache is created and saved to this file so that it can be re-used.")
                      ) -> None:
     '''
     Given a deacde e.g. 1890 it will find all books published in that decade, 
@@ -26,25 +33,16 @@ def filter_by_decade(deacde: int = typer.Argument(..., help="Decade the book was
     the `input_folder` and write it on a new line in the `output_file`.
     '''
 
-    with meta_data_file.open('r') as meta_fp:
-        book_data = json.load(meta_fp)
-        with output_file.open('w') as output_fp:
-            for book in book_data:
-                if not book['date']:
-                    continue
-                date = int(book['date'])
-                book_decade = (date // 10) * 10
-                if book_decade != deacde:
-                    continue
-                _id = book['identifier']
-                sub_folder_name = _id[:4]
-                sub_folder = Path(input_folder, sub_folder_name)
-                if not sub_folder.exists():
-                    continue
-                # Some books have multiple volumes, therefore have multiple book files
-                for file_name in sub_folder.iterdir():
-                    if _id in file_name.stem:
-                        output_fp.write(f'{sub_folder_name}/{file_name.name}\n') 
+    book_file_index = get_book_file_index(input_folder, index_file)
+
+    meta_data_cache = get_meta_data_cache(meta_data_file, cache_file)
+
+    with output_file.open('w') as output_fp:
+        for book_index in meta_data_cache.select(decade=deacde):
+            _id = str(meta_data_cache.identifier[book_index])
+            # Some books have multiple volumes, therefore have multiple book files
+            for relative_file_path, _ in book_file_index.get(_id, []):
+                output_fp.write(f'{relative_file_path}\n')
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
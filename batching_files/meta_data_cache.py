@@ -0,0 +1,277 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import typer
+
+from compressed_files import open_input
+import json_backend
+
+app = typer.Typer()
+
+def categorise(values: List[Optional[str]]) -> Dict[str, np.ndarray]:
+    '''
+    :param values: A value, or None if the value is missing, for each book.
+    :returns: A dictionary of `names`, the unique values in sorted order, and
+              `codes`, for each book the index of its value in `names` or -1
+              if the value is missing.
+    '''
+    names = sorted({value for value in values if value is not None})
+    name_codes = {name: code for code, name in enumerate(names)}
+    codes = np.array([name_codes[value] if value is not None else -1
+                      for value in values], dtype=np.int32)
+    return {'names': np.array(names, dtype=str), 'codes': codes}
+
+def language_file_languages(language_file: Path) -> Dict[str, str]:
+    '''
+    :param language_file: A language identification results file, a JSON
+                          Object per line with the keys `filename` e.g.
+                          `000228355_01_text` and `language` e.g. `English`.
+                          It can be gzip or zstd compressed, see
+                          `compressed_files.open_input`.
+    :returns: A dictionary of book identifier to the language of the book.
+              Books with more than one volume, of which at least two volumes
+              have a different language associated with them, are not
+              included.
+    '''
+    languages: Dict[str, str] = {}
+    mixed_language_ids: Set[str] = set()
+    with open_input(language_file) as language_fp:
+        for line in language_fp:
+            line = line.strip()
+            if line:
+                data = json_backend.loads(line)
+                _id = data['filename'].split('_')[0]
+                language = data['language']
+                if languages.get(_id, language) != language:
+                    mixed_language_ids.add(_id)
+                languages[_id] = language
+    for _id in mixed_language_ids:
+        del languages[_id]
+    return languages
+
+def file_state(file_path: Path) -> Dict[str, Any]:
+    '''
+    :param file_path: An existing file.
+    :returns: The resolved path, size in bytes, and modification time in
+              nanoseconds of the file.
+    '''
+    file_stat = file_path.stat()
+    return {'path': str(file_path.resolve()), 'size': file_stat.st_size,
+            'mtime': file_stat.st_mtime_ns}
+
+def cache_sources(meta_data_file: Path, language_file: Optional[Path] = None
+                  ) -> Dict[str, Optional[Dict[str, Any]]]:
+    '''
+    :param meta_data_file: The meta data, see `MetaDataCache.from_meta_data`.
+    :param language_file: A language identification results file, see
+                          `MetaDataCache.from_meta_data`.
+    :returns: The file state, see `file_state`, of the files a cache is
+              created from, whereby the `language_file` is None if the
+              languages come from the meta data.
+    '''
+    return {'meta_data_file': file_state(meta_data_file),
+            'language_file': file_state(language_file) if language_file is not None else None}
+
+def book_volumes(book: Dict) -> int:
+    '''
+    :param book: The meta data of a book.
+    :returns: The number of volumes the book has according to the `pdf` key,
+              or if the book does not have a `pdf` key the `imgs` key, 0 if
+              the book has neither key.
+    '''
+    for key in ['pdf', 'imgs']:
+        if book.get(key):
+            return len(book[key])
+    return 0
+
+class MetaDataCache:
+    '''
+    The meta data of all books stored as columns, one NumPy array per field
+    whereby the i'th element of each array is the i'th book in the meta data,
+    so that books can be filtered through vectorised queries rather than
+    looping over a list of dictionaries. The fields are:
+
+    * `identifier` -- 9 digit book identifier.
+    * `has_date` -- True if the book's meta data has a `date` key.
+    * `date` -- year of publication, -1 if unknown.
+    * `decade` -- decade of publication e.g. 1890, -1 if unknown.
+    * `language_codes` -- index of the book's language in `language_names`,
+      -1 if unknown.
+    * `place_codes` -- index of the book's place of publication in
+      `place_names`, -1 if unknown.
+    * `volumes` -- number of volumes, 0 if unknown.
+
+    The `sources` are the files the cache was created from, see
+    `cache_sources`, None if they are not known.
+    '''
+    FIELDS = ['identifier', 'has_date', 'date', 'decade', 'language_codes',
+              'language_names', 'place_codes', 'place_names', 'volumes']
+
+    def __init__(self, identifier: np.ndarray, has_date: np.ndarray,
+                 date: np.ndarray, decade: np.ndarray,
+                 language_codes: np.ndarray, language_names: np.ndarray,
+                 place_codes: np.ndarray, place_names: np.ndarray,
+                 volumes: np.ndarray,
+                 sources: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+                 ) -> None:
+        self.identifier = identifier
+        self.has_date = has_date
+        self.date = date
+        self.decade = decade
+        self.language_codes = language_codes
+        self.language_names = language_names
+        self.place_codes = place_codes
+        self.place_names = place_names
+        self.volumes = volumes
+        self.sources = sources
+
+    def __len__(self) -> int:
+        return len(self.identifier)
+
+    def language(self, index: int) -> Optional[str]:
+        '''
+        :param index: Index of the book.
+        :returns: The language of the book, None if unknown.
+        '''
+        language_code = self.language_codes[index]
+        if language_code == -1:
+            return None
+        return str(self.language_names[language_code])
+
+    def select(self, decade: Optional[int] = None,
+               language: Optional[str] = None) -> np.ndarray:
+        '''
+        :param decade: Only select books published in this decade e.g. 1890.
+        :param language: Only select books written in this language, case
+                         in-sensitive e.g. english.
+        :returns: The indexes, in ascending order, of the books that match
+                  all of the given filters.
+        '''
+        selected = np.ones(len(self), dtype=bool)
+        if decade is not None:
+            selected &= self.decade == decade
+        if language is not None:
+            language_names = np.char.lower(self.language_names)
+            language_codes = np.flatnonzero(language_names == language.lower())
+            selected &= np.isin(self.language_codes, language_codes)
+        return np.flatnonzero(selected)
+
+    def save(self, cache_file: Path) -> None:
+        '''
+        :param cache_file: File to save the cache to in NumPy `.npz` format,
+                           the `sources` are saved as a JSON string.
+        '''
+        with cache_file.open('wb') as cache_fp:
+            np.savez(cache_fp, sources=np.array(json.dumps(self.sources)),
+                     **{field: getattr(self, field) for field in self.FIELDS})
+
+    @classmethod
+    def load(cls, cache_file: Path) -> 'MetaDataCache':
+        '''
+        :param cache_file: File that was created through `MetaDataCache.save`.
+        :returns: The cache saved in the `cache_file`. The `sources` are None
+                  if the cache was saved without them.
+        '''
+        with np.load(cache_file, allow_pickle=False) as cache_data:
+            sources = None
+            if 'sources' in cache_data.files:
+                sources = json.loads(str(cache_data['sources']))
+            return cls(sources=sources,
+                       **{field: cache_data[field] for field in cls.FIELDS})
+
+    @classmethod
+    def from_meta_data(cls, meta_data_file: Path,
+                       language_file: Optional[Path] = None) -> 'MetaDataCache':
+        '''
+        :param meta_data_file: The British Library 19th Century book META
+                               data, or a subset of it like the
+                               `id_date_meta_data.json` file, as a JSON Array
+                               of Objects that contain at least the key
+                               `identifier`.
+        :param language_file: A language identification results file, see
+                              `language_file_languages`. If given the
+                              language of each book comes from this file
+                              rather than the `language` key of the
+                              `meta_data_file`.
+        :returns: The meta data as columns.
+        '''
+        with meta_data_file.open('r') as meta_fp:
+            book_data = json_backend.load(meta_fp)
+
+        identifiers = [book['identifier'] for book in book_data]
+        if language_file is not None:
+            id_languages = language_file_languages(language_file)
+            languages = [id_languages.get(_id) for _id in identifiers]
+        else:
+            languages = [book.get('language') for book in book_data]
+        places = [book.get('place') for book in book_data]
+        dates = [book.get('date') for book in book_data]
+
+        date = np.array([int(book_date) if isinstance(book_date, str) and book_date.isdigit() else -1
+                         for book_date in dates], dtype=np.int32)
+        language_columns = categorise(languages)
+        place_columns = categorise(places)
+        return cls(identifier=np.array(identifiers, dtype=str),
+                   has_date=np.array([book_date is not None for book_date in dates], dtype=bool),
+                   date=date,
+                   decade=np.where(date == -1, -1, (date // 10) * 10).astype(np.int32),
+                   language_codes=language_columns['codes'],
+                   language_names=language_columns['names'],
+                   place_codes=place_columns['codes'],
+                   place_names=place_columns['names'],
+                   volumes=np.array([book_volumes(book) for book in book_data], dtype=np.int32),
+                   sources=cache_sources(meta_data_file, language_file))
+
+def get_meta_data_cache(meta_data_file: Path, cache_file: Optional[Path] = None,
+                        language_file: Optional[Path] = None) -> MetaDataCache:
+    '''
+    :param meta_data_file: The meta data, see `MetaDataCache.from_meta_data`.
+    :param cache_file: If given and it exists the cache is loaded from this
+                       file, if it does not exist, or it was not created from
+                       the same `meta_data_file` and `language_file` (or
+                       lack of) as they are now, see `cache_sources`, the
+                       cache is created and saved to this file so that it can
+                       be re-used.
+    :param language_file: A language identification results file, see
+                          `MetaDataCache.from_meta_data`.
+    :returns: The meta data as columns.
+    '''
+    if isinstance(cache_file, Path) and cache_file.exists():
+        meta_data_cache = MetaDataCache.load(cache_file)
+        if meta_data_cache.sources == cache_sources(meta_data_file, language_file):
+            return meta_data_cache
+    meta_data_cache = MetaDataCache.from_meta_data(meta_data_file, language_file)
+    if isinstance(cache_file, Path):
+        meta_data_cache.save(cache_file)
+    return meta_data_cache
+
+@app.command()
+def create_cache(meta_data_file: Path = typer.Argument(...,
+                                                       exists=True,
+                                                       dir_okay=False,
+                                                       file_okay=True,
+                                                       help="The file path to the British Library 19th Century book META data. Instead of the whole meta data file you can also use the `id_date_meta_data.json` file that is whithin this repository."),
+                 cache_file: Path = typer.Argument(..., help="File to save the meta data cache to."),
+                 language_file: Optional[Path] = typer.Option(None, "--language-file", exists=True, dir_okay=False, file_okay=True,
+                                                              help="Language identification results file, a JSON Object per line with the keys `filename` and `language`, the language of each book comes from this file.")
+                 ) -> None:
+    '''
+    Saves the identifier, date, decade, language, place, and number of volumes
+    of every book in the `meta_data_file` as columns in NumPy `.npz` format to
+    the `cache_file`. The `cache_file` can then be given to the other scripts
+    in this directory through `--cache-file` so that the `meta_data_file`
+    does not need to be parsed again. The path, size, and modification time
+    of the `meta_data_file` and `language_file` are saved with the cache, if
+    the other scripts are given different files, or the files have changed,
+    they re-create the cache.
+    '''
+    if not isinstance(language_file, Path):
+        language_file = None
+    meta_data_cache = MetaDataCache.from_meta_data(meta_data_file, language_file)
+    meta_data_cache.save(cache_file)
+    typer.echo(f'Cached the meta data of {len(meta_data_cache)} books')
+
+if __name__ == "__main__":
+    app()
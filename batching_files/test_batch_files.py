@@ -1,7 +1,14 @@
+import shutil
+import subprocess
+import sys
+import tarfile
 import tempfile
 from pathlib import Path
 
-from batch_files import batch
+import pytest
+import typer
+
+from batch_files import batch, balance_batches, BalanceBy, BatchMethod
 
 def test_batch() -> None:
     
@@ -33,3 +40,140 @@ def test_batch() -> None:
         assert Path(sub_folder_0, '011833856_01_text.json').exists()
         assert Path(sub_folder_0, '011834197_01_text.json').exists()
         assert Path(sub_folder_1, '011834197_02_text.json').exists()
+
+@pytest.mark.parametrize("method", [BatchMethod.HARDLINK, BatchMethod.SYMLINK])
+def test_batch_links(method: BatchMethod) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir_path = Path(temp_dir)
+        
+        test_data_dir = Path(__file__, '..', 'test_data').resolve()
+        extracted_files_path = Path(test_data_dir, 'extracted_files.txt')
+        book_folder = Path(test_data_dir, 'book_folder')
+        batch(2, book_folder, extracted_files_path, temp_dir_path, method)
+
+        expected_batches = {'0': ['011833856_01_text.json', '011834197_01_text.json'],
+                            '1': ['011834197_02_text.json']}
+        assert sorted(expected_batches) == sorted(sub_folder.name for sub_folder in temp_dir_path.iterdir())
+        for batch_number, file_names in expected_batches.items():
+            sub_folder = Path(temp_dir_path, batch_number)
+            assert len(file_names) == len(list(sub_folder.iterdir()))
+            for file_name in file_names:
+                batch_file = Path(sub_folder, file_name)
+                book_file = Path(book_folder, '0118', file_name)
+                assert batch_file.samefile(book_file)
+                assert (method == BatchMethod.SYMLINK) == batch_file.is_symlink()
+
+def test_batch_manifest() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir_path = Path(temp_dir)
+        
+        test_data_dir = Path(__file__, '..', 'test_data').resolve()
+        extracted_files_path = Path(test_data_dir, 'extracted_files.txt')
+        book_folder = Path(test_data_dir, 'book_folder')
+        batch(2, book_folder, extracted_files_path, temp_dir_path, BatchMethod.MANIFEST)
+
+        # Expect 2 manifest files and no folders in temp_dir
+        assert ['0.txt', '1.txt'] == sorted(manifest.name for manifest in temp_dir_path.iterdir())
+        expected_manifests = {'0.txt': ['011833856_01_text.json', '011834197_01_text.json'],
+                              '1.txt': ['011834197_02_text.json']}
+        for manifest_name, file_names in expected_manifests.items():
+            manifest_lines = Path(temp_dir_path, manifest_name).read_text().splitlines()
+            expected_lines = [str(Path(book_folder, '0118', file_name)) for file_name in file_names]
+            assert expected_lines == manifest_lines
+
+def test_batch_archive() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir_path = Path(temp_dir)
+        
+        test_data_dir = Path(__file__, '..', 'test_data').resolve()
+        extracted_files_path = Path(test_data_dir, 'extracted_files.txt')
+        book_folder = Path(test_data_dir, 'book_folder')
+        # An un-compressed tar file of the book folder, as downloaded.
+        tar_file = Path(temp_dir_path, 'books.tar')
+        with tarfile.open(tar_file, 'w') as tar_fp:
+            tar_fp.add(book_folder, arcname='json')
+
+        # The files are extracted from the tar file.
+        copy_folder = Path(temp_dir_path, 'copy')
+        batch(2, tar_file, extracted_files_path, copy_folder, BatchMethod.COPY, BalanceBy.BYTES)
+        expected_batches = {'0': ['011833856_01_text.json', '011834197_02_text.json'],
+                            '1': ['011834197_01_text.json']}
+        assert sorted(expected_batches) == sorted(sub_folder.name for sub_folder in copy_folder.iterdir())
+        for batch_number, file_names in expected_batches.items():
+            sub_folder = Path(copy_folder, batch_number)
+            assert sorted(file_names) == sorted(batch_file.name for batch_file in sub_folder.iterdir())
+            for file_name in file_names:
+                assert Path(book_folder, '0118', file_name).read_bytes() == Path(sub_folder, file_name).read_bytes()
+
+        # The manifest files contain the file paths within the tar file.
+        manifest_folder = Path(temp_dir_path, 'manifest')
+        batch(2, tar_file, extracted_files_path, manifest_folder, BatchMethod.MANIFEST)
+        assert extracted_files_path.read_text().splitlines() == (Path(manifest_folder, '0.txt').read_text().splitlines() 
+                                                                 + Path(manifest_folder, '1.txt').read_text().splitlines())
+
+        with pytest.raises(typer.BadParameter):
+            batch(2, tar_file, extracted_files_path, Path(temp_dir_path, 'links'), BatchMethod.SYMLINK)
+
+def test_balance_batches() -> None:
+    # Largest file first, each file goes to the batch with the lowest total
+    assert [[0, 3], [1, 2, 4]] == balance_batches([10, 6, 3, 1, 2], 2)
+    assert [[1], [0, 2]] == balance_batches([4, 9, 5], 2)
+    assert [[0], [1], []] == balance_batches([1, 1], 3)
+    assert [[]] == balance_batches([], 1)
+
+def test_batch_balance() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir_path = Path(temp_dir)
+        
+        test_data_dir = Path(__file__, '..', 'test_data').resolve()
+        extracted_files_path = Path(test_data_dir, 'extracted_files.txt')
+        book_folder = Path(test_data_dir, 'book_folder')
+        batch(2, book_folder, extracted_files_path, temp_dir_path, 
+              BatchMethod.MANIFEST, BalanceBy.BYTES)
+
+        # All of the files are the same size, therefore the first and last 
+        # file are in the first batch.
+        assert ['0.txt', '1.txt'] == sorted(manifest.name for manifest in temp_dir_path.iterdir())
+        expected_manifests = {'0.txt': ['011833856_01_text.json', '011834197_02_text.json'],
+                              '1.txt': ['011834197_01_text.json']}
+        for manifest_name, file_names in expected_manifests.items():
+            manifest_lines = Path(temp_dir_path, manifest_name).read_text().splitlines()
+            expected_lines = [str(Path(book_folder, '0118', file_name)) for file_name in file_names]
+            assert expected_lines == manifest_lines
+
+        # Balanced by estimated processing time through the default Spacy 
+        # benchmark results.
+        cost_batch_folder = Path(temp_dir_path, 'cost')
+        batch(2, book_folder, extracted_files_path, cost_batch_folder, 
+              BatchMethod.MANIFEST, BalanceBy.COST)
+        for manifest_name, file_names in expected_manifests.items():
+            manifest_lines = Path(cost_batch_folder, manifest_name).read_text().splitlines()
+            expected_lines = [str(Path(book_folder, '0118', file_name)) for file_name in file_names]
+            assert expected_lines == manifest_lines
+
+def test_batch_standalone_folder() -> None:
+    # This folder copied on its own, without `../spacy_processing` and 
+    # therefore without the default Spacy benchmark results.
+    with tempfile.TemporaryDirectory() as temp_dir:
+        batching_folder = Path(temp_dir, 'batching_files')
+        batching_folder.mkdir()
+        module_folder = Path(__file__, '..').resolve()
+        for module_name in ['batch_files.py', 'compressed_files.py', 
+                            'corpus_source.py', 'json_backend.py']:
+            shutil.copyfile(Path(module_folder, module_name), 
+                            Path(batching_folder, module_name))
+        test_data_dir = Path(module_folder, 'test_data')
+        batch_command = [sys.executable, 'batch_files.py', '2', 
+                         str(Path(test_data_dir, 'book_folder')),
+                         str(Path(test_data_dir, 'extracted_files.txt'))]
+        
+        result = subprocess.run(batch_command + [str(Path(temp_dir, 'batches'))],
+                                cwd=batching_folder, capture_output=True, text=True)
+        assert 0 == result.returncode, result.stderr
+        assert ['0', '1'] == sorted(batch.name for batch in Path(temp_dir, 'batches').iterdir())
+
+        result = subprocess.run(batch_command + [str(Path(temp_dir, 'cost_batches')), 
+                                                 '--balance', 'cost'],
+                                cwd=batching_folder, capture_output=True, text=True)
+        assert 2 == result.returncode
+        assert 'benchmark_results.json does not exist' in ' '.join(result.stderr.split())
@@ -0,0 +1,41 @@
+from pathlib import Path
+import tarfile
+import tempfile
+
+from book_file_index import (create_book_file_index, get_book_file_index,
+                             load_book_file_index, save_book_file_index)
+
+cwd = Path(__file__, '..').resolve()
+input_folder = Path(cwd, 'test_data', 'book_folder')
+
+
+def test_create_book_file_index() -> None:
+    expected_index = {'000057123': [('0000/000057123_01_text.json', 5)],
+                      '000057124': [('0000/000057124_01_text.json', 5)],
+                      '011833856': [('0118/011833856_01_text.json', 5)],
+                      '011834197': [('0118/011834197_01_text.json', 5),
+                                    ('0118/011834197_02_text.json', 5)],
+                      '011834222': [('0118/011834222_01_text.json', 5)]}
+    assert expected_index == create_book_file_index(input_folder)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_file = Path(temp_dir, 'index.json')
+        save_book_file_index(expected_index, index_file)
+        assert expected_index == load_book_file_index(index_file)
+
+        # The index is created and saved if the index file does not exist, 
+        # else it is loaded from the index file.
+        index_file = Path(temp_dir, 'new_index.json')
+        assert expected_index == get_book_file_index(input_folder, index_file)
+        assert expected_index == load_book_file_index(index_file)
+        save_book_file_index({}, index_file)
+        assert {} == get_book_file_index(input_folder, index_file)
+        assert expected_index == get_book_file_index(input_folder)
+
+def test_create_book_file_index_archive() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # An un-compressed tar file of the input folder, as downloaded.
+        tar_file = Path(temp_dir, 'books.tar')
+        with tarfile.open(tar_file, 'w') as tar_fp:
+            tar_fp.add(input_folder, arcname='json')
+        assert create_book_file_index(input_folder) == create_book_file_index(tar_file)
@@ -38,4 +38,11 @@ def test_filter_files() -> None:
                       "0118/011834197_02_text.json",
                       "0000/000057124_01_text.json", "0000/000057123_01_text.json"])
 
-        
\ No newline at end of file
+        # Using a book file index, the first time the index is created and 
+        # the second time it is loaded.
+        index_file = Path(temp_dir, 'index.json')
+        for _ in range(2):
+            test_filters(["0118/011833856_01_text.json", "0118/011834197_01_text.json", 
+                          "0118/011834197_02_text.json"], decade=1880, 
+                         index_file=index_file)
+            assert index_file.exists()
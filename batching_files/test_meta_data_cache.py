@@ -0,0 +1,78 @@
+import gzip
+from pathlib import Path
+import tempfile
+
+import numpy as np
+
+from meta_data_cache import get_meta_data_cache, language_file_languages, MetaDataCache
+
+cwd = Path(__file__, '..').resolve()
+meta_data_file = Path(cwd, 'test_data', 'meta_data.json')
+language_file = Path(cwd, 'test_data', 'language_results.jsonl')
+
+
+def test_meta_data_cache() -> None:
+    meta_data_cache = MetaDataCache.from_meta_data(meta_data_file)
+    assert 4 == len(meta_data_cache)
+    assert ['011833856', '011834197', '000057124', '000057123'] == meta_data_cache.identifier.tolist()
+    assert [True, True, True, False] == meta_data_cache.has_date.tolist()
+    assert [1882, 1889, 1848, -1] == meta_data_cache.date.tolist()
+    assert [1880, 1880, 1840, -1] == meta_data_cache.decade.tolist()
+    assert ['English', 'French', None, 'german'] == [meta_data_cache.language(index) for index in range(4)]
+    assert [-1, -1, -1, -1] == meta_data_cache.place_codes.tolist()
+    assert [0, 0, 0, 0] == meta_data_cache.volumes.tolist()
+
+    assert [0, 1] == meta_data_cache.select(decade=1880).tolist()
+    assert [3] == meta_data_cache.select(language='German').tolist()
+    assert [1] == meta_data_cache.select(decade=1880, language='french').tolist()
+    assert [] == meta_data_cache.select(decade=1840, language='English').tolist()
+    assert [0, 1, 2, 3] == meta_data_cache.select().tolist()
+
+    # The languages come from the language file, whereby 000057124 has 
+    # volumes with different languages
+    meta_data_cache = MetaDataCache.from_meta_data(meta_data_file, language_file)
+    assert ['English', 'French', None, None] == [meta_data_cache.language(index) for index in range(4)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_file = Path(temp_dir, 'cache.npz')
+        meta_data_cache.save(cache_file)
+        loaded_cache = MetaDataCache.load(cache_file)
+        for field in MetaDataCache.FIELDS:
+            assert np.array_equal(getattr(meta_data_cache, field), getattr(loaded_cache, field))
+        
+        # The cache is created and saved if the cache file does not exist, 
+        # else it is loaded from the cache file.
+        cache_file = Path(temp_dir, 'new_cache.npz')
+        assert 4 == len(get_meta_data_cache(meta_data_file, cache_file, language_file))
+        assert ['English', 'French', None, None] == [MetaDataCache.load(cache_file).language(index) for index in range(4)]
+        assert ['English', 'French', None, None] == [get_meta_data_cache(meta_data_file, cache_file, language_file).language(index) for index in range(4)]
+
+        # A cache created from a different language file, or without one, is 
+        # created again rather than loaded.
+        meta_data_languages = ['English', 'French', None, 'german']
+        assert meta_data_languages == [get_meta_data_cache(meta_data_file, cache_file).language(index) for index in range(4)]
+        assert MetaDataCache.load(cache_file).sources['language_file'] is None
+        assert ['English', 'French', None, None] == [get_meta_data_cache(meta_data_file, cache_file, language_file).language(index) for index in range(4)]
+
+        # As is a cache whose language file has changed since.
+        changed_language_file = Path(temp_dir, 'language_results.jsonl')
+        changed_language_file.write_bytes(language_file.read_bytes())
+        get_meta_data_cache(meta_data_file, cache_file, changed_language_file)
+        with changed_language_file.open('a') as language_fp:
+            language_fp.write('{"filename": "000057123_01_text", "language": "Welsh"}\n')
+        assert ['English', 'French', None, 'Welsh'] == [get_meta_data_cache(meta_data_file, cache_file, changed_language_file).language(index) for index in range(4)]
+
+        # A cache saved without its sources is also created again.
+        MetaDataCache.from_meta_data(meta_data_file).save(cache_file)
+        with np.load(cache_file) as cache_data:
+            np.savez(cache_file, **{field: cache_data[field] for field in MetaDataCache.FIELDS})
+        assert MetaDataCache.load(cache_file).sources is None
+        get_meta_data_cache(meta_data_file, cache_file)
+        assert MetaDataCache.load(cache_file).sources is not None
+
+def test_compressed_language_file() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        compressed_language_file = Path(temp_dir, 'language_results.jsonl.gz')
+        with gzip.open(compressed_language_file, 'wb') as compressed_fp:
+            compressed_fp.write(language_file.read_bytes())
+        assert language_file_languages(language_file) == language_file_languages(compressed_language_file)
@@ -1,35 +1,23 @@
-from collections import defaultdict
 import json
 import logging
+import os
 from pathlib import Path
-from typing import Iterable
+from typing import Optional
 
 import typer
 
-app = typer.Typer()
-
-def yield_book_directories(top_level_directory: Path) -> Iterable[Path]:
-    for book_directory in top_level_directory.iterdir():
-        if book_directory.is_dir():
-            yield book_directory
+from corpus_statistics import corpus_statistics
+from scan_cache import ScanCache
 
-def yield_book_files(book_directory: Path) -> Iterable[Path]:
-    for book_file in book_directory.iterdir():
-        if book_file.suffix == '.json':
-            yield book_file
-
-def page_generator(book_file: Path) -> Iterable[str]:
-    with book_file.open('r') as fp:
-        data = json.load(fp)
-        for page in data:
-            if page[1].strip():
-                yield page[1]
+app = typer.Typer()
 
 @app.command()
-def character_count(top_level_book_directory: Path = typer.Argument(..., exists=True, file_okay=False, dir_okay=True,
-                                                                    help="The directory that contains the book corpus (OCR text), after downloading it and un-compressing it, should be called `json` "), 
+def character_count(top_level_book_directory: Path = typer.Argument(..., exists=True, file_okay=True, dir_okay=True,
+                                                                    help="The directory that contains the book corpus (OCR text), after downloading it and un-compressing it, should be called `json`, or an archive file of the book corpus, see `corpus_source.py`."), 
                     results_file: Path = typer.Argument(..., help="File to store the output of this script in JSON format."), 
-                    log_file: Path = typer.Argument(..., help="Log file which will generate on each new line the number of directories within `top_level_book_directory` that have been processed, a directory is processed if all files within that direcotry have been processed.")) -> None:
+                    log_file: Path = typer.Argument(..., help="Log file which will contain the number of directories within `top_level_book_directory` that have been processed once all of them have been processed."),
+                    processes: Optional[int] = typer.Option(None, "--processes", min=1, help="Number of processes that scan the book files, by default the number of CPUs."),
+                    cache_file: Optional[Path] = typer.Option(None, "--cache-file", dir_okay=False, file_okay=True, help="Scan cache file, see `scan_cache.py`, if it does not exist it is created. Only the book files that are not in the cache, or have changed, are scanned.")) -> None:
     '''
     This script will find the maximum size length page per book, for each book 
     in the `top_level_book_directory`. The `result_file` will contain that 
@@ -56,6 +44,11 @@ def character_count(top_level_book_directory: Path = typer.Argument(..., exists=
 
     A note, the `log_file` is created for debugging purposes, once the script 
     has successfully completed this `log_file` can be deleted.
+
+    The books are scanned in parallel through `corpus_statistics.py`, which 
+    can also compute more statistics per book than the longest page. With 
+    `--cache-file` only the book files that have been added or changed since 
+    the last run are scanned.
     '''
     
     logger = logging.getLogger(__name__)
@@ -65,28 +58,24 @@ def character_count(top_level_book_directory: Path = typer.Argument(..., exists=
     fh.setFormatter(formatter)
     logger.addHandler(fh)
 
-    results = defaultdict(list)
-    for index, book_directory in enumerate(yield_book_directories(top_level_book_directory)):
-        book_directory_name = book_directory.stem
-        for book_file in yield_book_files(book_directory):
-            max_number_characters = 0
-            for page in page_generator(book_file):
-                number_characters = len(page)
-                if number_characters > max_number_characters:
-                    max_number_characters = number_characters
-            results["book_directory"].append(book_directory_name)
-            book_file_name = book_file.stem
-            results["book_name"].append(book_file_name)
-            results["meta_data_identifier"].append(book_file_name.split('_')[0])
-            results["max_page_characters"].append(max_number_characters)
-
-        logger.info(f'Book directory index: {index} processed.')
-    results = dict(results)
+    if not isinstance(processes, int):
+        processes = os.cpu_count() or 1
+    scan_cache: Optional[ScanCache] = None
+    if isinstance(cache_file, Path):
+        scan_cache = ScanCache(cache_file)
+    try:
+        statistics = corpus_statistics(top_level_book_directory, processes, 
+                                       show_progress=True, scan_cache=scan_cache)
+    finally:
+        if scan_cache is not None:
+            scan_cache.close()
+    results = {key: statistics.get(key, []) 
+               for key in ['book_directory', 'book_name', 'meta_data_identifier', 
+                           'max_page_characters']}
+    logger.info(f'{len(set(results["book_directory"]))} book directories processed.')
     with results_file.open('w') as results_fp:
         json.dump(results, results_fp)
 
-        
-
 
 if __name__ == "__main__":
     app()
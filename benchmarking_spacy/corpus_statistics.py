@@ -0,0 +1,236 @@
+import json
+import math
+import multiprocessing
+import os
+from pathlib import Path
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import typer
+
+from corpus_source import BookFile, open_corpus_source
+from page_reader import read_pages
+from scan_cache import ScanCache
+
+app = typer.Typer()
+
+# The percentiles of the page lengths that are computed by default.
+PERCENTILES = [50, 90, 99]
+# The statistics computed for each book by `book_statistics`, along with the
+# percentiles of the page lengths.
+STATISTIC_NAMES = ['bytes', 'pages', 'empty_pages', 'empty_page_ratio',
+                   'total_page_characters', 'max_page_characters']
+
+def yield_book_files(top_level_directory: Path) -> Iterable[Tuple[str, BookFile]]:
+    '''
+    :param top_level_directory: The directory that contains the book corpus
+                                (OCR text), after downloading it and
+                                un-compressing it, should be called `json`.
+                                It can instead be an archive file of the book
+                                corpus, see `corpus_source.py`, whereby the
+                                book files are read directly from the archive
+                                file.
+    :returns: Yields the name of the book directory, e.g. `0007`, and the file
+              path of each book file in that directory, in name order.
+    '''
+    if not top_level_directory.is_dir():
+        source = open_corpus_source(top_level_directory)
+        for name in source.book_names():
+            yield name.split('/')[0], source.book_file(name)
+        return
+    for book_directory in sorted(top_level_directory.iterdir()):
+        if not book_directory.is_dir():
+            continue
+        for book_file in sorted(book_directory.iterdir()):
+            if book_file.suffix == '.json':
+                yield book_directory.name, book_file
+
+def percentile(sorted_values: List[int], percent: float) -> int:
+    '''
+    :param sorted_values: Values in ascending order.
+    :param percent: Percentile to compute e.g. 90.
+    :returns: The nearest rank percentile of the values, 0 if there are no
+              values.
+    '''
+    if not sorted_values:
+        return 0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def book_statistics(book_file: BookFile, percentiles: List[int] = PERCENTILES
+                    ) -> Dict[str, Any]:
+    '''
+    :param book_file: File path to a British library book file, or a book
+                      file within an archive file.
+    :param percentiles: Percentiles of the page lengths to compute.
+    :returns: The statistics of the book file:
+              1. `bytes` -- size of the book file.
+              2. `pages` -- number of pages.
+              3. `empty_pages` -- number of pages that contain no text.
+              4. `empty_page_ratio` -- `empty_pages` / `pages`, 0 if the book
+                 has no pages.
+              5. `total_page_characters` -- number of characters in the pages
+                 that contain text.
+              6. `max_page_characters` -- number of characters in the longest
+                 page.
+              7. `page_characters_p{percentile}` -- for each percentile, the
+                 percentile of the number of characters in the pages that
+                 contain text e.g. `page_characters_p90`.
+    '''
+    number_pages = 0
+    page_lengths: List[int] = []
+    for _, text in read_pages(book_file):
+        number_pages += 1
+        if text.strip():
+            page_lengths.append(len(text))
+    page_lengths.sort()
+    number_empty_pages = number_pages - len(page_lengths)
+    statistics: Dict[str, Any] = {
+        'bytes': book_file.stat().st_size,
+        'pages': number_pages,
+        'empty_pages': number_empty_pages,
+        'empty_page_ratio': number_empty_pages / number_pages if number_pages else 0,
+        'total_page_characters': sum(page_lengths),
+        'max_page_characters': page_lengths[-1] if page_lengths else 0
+    }
+    for percent in percentiles:
+        statistics[f'page_characters_p{percent}'] = percentile(page_lengths, percent)
+    return statistics
+
+def _book_statistics(book_file_percentiles: Tuple[BookFile, List[int]]) -> Dict[str, Any]:
+    return book_statistics(*book_file_percentiles)
+
+def corpus_statistics(top_level_book_directory: Path, processes: int = 1,
+                      percentiles: List[int] = PERCENTILES,
+                      chunk_size: int = 16, show_progress: bool = False,
+                      scan_cache: Optional[ScanCache] = None
+                      ) -> Dict[str, List[Any]]:
+    '''
+    :param top_level_book_directory: The directory that contains the book
+                                     corpus (OCR text), or an archive file of
+                                     the book corpus.
+    :param processes: Number of processes that scan the book files.
+    :param percentiles: Percentiles of the page lengths to compute.
+    :param chunk_size: Number of book files given to a process at a time.
+    :param show_progress: Whether to show a progress bar of the number of
+                          book files scanned.
+    :param scan_cache: If given the statistics of the book files that are in
+                       the cache, with the same percentiles, are taken from
+                       the cache and only the other book files are scanned,
+                       of which their statistics are added to the cache as
+                       the `statistics` fact.
+    :returns: The statistics of each book file as columns, a dictionary of
+              column name to a list of values whereby the i'th value of each
+              list is the i'th book file. Along with the columns from
+              `book_statistics` there are the `book_directory`, e.g. `0007`,
+              `book_name`, e.g. `000741339_01_text`, and
+              `meta_data_identifier`, e.g. `000741339`, columns.
+    '''
+    directories_files = list(yield_book_files(top_level_book_directory))
+    statistic_names = STATISTIC_NAMES + [f'page_characters_p{percent}'
+                                         for percent in percentiles]
+
+    results: Dict[str, List[Any]] = {name: [] for name in ['book_directory', 'book_name',
+                                                           'meta_data_identifier'] + statistic_names}
+    for book_directory_name, book_file in directories_files:
+        results['book_directory'].append(book_directory_name)
+        results['book_name'].append(book_file.stem)
+        results['meta_data_identifier'].append(book_file.stem.split('_')[0])
+
+    cached_statistics: Dict[BookFile, Dict[str, Any]] = {}
+    if scan_cache is not None:
+        for _, book_file in directories_files:
+            statistics = scan_cache.get(book_file, 'statistics')
+            if statistics is not None and all(name in statistics for name in statistic_names):
+                cached_statistics[book_file] = statistics
+    book_files = [(book_file, percentiles) for _, book_file in directories_files
+                  if book_file not in cached_statistics]
+
+    def add_statistics(scanned_statistics: Iterable[Dict[str, Any]]) -> None:
+        # The scanned statistics are in the same order as `book_files`.
+        scanned_statistics = iter(scanned_statistics)
+        for _, book_file in directories_files:
+            if book_file in cached_statistics:
+                statistics = cached_statistics[book_file]
+            else:
+                statistics = next(scanned_statistics)
+                if scan_cache is not None:
+                    scan_cache.set(book_file, 'statistics', statistics)
+            for name in statistic_names:
+                results[name].append(statistics[name])
+
+    def with_progress(scanned_statistics: Iterable[Dict[str, Any]]) -> None:
+        if not show_progress:
+            add_statistics(scanned_statistics)
+            return
+        with typer.progressbar(scanned_statistics, length=len(book_files),
+                               label='Scanning book files') as progress:
+            add_statistics(progress)
+
+    if processes > 1 and book_files:
+        with multiprocessing.Pool(processes) as pool:
+            with_progress(pool.imap(_book_statistics, book_files, chunk_size))
+    else:
+        with_progress(map(_book_statistics, book_files))
+    return results
+
+@app.command()
+def scan(top_level_book_directory: Path = typer.Argument(..., exists=True, file_okay=True, dir_okay=True,
+                                                         help="The directory that contains the book corpus (OCR text), after downloading it and un-compressing it, should be called `json`, or an archive file of the book corpus, see `corpus_source.py`."),
+         results_file: Path = typer.Argument(..., help="File to store the output of this script in JSON format."),
+         processes: Optional[int] = typer.Option(None, "--processes", min=1, help="Number of processes that scan the book files, by default the number of CPUs."),
+         percentiles: Optional[List[int]] = typer.Option(None, "--percentile", min=0, max=100, help="Percentile of the page lengths to compute, can be given more than once. Default is 50, 90, and 99."),
+         chunk_size: int = typer.Option(16, "--chunk-size", min=1, help="Number of book files given to a process at a time."),
+         cache_file: Optional[Path] = typer.Option(None, "--cache-file", dir_okay=False, file_okay=True, help="Scan cache file, see `scan_cache.py`, if it does not exist it is created. Only the book files that are not in the cache, or have changed, are scanned.")
+         ) -> None:
+    '''
+    Scans every book in the `top_level_book_directory`, in parallel using
+    `processes` processes, and computes in one pass per book the number of
+    bytes, pages, and empty pages (pages that contain no text), the ratio of
+    empty pages, and the total, maximum, and percentiles of the number of
+    characters in the pages that contain text.
+
+    The `results_file` will contain one JSON object whereby each key is a
+    column and each value is a JSON array of the same length, the index of
+    each array links to the same book e.g. the value at index 1 of
+    "book_name" is the book name of the "max_page_characters" value at index
+    1. See `corpus_statistics` and `book_statistics` for the columns. This is
+    the same format as the output of `character_range.py`, with more columns.
+
+    The progress is shown as a progress bar and the time taken is printed at
+    the end.
+
+    With `cache_file` the statistics of each book file are stored in a scan
+    cache, keyed by the book file's path, size, and modification time, so
+    that when scanning again only the book files that have been added or
+    changed are scanned.
+    '''
+    if not isinstance(processes, int):
+        processes = os.cpu_count() or 1
+    if not percentiles:
+        percentiles = PERCENTILES
+    if not isinstance(chunk_size, int):
+        chunk_size = 16
+
+    scan_cache: Optional[ScanCache] = None
+    if isinstance(cache_file, Path):
+        scan_cache = ScanCache(cache_file)
+    t = time.perf_counter()
+    try:
+        results = corpus_statistics(top_level_book_directory, processes,
+                                    percentiles, chunk_size, show_progress=True,
+                                    scan_cache=scan_cache)
+    finally:
+        if scan_cache is not None:
+            scan_cache.close()
+    total_time = time.perf_counter() - t
+    with results_file.open('w') as results_fp:
+        json.dump(results, results_fp)
+
+    number_books = len(results['book_name'])
+    megabytes = sum(results['bytes']) / 1000000
+    typer.echo(f'Scanned {number_books} book files ({megabytes:.2f}MB) in '
+               f'{total_time:.2f} seconds, {megabytes / total_time:.2f}MB per second')
+
+if __name__ == "__main__":
+    app()
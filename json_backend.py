@@ -0,0 +1,92 @@
+import json
+import os
+from typing import Any, Callable, Dict, IO, List, Union
+
+# The JSON parsers that can be used, in order of preference, whereby the first
+# that is installed is used unless the `JSON_BACKEND` environment variable
+# names the parser to use instead. `json` is the standard library parser,
+# which is always installed.
+BACKEND_NAMES = ['orjson', 'simdjson', 'json']
+
+JSONDecodeError = json.JSONDecodeError
+
+def _orjson_loads() -> Callable[[Union[str, bytes]], Any]:
+    import orjson
+    # orjson.JSONDecodeError is a sub class of json.JSONDecodeError
+    return orjson.loads
+
+def _simdjson_loads() -> Callable[[Union[str, bytes]], Any]:
+    import simdjson
+
+    def loads(data: Union[str, bytes]) -> Any:
+        try:
+            return simdjson.loads(data)
+        except ValueError as error:
+            raise JSONDecodeError(str(error), '', 0) from error
+    return loads
+
+def _json_loads() -> Callable[[Union[str, bytes]], Any]:
+    return json.loads
+
+_BACKEND_LOADERS: Dict[str, Callable[[], Callable[[Union[str, bytes]], Any]]] = \
+    {'orjson': _orjson_loads, 'simdjson': _simdjson_loads, 'json': _json_loads}
+
+def available_backends() -> List[str]:
+    '''
+    :returns: The names of the JSON parsers that are installed, in order of
+              preference.
+    '''
+    backend_names: List[str] = []
+    for backend_name in BACKEND_NAMES:
+        try:
+            _BACKEND_LOADERS[backend_name]()
+            backend_names.append(backend_name)
+        except ImportError:
+            continue
+    return backend_names
+
+def set_backend(backend_name: str) -> None:
+    '''
+    :param backend_name: Name of the JSON parser, from `BACKEND_NAMES`, that
+                         `loads` and `load` will use.
+    :raises ValueError: If the JSON parser is not in `BACKEND_NAMES` or is not
+                        installed.
+    '''
+    global backend, _loads
+    if backend_name not in _BACKEND_LOADERS:
+        raise ValueError(f'{backend_name} is not one of {BACKEND_NAMES}')
+    try:
+        _loads = _BACKEND_LOADERS[backend_name]()
+    except ImportError as error:
+        raise ValueError(f'The {backend_name} JSON parser is not installed') from error
+    backend = backend_name
+
+def loads(data: Union[str, bytes]) -> Any:
+    '''
+    :param data: JSON encoded data.
+    :returns: The decoded data, parsed by the JSON parser named by `backend`.
+              If that parser rejects the data it is parsed again by the `json`
+              parser, as the other parsers do not accept all of the data that
+              `json` does, e.g. orjson does not accept a lone surrogate escape
+              like `"\\ud800"`, which can occur in the OCR text of a book.
+    :raises json.JSONDecodeError: If the data is not valid JSON.
+    '''
+    try:
+        return _loads(data)
+    except ValueError:
+        if _loads is json.loads:
+            raise
+        return json.loads(data)
+
+def load(fp: IO) -> Any:
+    '''
+    :param fp: File object, opened in either text or binary mode, that
+               contains JSON encoded data.
+    :returns: The decoded data, see `loads`.
+    :raises json.JSONDecodeError: If the data is not valid JSON.
+    '''
+    return loads(fp.read())
+
+backend = 'json'
+_loads = json.loads
+set_backend(os.environ.get('JSON_BACKEND', available_backends()[0]))
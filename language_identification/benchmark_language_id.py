@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+import time
+from typing import List, Optional
+
+import fasttext
+import typer
+
+from language_id import (book_file_paths, identify_language,
+                         identify_languages, text_generator)
+
+app = typer.Typer()
+
+@app.command()
+def benchmark(model_path: Path = typer.Argument(...,
+                                                exists=True,
+                                                dir_okay=False,
+                                                file_okay=True,
+                                                resolve_path=True,
+                                                help="File path to either the large or small FastText language identification model."),
+              books: Path = typer.Argument(..., exists=True,
+                                           dir_okay=True,
+                                           file_okay=True,
+                                           resolve_path=True,
+                                           help="Either a folder of British Library book files or a manifest file that contains one British Library book file path per line."),
+              batch_pages: Optional[List[int]] = typer.Option(None, "--batch-pages", min=1, help="Number of pages to give to the model at a time, can be given more than once. Default is 64, 256, and 1024."),
+              book_folder: Optional[Path] = typer.Option(None, "--book-folder", help="The folder that relative file paths within the `books` manifest file are relative to, by default this is the folder the manifest file is in."),
+              repeats: int = typer.Option(3, help="Number of times to repeat each run, the fastest run is reported.")
+              ) -> None:
+    '''
+    Given a FastText model and some British Library book files it will output
+    how many pages per second the model can identify the language of when
+    given one page at a time (the `page` loop) compared to when given
+    `batch_pages` pages at a time. The time includes reading the book files.
+    The output is one JSON object per line, for example:
+
+    {"batch_pages": 256, "pages": 3250, "time": 0.94, "pages_per_second": 3457.45}
+
+    Whereby a `batch_pages` of null is the page loop. Units of time are seconds.
+    '''
+    if not batch_pages:
+        batch_pages = [64, 256, 1024]
+
+    model = fasttext.load_model(str(model_path))
+    book_files = list(book_file_paths(books, book_folder))
+    number_pages = sum(1 for book_file in book_files
+                       for _ in text_generator(book_file))
+
+    def page_loop() -> None:
+        for book_file in book_files:
+            identify_language(model, book_file)
+
+    def batch_loop(batch_size: int) -> None:
+        for _ in identify_languages(model, book_files, batch_pages=batch_size):
+            pass
+
+    runs = [(None, page_loop)]
+    for batch_size in batch_pages:
+        runs.append((batch_size, lambda batch_size=batch_size: batch_loop(batch_size)))
+
+    for batch_size, run in runs:
+        run_times: List[float] = []
+        for _ in range(repeats):
+            t = time.perf_counter()
+            run()
+            run_times.append(time.perf_counter() - t)
+        total_time = min(run_times)
+        data = {'batch_pages': batch_size, 'pages': number_pages,
+                'time': total_time,
+                'pages_per_second': number_pages / total_time}
+        typer.echo(json.dumps(data))
+
+if __name__ == "__main__":
+    app()
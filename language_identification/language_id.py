@@ -1,26 +1,234 @@
-from collections import Counter
+from collections import Counter, deque
+from functools import partial
 import json
+import multiprocessing
 from pathlib import Path
-from typing import Iterable, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Tuple, Optional
 
 import fasttext
-from langcodes import Language, standardize_tag
 import typer
 
+from compressed_files import Compression, open_output, suffix_compression
+from corpus_source import BookFile, is_corpus_archive, open_corpus_source
+from language_labels import create_label_table, language_output, load_label_table
+from lexicon import Lexicon, OCRQuality
+from page_language_index import PageLanguageIndex
+from page_reader import read_pages
+from scan_cache import ScanCache
+
 app = typer.Typer()
 
-def text_generator(book_file: Path) -> Iterable[Tuple[int, str]]:
+# The FastText model used by the worker processes of `process_files`. It is set 
+# before the worker processes are forked so that they all share the one copy 
+# of the model in memory.
+_worker_model: Optional[fasttext.FastText._FastText] = None
+
+def text_generator(book_file: BookFile) -> Iterable[Tuple[int, str]]:
     '''
-    :param book_file: File path to a British library book file.
+    :param book_file: File path to a British library book file, or a book file 
+                      within an archive file, see `corpus_source.py`.
     :returns: Yields the page number and text of that page for all pages in the 
               given book file. NOTE, if the page contains NO text it will be 
               skipped and therefore not yielded from this function.
     '''
-    with book_file.open('r') as fp:
-        data = json.load(fp)
-        for page in data:
-            if page[1].strip():
-                yield (page[0], page[1])
+    for page_number, text in read_pages(book_file):
+        if text.strip():
+            yield (page_number, text)
+
+def book_file_paths(books: Path, book_folder: Optional[Path] = None
+                    ) -> Iterable[BookFile]:
+    '''
+    :param books: Either a folder of British Library book files, an archive 
+                  file of the book corpus, see `corpus_source.py`, or a 
+                  manifest file that contains one British Library book file 
+                  path per line.
+    :param book_folder: The folder, or archive file, that relative file paths 
+                        in the manifest file are relative to. If None then it 
+                        is the folder the manifest file is in.
+    :returns: Yields the file path of each book file. For a folder only the 
+              files with a `.json` extension are yielded, in file name order. 
+              For an archive file all of the book files within it are 
+              yielded, in name order. For a manifest file the paths are 
+              yielded in the order they are in the file, empty lines are 
+              skipped.
+    :raises ValueError: If `books`, or `book_folder`, is an archive file that 
+                        cannot be read without being re-packed, see 
+                        `corpus_source.open_corpus_source`.
+    '''
+    if books.is_dir():
+        for book_file in sorted(books.iterdir()):
+            if book_file.suffix == '.json':
+                yield book_file
+    elif is_corpus_archive(books):
+        yield from open_corpus_source(books).book_files()
+    else:
+        if not isinstance(book_folder, Path):
+            book_folder = books.parent
+        archive_source = None
+        if is_corpus_archive(book_folder):
+            archive_source = open_corpus_source(book_folder)
+        with books.open('r') as manifest_fp:
+            for line in manifest_fp:
+                line = line.strip()
+                if not line:
+                    continue
+                if archive_source is not None:
+                    yield archive_source.book_file(line)
+                else:
+                    yield Path(book_folder, line)
+
+def identify_language(model: fasttext.FastText._FastText, book_file: BookFile,
+                      model_threshold: Optional[float] = None) -> Counter:
+    '''
+    :param model: A FastText language identification model.
+    :param book_file: File path to a British library book file.
+    :param model_threshold: Probability threshold for the model to output a 
+                            label.
+    :returns: The number of pages in the book file that have been identified 
+              as each FastText language label e.g. `__label__en`.
+    '''
+    language_counts = Counter()
+    for page_number, page in text_generator(book_file):
+        language_probability = ()
+        if not isinstance(model_threshold, float):
+            language_probability = model.predict(page, k=1)
+        else:
+            language_probability = model.predict(page, k=1, threshold=model_threshold)
+        # Checks that a language probability exists
+        if language_probability[0]:
+            language_label = language_probability[0][0]
+            language_counts.update([language_label])
+    return language_counts
+
+def identify_languages(model: fasttext.FastText._FastText,
+                       book_files: Iterable[Path],
+                       model_threshold: Optional[float] = None,
+                       batch_pages: int = 256
+                       ) -> Iterable[Tuple[BookFile, Counter]]:
+    '''
+    The same as `identify_language` but for many book files, whereby the pages 
+    of the book files are buffered, across book files, and given to the model 
+    `batch_pages` pages at a time rather than one page at a time.
+
+    :param model: A FastText language identification model.
+    :param book_files: File paths to British library book files.
+    :param model_threshold: Probability threshold for the model to output a 
+                            label.
+    :param batch_pages: The number of pages to give to the model at a time.
+    :returns: Yields each book file and the number of pages in that book file 
+              that have been identified as each FastText language label, in 
+              the same order as `book_files`. A book file is yielded once all 
+              of its pages have been identified.
+    '''
+    # Each pending book is a list of: book file, language counts, and the 
+    # number of its pages in the page buffer.
+    pending_books = deque()
+    page_buffer: List[str] = []
+    page_books: List[List[Any]] = []
+
+    def predict_page_buffer() -> None:
+        if not page_buffer:
+            return
+        if not isinstance(model_threshold, float):
+            language_labels, _ = model.predict(page_buffer, k=1)
+        else:
+            language_labels, _ = model.predict(page_buffer, k=1, threshold=model_threshold)
+        for page_language_labels, book in zip(language_labels, page_books):
+            # Checks that a language label exists
+            if page_language_labels:
+                book[1].update([page_language_labels[0]])
+            book[2] -= 1
+        page_buffer.clear()
+        page_books.clear()
+
+    for book_file in book_files:
+        book = [book_file, Counter(), 0]
+        pending_books.append(book)
+        for page_number, page in text_generator(book_file):
+            page_buffer.append(page)
+            page_books.append(book)
+            book[2] += 1
+            if len(page_buffer) >= batch_pages:
+                predict_page_buffer()
+        # All pending books have been read, only those with no pages left in 
+        # the page buffer are finished.
+        while pending_books and pending_books[0][2] == 0:
+            finished_book = pending_books.popleft()
+            yield finished_book[0], finished_book[1]
+    
+    predict_page_buffer()
+    for finished_book in pending_books:
+        yield finished_book[0], finished_book[1]
+
+def identify_page_languages(model: fasttext.FastText._FastText,
+                            book_files: Iterable[Path],
+                            model_threshold: Optional[float] = None,
+                            batch_pages: int = 256
+                            ) -> Iterable[Tuple[BookFile, int, Optional[str], float]]:
+    '''
+    :param model: A FastText language identification model.
+    :param book_files: File paths to British library book files.
+    :param model_threshold: Probability threshold for the model to output a 
+                            label.
+    :param batch_pages: The number of pages, which can come from more than one 
+                        book file, to give to the model at a time.
+    :returns: Yields for each page, that contains text, of each book file, in 
+              the same order as the book files and pages: the book file, the 
+              page number, the FastText language label e.g. `__label__en`, 
+              None if the model did not output a label, and the probability 
+              of the label, 0 if there is no label.
+    '''
+    page_buffer: List[str] = []
+    book_page_numbers: List[Tuple[BookFile, int]] = []
+
+    def predict_page_buffer() -> Iterable[Tuple[BookFile, int, Optional[str], float]]:
+        if not page_buffer:
+            return
+        if not isinstance(model_threshold, float):
+            language_labels, probabilities = model.predict(page_buffer, k=1)
+        else:
+            language_labels, probabilities = model.predict(page_buffer, k=1, threshold=model_threshold)
+        for (book_file, page_number), page_language_labels, page_probabilities in zip(book_page_numbers, language_labels, probabilities):
+            if page_language_labels:
+                yield book_file, page_number, page_language_labels[0], float(page_probabilities[0])
+            else:
+                yield book_file, page_number, None, 0.0
+        page_buffer.clear()
+        book_page_numbers.clear()
+
+    for book_file in book_files:
+        for page_number, page in text_generator(book_file):
+            page_buffer.append(page)
+            book_page_numbers.append((book_file, int(page_number)))
+            if len(page_buffer) >= batch_pages:
+                yield from predict_page_buffer()
+    yield from predict_page_buffer()
+
+def book_ocr_quality(lexicon: Lexicon, book_file: BookFile) -> float:
+    '''
+    :param lexicon: The lexicon used to measure OCR quality, see `lexicon.py`.
+    :param book_file: File path to a British library book file.
+    :returns: The OCR quality of the text of all pages of the book file, see
+              `lexicon.OCRQuality`, whereby the words of the text are found
+              through `lexicon.WORD_PATTERN` rather than tokenised by spaCy.
+    '''
+    ocr_quality = OCRQuality(lexicon)
+    for _, page in text_generator(book_file):
+        ocr_quality.add_text(page)
+    return ocr_quality.quality
+
+def _worker_identify_language(book_file: BookFile, model_threshold: Optional[float],
+                              batch_pages: Optional[int]) -> Counter:
+    '''
+    :returns: The language counts of the book file, see `identify_language`, 
+              using the shared `_worker_model`.
+    '''
+    if isinstance(batch_pages, int):
+        _, language_counts = next(identify_languages(_worker_model, [book_file],
+                                                     model_threshold, batch_pages))
+    else:
+        language_counts = identify_language(_worker_model, book_file, model_threshold)
+    return language_counts
 
 @app.command()
 def process_file(model_path: Path = typer.Argument(...,
@@ -34,9 +242,10 @@ def process_file(model_path: Path = typer.Argument(...,
                                                         file_okay=True,
                                                         resolve_path=True,
                                                         help="File path to a British Library book file."),
-                 output_file: Path = typer.Argument(..., help="File to store the JSON output, file is opened in append mode."),
+                 output_file: Path = typer.Argument(..., help="File to store the JSON output, file is opened in append mode. If the file name ends in `.gz` or `.zst` the output is gzip or zstd compressed."),
                  exclude_filename: bool = typer.Argument(..., help="If True then the `filename` key will not be in the output file"),
-                 model_threshold: Optional[float] = typer.Option(None, "--threshold", "-t", help="Probability threshold for the model to output a label e.g. `0.9` would mean the model has to be 90% confident that the language label is correct.")
+                 model_threshold: Optional[float] = typer.Option(None, "--threshold", "-t", help="Probability threshold for the model to output a label e.g. `0.9` would mean the model has to be 90% confident that the language label is correct."),
+                 label_table_file: Optional[Path] = typer.Option(None, "--label-table", exists=True, dir_okay=False, file_okay=True, help="Label table, created through the `label-table` command, of the BCP 47 code and English language name of each label of the model.")
                  ) -> None:
     '''
     Given a FastText language ID model and a British Library book file. It will 
@@ -78,49 +287,249 @@ def process_file(model_path: Path = typer.Argument(...,
     } 
 
     null will be equal to None in Python.
+
+    The BCP 47 code and English name of each language label are resolved 
+    through langcodes, unless they are in the `label_table_file`.
     '''
+    if isinstance(label_table_file, Path):
+        load_label_table(label_table_file)
     model = fasttext.load_model(str(model_path))
-    language_counts = Counter()
-    for page_number, page in text_generator(file_to_process):
-        language_probability = ()
-        if not isinstance(model_threshold, float):
-            language_probability = model.predict(page, k=1)
-        else:
-            language_probability = model.predict(page, k=1, threshold=model_threshold)
-        # Checks that a language probability exists
-        if language_probability[0]:
-            language_label = language_probability[0][0]
-            language_counts.update([language_label])
-    
-    total_count = sum(language_counts.values())
-    # Add detailed language data
-    language_specific_data = {}
-    for language, count in language_counts.items():
-        language = language.replace('__label__', '', 1)
-        language_code = standardize_tag(language)
-        language_name = Language.get(language).describe('en')['language']
-        language_specific_data[language_name] = {'BCP 47 code': language_code,
-                                                 'count': count,
-                                                 'proportion': count / total_count}
-    
-    most_common_language = language_counts.most_common(1)
-    output_data = {}
-    if not exclude_filename:
-        output_data["filename"] = file_to_process.stem
-    
-    if most_common_language:
-        most_common_language = most_common_language[0][0]
-        most_common_language = most_common_language.replace('__label__', '', 1)
-        most_common_language = Language.get(most_common_language).describe('en')['language']
-        output_data["language"] = most_common_language
-        output_data["language_extras"] = language_specific_data
-    else:
-        output_data["language"] = None
-
-    with output_file.open('a') as output_fp:
+    language_counts = identify_language(model, file_to_process, model_threshold)
+    output_data = language_output(language_counts, file_to_process, exclude_filename)
+    with open_output(output_file, 'a') as output_fp:
         json.dump(output_data, output_fp)
         output_fp.write("\n")
 
+@app.command()
+def process_files(model_path: Path = typer.Argument(...,
+                                                    exists=True,
+                                                    dir_okay=False,
+                                                    file_okay=True,
+                                                    resolve_path=True,
+                                                    help="File path to either the large or small FastText language identification model."),
+                  books: Path = typer.Argument(..., exists=True,
+                                               dir_okay=True,
+                                               file_okay=True,
+                                               resolve_path=True,
+                                               help="Either a folder of British Library book files, of which only files with a `.json` extension are processed, an archive file of the book corpus, see `corpus_source.py`, or a manifest file that contains one British Library book file path per line."),
+                  output_file: Path = typer.Argument(..., help="File to store the JSON output, one JSON object per book on each new line, file is opened in append mode. If the file name ends in `.gz` or `.zst` the output is gzip or zstd compressed."),
+                  exclude_filename: bool = typer.Argument(..., help="If True then the `filename` key will not be in the output file"),
+                  model_threshold: Optional[float] = typer.Option(None, "--threshold", "-t", help="Probability threshold for the model to output a label e.g. `0.9` would mean the model has to be 90% confident that the language label is correct."),
+                  book_folder: Optional[Path] = typer.Option(None, "--book-folder", help="The folder, or archive file of the book corpus, that relative file paths within the `books` manifest file are relative to, by default this is the folder the manifest file is in."),
+                  batch_pages: Optional[int] = typer.Option(None, "--batch-pages", min=1, help="Number of pages, which can come from more than one book file, to give to the model at a time. By default the model is given one page at a time."),
+                  workers: Optional[int] = typer.Option(None, "--workers", min=1, help="Number of worker processes that identify the language of the book files in parallel. By default the book files are processed one after another in this process."),
+                  cache_file: Optional[Path] = typer.Option(None, "--cache-file", dir_okay=False, file_okay=True, help="Scan cache file, see `scan_cache.py`, if it does not exist it is created. Book files that are in the cache, with the same model and threshold, are not processed again."),
+                  label_table_file: Optional[Path] = typer.Option(None, "--label-table", exists=True, dir_okay=False, file_okay=True, help="Label table, created through the `label-table` command, of the BCP 47 code and English language name of each label of the model. By default the labels of the model are resolved through langcodes once the model is loaded."),
+                  lexicon_file: Optional[Path] = typer.Option(None, "--lexicon", exists=True, dir_okay=False, file_okay=True, resolve_path=True, help="Lexicon file, created through `lexicon.py`, if given the JSON output of each book also contains the `ocr_quality` of the book measured with this lexicon.")
+                  ) -> None:
+    '''
+    The same as `process-file` but for many British Library book files, whereby 
+    the FastText model is only loaded once for all of the book files. The 
+    `books` can either be a folder of book files, an archive file of the book 
+    corpus, see `corpus_source.py`, whereby the book files are read directly 
+    from the archive file, or a manifest file, a manifest file contains one 
+    book file path on each new line e.g.:
+
+    0118/011833856_01_text.json
+    0118/011834197_01_text.json
+
+    Whereby relative file paths are relative to `book_folder`, if given, else 
+    the folder the manifest file is in. The JSON output for each book file is 
+    the same as the output from `process-file` and is written to `output_file`
+    as soon as that book file has been processed, each on a new line.
+
+    If `batch_pages` is given the pages of the book files are buffered and 
+    given to the model `batch_pages` pages at a time, of which these pages can 
+    come from more than one book file, this is faster than giving the model 
+    one page at a time.
+
+    If `workers` is given the book files are shared out to that many worker 
+    processes, each book file is processed by one worker process, whereby the 
+    worker processes share the one loaded model. The output is written by this 
+    process in the same order as when not using `workers`. When using 
+    `batch_pages` with `workers` the pages are only buffered within a book file.
+
+    If `cache_file` is given the language counts of each book file are stored 
+    in a scan cache, keyed by the book file's path, size, and modification 
+    time, along with the model and threshold used. When processing again only 
+    the book files that have been added or changed, or that were processed 
+    with a different model or threshold, are given to the model, the output 
+    of the other book files comes from the cache. The model is not loaded if 
+    all of the book files are in the cache.
+
+    The BCP 47 code and English name of every label of the model are resolved 
+    through langcodes once, when the model is loaded, rather than for every 
+    book, or are loaded from `label_table_file`.
+
+    If the `output_file` name ends in `.gz` or `.zst` the output is compressed, 
+    through `compressed_files.py`, as it is written, each run appends a new 
+    gzip member or zstd frame which are read as one file by 
+    `compressed_files.open_input`, `gzip -d`, or `zstd -d`. Uncompressed 
+    output is flushed after each book, whereas compressed output is only 
+    flushed once all of the books have been identified.
+
+    If `lexicon_file` is given the JSON output of each book also contains an
+    `ocr_quality` key, the proportion of words in the book that are in the
+    lexicon, the same measure `spacy_tagging.py` uses, see `lexicon.py`, but
+    with the words found through a regular expression rather than spaCy.
+    This requires reading each book file again after its language has been
+    identified, with `cache_file` the OCR quality of each book file is also
+    stored in the scan cache, along with the lexicon file, so that it is only
+    measured once.
+    '''
+    if isinstance(label_table_file, Path):
+        load_label_table(label_table_file)
+    if not isinstance(model_threshold, float):
+        model_threshold = None
+    scan_cache: Optional[ScanCache] = None
+    if isinstance(cache_file, Path):
+        scan_cache = ScanCache(cache_file)
+    language_fact = {'model': str(model_path), 'threshold': model_threshold}
+    lexicon: Optional[Lexicon] = None
+    if isinstance(lexicon_file, Path):
+        lexicon = Lexicon.load(lexicon_file)
+
+    book_files = list(book_file_paths(books, book_folder))
+    cached_language_counts: Dict[Path, Counter] = {}
+    if scan_cache is not None:
+        for book_file in book_files:
+            language = scan_cache.get(book_file, 'language')
+            if language is not None and all(language.get(key) == value 
+                                            for key, value in language_fact.items()):
+                cached_language_counts[book_file] = Counter(language['language_counts'])
+    uncached_book_files = [book_file for book_file in book_files 
+                           if book_file not in cached_language_counts]
+
+    def identified_language_counts() -> Iterable[Counter]:
+        # Language counts of the `uncached_book_files` in the same order.
+        if not uncached_book_files:
+            return
+        model = fasttext.load_model(str(model_path))
+        if not isinstance(label_table_file, Path):
+            create_label_table(model)
+        if isinstance(workers, int):
+            global _worker_model
+            _worker_model = model
+            worker_identify_language = partial(_worker_identify_language,
+                                               model_threshold=model_threshold,
+                                               batch_pages=batch_pages)
+            try:
+                with multiprocessing.get_context('fork').Pool(workers) as pool:
+                    yield from pool.imap(worker_identify_language, uncached_book_files)
+            finally:
+                _worker_model = None
+        elif isinstance(batch_pages, int):
+            for _, language_counts in identify_languages(model, uncached_book_files, 
+                                                         model_threshold, batch_pages):
+                yield language_counts
+        else:
+            for book_file in uncached_book_files:
+                yield identify_language(model, book_file, model_threshold)
+
+    def cached_ocr_quality(book_file: BookFile) -> float:
+        lexicon_quality_fact = None
+        if scan_cache is not None:
+            lexicon_quality_fact = scan_cache.get(book_file, 'lexicon_quality')
+        if (lexicon_quality_fact is not None
+                and lexicon_quality_fact['lexicon'] == str(lexicon_file)):
+            return lexicon_quality_fact['quality']
+        ocr_quality = book_ocr_quality(lexicon, book_file)
+        if scan_cache is not None:
+            scan_cache.set(book_file, 'lexicon_quality',
+                           {'lexicon': str(lexicon_file), 'quality': ocr_quality})
+        return ocr_quality
+
+    language_counts_iterator = iter(identified_language_counts())
+    # Flushing compressed output ends a compressed block, which for each 
+    # book would make the output larger and slower to write.
+    flush_each_book = suffix_compression(output_file) == Compression.NONE
+    try:
+        with open_output(output_file, 'a') as output_fp:
+            for book_file in book_files:
+                if book_file in cached_language_counts:
+                    language_counts = cached_language_counts[book_file]
+                else:
+                    language_counts = next(language_counts_iterator)
+                    if scan_cache is not None:
+                        scan_cache.set(book_file, 'language', 
+                                       {**language_fact, 'language_counts': dict(language_counts)})
+                output_data = language_output(language_counts, book_file, exclude_filename)
+                if lexicon is not None:
+                    output_data['ocr_quality'] = cached_ocr_quality(book_file)
+                json.dump(output_data, output_fp)
+                output_fp.write("\n")
+                if flush_each_book:
+                    output_fp.flush()
+    finally:
+        if scan_cache is not None:
+            scan_cache.close()
+
+
+@app.command()
+def process_pages(model_path: Path = typer.Argument(...,
+                                                    exists=True,
+                                                    dir_okay=False,
+                                                    file_okay=True,
+                                                    resolve_path=True,
+                                                    help="File path to either the large or small FastText language identification model."),
+                  books: Path = typer.Argument(..., exists=True,
+                                               dir_okay=True,
+                                               file_okay=True,
+                                               resolve_path=True,
+                                               help="Either a folder of British Library book files, of which only files with a `.json` extension are processed, an archive file of the book corpus, see `corpus_source.py`, or a manifest file that contains one British Library book file path per line."),
+                  index_file: Path = typer.Argument(..., dir_okay=False, file_okay=True, help="File to save the page language index to in NumPy `.npz` format."),
+                  model_threshold: Optional[float] = typer.Option(None, "--threshold", "-t", help="Probability threshold for the model to output a label e.g. `0.9` would mean the model has to be 90% confident that the language label is correct."),
+                  book_folder: Optional[Path] = typer.Option(None, "--book-folder", help="The folder, or archive file of the book corpus, that relative file paths within the `books` manifest file are relative to, by default this is the folder the manifest file is in."),
+                  batch_pages: int = typer.Option(256, "--batch-pages", min=1, help="Number of pages, which can come from more than one book file, to give to the model at a time.")
+                  ) -> None:
+    '''
+    Identifies the language of every page, that contains text, of the book 
+    files, given in the same way as `process-files`, and saves the book, page 
+    number, language label, and probability of each page as a page language 
+    index, see `page_language_index.PageLanguageIndex`, to `index_file`.
+
+    Unlike `process-files`, which counts the number of pages of each language 
+    per book, the index keeps the language of each page, so that the pages of 
+    a book with more than one language can be treated differently, e.g. 
+    `../spacy_processing/spacy_tagging.py --page-language-index` only tags the 
+    pages of a given language.
+    '''
+    if not isinstance(model_threshold, float):
+        model_threshold = None
+    if not isinstance(batch_pages, int):
+        batch_pages = 256
+    model = fasttext.load_model(str(model_path))
+    book_files = list(book_file_paths(books, book_folder))
+    page_languages = ((book_file.stem, page_number, language_label, probability)
+                      for book_file, page_number, language_label, probability 
+                      in identify_page_languages(model, book_files, model_threshold, batch_pages))
+    page_language_index = PageLanguageIndex.from_page_languages([book_file.stem for book_file in book_files], 
+                                                                page_languages)
+    page_language_index.save(index_file)
+
+
+@app.command()
+def label_table(model_path: Path = typer.Argument(...,
+                                                  exists=True,
+                                                  dir_okay=False,
+                                                  file_okay=True,
+                                                  resolve_path=True,
+                                                  help="File path to either the large or small FastText language identification model."),
+                label_table_file: Path = typer.Argument(..., dir_okay=False, file_okay=True, help="File to save the label table to as a JSON object.")
+                ) -> None:
+    '''
+    Saves the BCP 47 code and English language name of every label of the 
+    model, as a JSON object of label to `[code, name]` e.g.
+    `{"__label__en": ["en", "English"]}`, to `label_table_file`. The label 
+    table can then be given to `process-file` and `process-files` through 
+    `--label-table` so that the labels do not need to be resolved through 
+    langcodes. The label table should be stored with the model it was 
+    created from, e.g. `large_model.labels.json`.
+    '''
+    model = fasttext.load_model(str(model_path))
+    with label_table_file.open('w') as label_table_fp:
+        json.dump(create_label_table(model), label_table_fp, indent=1)
+
 
 if __name__ == "__main__":
     app()
@@ -1,11 +1,19 @@
 import json
 from pathlib import Path
-from typing import List
+import tarfile
+from typing import List, Optional
 import tempfile
 
 import pytest
 
-from language_id import text_generator, process_file
+from language_id import (text_generator, process_file, process_files, book_file_paths,
+                         process_pages, label_table, book_ocr_quality)
+from language_labels import label_language, language_output, load_label_table
+from lexicon import Lexicon
+from compressed_files import (COMPRESSION_SUFFIXES, Compression, available_compressions,
+                              file_compression, open_input)
+from page_language_index import PageLanguageIndex
+from scan_cache import ScanCache
 
 TEST_DATA_DIR = Path(__file__, '..', 'test_data').resolve()
 TEST_FILE_1 = Path(TEST_DATA_DIR, "test1.json")
@@ -24,7 +32,172 @@ def test_text_generator() -> None:
         page_numbers.append(page_number)
     assert test_file_1_page_numbers == page_numbers
 
+def test_book_file_paths() -> None:
+    assert TEST_FILES == list(book_file_paths(TEST_DATA_DIR))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manifest_file = Path(temp_dir, "manifest.txt")
+        with manifest_file.open('w') as manifest_fp:
+            manifest_fp.write(f"test2.json\n\n{TEST_FILE_1}\n")
+        assert [TEST_FILE_2, TEST_FILE_1] == list(book_file_paths(manifest_file, TEST_DATA_DIR))
+        assert [Path(temp_dir, "test2.json"), TEST_FILE_1] == list(book_file_paths(manifest_file))
+
+@pytest.mark.parametrize("workers", [None, 1, 2])
+@pytest.mark.parametrize("batch_pages", [None, 1, 2, 256])
+@pytest.mark.parametrize("use_manifest", [True, False])
+@pytest.mark.parametrize("high_threshold", [True, False])
+def test_process_files(use_manifest: bool, high_threshold: bool, 
+                       batch_pages: Optional[int], workers: Optional[int]
+                       ) -> None:
+    model_threshold = 0.7 if high_threshold else None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        books = TEST_DATA_DIR
+        if use_manifest:
+            books = Path(temp_dir, "manifest.txt")
+            with books.open('w') as manifest_fp:
+                manifest_fp.write("test1.json\ntest2.json\n")
+        
+        expected_output_file = Path(temp_dir, "expected_output.json")
+        output_file = Path(temp_dir, "output.json")
+        for test_file in TEST_FILES:
+            process_file(FASTTEXT_MODEL_PATH, test_file, expected_output_file, False, model_threshold)
+        process_files(FASTTEXT_MODEL_PATH, books, output_file, False, model_threshold, 
+                      TEST_DATA_DIR, batch_pages, workers)
+        
+        with expected_output_file.open('r') as expected_fp:
+            with output_file.open('r') as output_fp:
+                expected_lines = [json.loads(line) for line in expected_fp]
+                lines = [json.loads(line) for line in output_fp]
+                assert 2 == len(lines)
+                assert expected_lines == lines
+
+
+@pytest.mark.parametrize("compression", [Compression.GZIP, Compression.ZSTD])
+def test_process_files_compressed(compression: Compression) -> None:
+    if compression not in available_compressions():
+        pytest.skip(f'{compression.value} is not installed')
+    suffix = COMPRESSION_SUFFIXES[compression]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        expected_output_file = Path(temp_dir, "expected_output.json")
+        output_file = Path(temp_dir, f"output.json{suffix}")
+        for _ in range(2):
+            process_files(FASTTEXT_MODEL_PATH, TEST_DATA_DIR, expected_output_file, False)
+            # Each run appends a new gzip member or zstd frame.
+            process_files(FASTTEXT_MODEL_PATH, TEST_DATA_DIR, output_file, False)
+        assert compression == file_compression(output_file)
+        with open_input(output_file) as output_fp:
+            assert expected_output_file.read_text() == output_fp.read()
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_process_files_archive(workers: Optional[int]) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # An un-compressed tar file with the same structure as the downloaded 
+        # book corpus.
+        tar_file = Path(temp_dir, "books.tar")
+        with tarfile.open(tar_file, 'w') as tar_fp:
+            for volume, test_file in enumerate(TEST_FILES, 1):
+                tar_fp.add(test_file, arcname=f"json/0118/011834197_0{volume}_text.json")
+        expected_output_file = Path(temp_dir, "expected_output.json")
+        process_files(FASTTEXT_MODEL_PATH, TEST_DATA_DIR, expected_output_file, True)
+        output_file = Path(temp_dir, "output.json")
+        process_files(FASTTEXT_MODEL_PATH, tar_file, output_file, True, workers=workers)
+        assert expected_output_file.read_text() == output_file.read_text()
+
+        manifest_file = Path(temp_dir, "manifest.txt")
+        manifest_file.write_text("0118/011834197_02_text.json\n")
+        manifest_output_file = Path(temp_dir, "manifest_output.json")
+        process_files(FASTTEXT_MODEL_PATH, manifest_file, manifest_output_file, False, 
+                      book_folder=tar_file)
+        assert '011834197_02_text' == json.loads(manifest_output_file.read_text())['filename']
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_process_files_cache(workers: Optional[int]) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_file = Path(temp_dir, "cache.db")
+        output_files = [Path(temp_dir, "output_1.json"), Path(temp_dir, "output_2.json"), 
+                        Path(temp_dir, "output_3.json")]
+        # The second run comes from the cache, the third uses a different 
+        # threshold and therefore does not.
+        for output_file, model_threshold in zip(output_files, [None, None, 0.7]):
+            process_files(FASTTEXT_MODEL_PATH, TEST_DATA_DIR, output_file, False, 
+                          model_threshold, None, None, workers, cache_file)
+        expected_output_file = Path(temp_dir, "expected_output.json")
+        for test_file in TEST_FILES:
+            process_file(FASTTEXT_MODEL_PATH, test_file, expected_output_file, False, 0.7)
+
+        with ScanCache(cache_file) as scan_cache:
+            for test_file in TEST_FILES:
+                language = scan_cache.get(test_file, 'language')
+                assert str(FASTTEXT_MODEL_PATH) == language['model']
+                assert 0.7 == language['threshold']
+        outputs = [output_file.read_text() for output_file in output_files]
+        assert 2 == len(outputs[0].splitlines())
+        assert outputs[0] == outputs[1]
+        assert expected_output_file.read_text() == outputs[2]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_process_files_lexicon(workers: Optional[int]) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        lexicon_file = Path(temp_dir, "lexicon.json")
+        Lexicon(['ashe', 'pyee', 'the', 'of']).save(lexicon_file)
+        cache_file = Path(temp_dir, "cache.db")
+        expected_output_file = Path(temp_dir, "expected_output.json")
+        process_files(FASTTEXT_MODEL_PATH, TEST_DATA_DIR, expected_output_file, False)
+        output_files = [Path(temp_dir, "output_1.json"), Path(temp_dir, "output_2.json")]
+        # The second run comes from the cache.
+        for output_file in output_files:
+            process_files(FASTTEXT_MODEL_PATH, TEST_DATA_DIR, output_file, False, 
+                          None, None, None, workers, cache_file, None, lexicon_file)
+        assert output_files[0].read_text() == output_files[1].read_text()
+
+        with output_files[0].open('r') as output_fp, expected_output_file.open('r') as expected_fp:
+            for test_file, line, expected_line in zip(TEST_FILES, output_fp, expected_fp):
+                output_data = json.loads(line)
+                ocr_quality = output_data.pop('ocr_quality')
+                assert json.loads(expected_line) == output_data
+                assert book_ocr_quality(Lexicon.load(lexicon_file), test_file) == ocr_quality
+        assert 0 < book_ocr_quality(Lexicon.load(lexicon_file), TEST_FILE_1) < 1
+        with ScanCache(cache_file) as scan_cache:
+            for test_file in TEST_FILES:
+                lexicon_quality = scan_cache.get(test_file, 'lexicon_quality')
+                assert str(lexicon_file) == lexicon_quality['lexicon']
+
+
+@pytest.mark.parametrize("batch_pages", [1, 2, 256])
+@pytest.mark.parametrize("high_threshold", [True, False])
+def test_process_pages(high_threshold: bool, batch_pages: int) -> None:
+    model_threshold = 0.7 if high_threshold else None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_file = Path(temp_dir, "index.npz")
+        output_file = Path(temp_dir, "output.json")
+        process_pages(FASTTEXT_MODEL_PATH, TEST_DATA_DIR, index_file, 
+                      model_threshold, None, batch_pages)
+        process_files(FASTTEXT_MODEL_PATH, TEST_DATA_DIR, output_file, False, 
+                      model_threshold, None, None, None)
+        page_language_index = PageLanguageIndex.load(index_file)
+        with output_file.open('r') as output_fp:
+            for test_file, line in zip(TEST_FILES, output_fp):
+                assert ([page_number for page_number, _ in text_generator(test_file)]
+                        == list(page_language_index.page_languages(test_file.stem)))
+                language_counts = page_language_index.language_counts(test_file.stem)
+                assert json.loads(line) == language_output(language_counts, test_file, False)
+
+
+def test_label_table() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        label_table_file = Path(temp_dir, "labels.json")
+        label_table(FASTTEXT_MODEL_PATH, label_table_file)
+        with label_table_file.open('r') as label_table_fp:
+            labels = json.load(label_table_fp)
+        assert ['en', 'English'] == labels['__label__en']
+        assert ['fr', 'French'] == labels['__label__fr']
 
+        # The label table is used rather than resolving the labels again.
+        label_table_file.write_text(json.dumps({'__label__xx': ['xx', 'Test']}))
+        load_label_table(label_table_file)
+        assert ('xx', 'Test') == label_language('__label__xx')
 
 
 @pytest.mark.parametrize("excl_filename", [True, False])
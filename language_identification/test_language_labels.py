@@ -0,0 +1,23 @@
+from collections import Counter
+from pathlib import Path
+
+from language_labels import label_language, language_output
+
+
+def test_label_language() -> None:
+    assert ('en', 'English') == label_language('__label__en')
+    assert ('zh', 'Chinese') == label_language('__label__zh')
+
+
+def test_language_output() -> None:
+    book_file = Path('books', '000000037_0_1-42pgs__944211_dat.json')
+    language_counts = Counter({'__label__en': 3, '__label__fr': 1})
+    expected_output = {'filename': '000000037_0_1-42pgs__944211_dat',
+                       'language': 'English',
+                       'language_extras': {'English': {'BCP 47 code': 'en', 'count': 3, 'proportion': 0.75},
+                                           'French': {'BCP 47 code': 'fr', 'count': 1, 'proportion': 0.25}}}
+    assert expected_output == language_output(language_counts, book_file, False)
+    del expected_output['filename']
+    assert expected_output == language_output(language_counts, book_file, True)
+
+    assert {'language': None} == language_output(Counter(), book_file, True)
@@ -0,0 +1,30 @@
+from collections import Counter
+from pathlib import Path
+import tempfile
+
+from page_language_index import PageLanguageIndex
+
+def test_page_language_index() -> None:
+    book_names = ['000000001_01_text', '000000002_01_text', '000000003_01_text']
+    page_languages = [('000000001_01_text', 1, '__label__en', 0.9),
+                      ('000000001_01_text', 2, '__label__fr', 0.8),
+                      ('000000001_01_text', 4, None, 0.0),
+                      ('000000003_01_text', 3, '__label__en', 0.7)]
+    page_language_index = PageLanguageIndex.from_page_languages(book_names, page_languages)
+    assert 4 == len(page_language_index)
+    assert ['__label__en', '__label__fr'] == page_language_index.label_names.tolist()
+    assert [0, 1, -1, 0] == page_language_index.label_codes.tolist()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_file = Path(temp_dir, 'index.npz')
+        page_language_index.save(index_file)
+        page_language_index = PageLanguageIndex.load(index_file)
+
+    assert {1: '__label__en', 2: '__label__fr', 4: None} == page_language_index.page_languages('000000001_01_text')
+    assert Counter({'__label__en': 1, '__label__fr': 1}) == page_language_index.language_counts('000000001_01_text')
+    # A book with no pages that contain text is in the index but has no pages.
+    assert '000000002_01_text' in page_language_index
+    assert {} == page_language_index.page_languages('000000002_01_text')
+    assert {3: '__label__en'} == page_language_index.page_languages('000000003_01_text')
+    assert '000000004_01_text' not in page_language_index
+    assert Counter() == page_language_index.language_counts('000000004_01_text')
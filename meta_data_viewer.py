@@ -1,36 +1,131 @@
 import json
+import os
 from pathlib import Path
-from typing import List
+import sqlite3
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import typer
 
-def main(identifier: str = typer.Argument(..., help='9 digit string that uniquely identifies a book e.g. `000741339`', 
+import json_backend
+
+def create_meta_data_index(book_fp: Path, index_fp: Path) -> None:
+    '''
+    Creates a SQLite database at `index_fp` that contains one row per book in
+    the meta data, whereby the row's primary key is the book's identifier and
+    the row's value is the book's meta data as a JSON Object. Looking up a
+    book in this database does not require loading all of the meta data.
+
+    :param book_fp: The file path to the British Library 19th Century book
+                    META data.
+    :param index_fp: File path to save the SQLite database to, this file is
+                     only created once all of the meta data has been added.
+    '''
+    partial_index_fp = index_fp.with_name(f'{index_fp.name}.partial')
+    if partial_index_fp.exists():
+        partial_index_fp.unlink()
+    with book_fp.open('r') as book_json:
+        book_data = json_backend.load(book_json)
+    connection = sqlite3.connect(str(partial_index_fp))
+    try:
+        with connection:
+            connection.execute('CREATE TABLE books (identifier TEXT PRIMARY KEY, '
+                               'meta_data TEXT NOT NULL)')
+            connection.executemany('INSERT OR REPLACE INTO books VALUES (?, ?)',
+                                   ((book['identifier'], json.dumps(book))
+                                    for book in book_data))
+    finally:
+        connection.close()
+    os.replace(partial_index_fp, index_fp)
+
+def lookup_meta_data(index_fp: Path, identifiers: Iterable[str],
+                     batch_size: int = 500
+                     ) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    '''
+    :param index_fp: File path to the SQLite database created by
+                     `create_meta_data_index`.
+    :param identifiers: Book identifiers to look up.
+    :param batch_size: Number of identifiers to look up in one query.
+    :returns: Yields for each identifier, in the same order as given, the
+              identifier and the book's meta data, the meta data is None if the
+              identifier is not in the meta data.
+    '''
+    connection = sqlite3.connect(str(index_fp))
+    try:
+        batch: List[str] = []
+
+        def lookup_batch() -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+            place_holders = ', '.join('?' for _ in batch)
+            rows = connection.execute('SELECT identifier, meta_data FROM books '
+                                      f'WHERE identifier IN ({place_holders})',
+                                      batch)
+            id_meta_data = {identifier: json_backend.loads(meta_data)
+                            for identifier, meta_data in rows}
+            for identifier in batch:
+                yield identifier, id_meta_data.get(identifier)
+
+        for identifier in identifiers:
+            batch.append(identifier)
+            if len(batch) == batch_size:
+                yield from lookup_batch()
+                batch = []
+        if batch:
+            yield from lookup_batch()
+    finally:
+        connection.close()
+
+def main(identifier: str = typer.Argument(..., help='9 digit string that uniquely identifies a book e.g. `000741339`, or `-` to read one identifier per line from stdin',
                                           metavar='Identifier'),
-         book_fp: Path = typer.Argument(Path('.','book_data.json'), 
+         book_fp: Path = typer.Argument(Path('.','book_data.json'),
                                         help='The file path to the British Library 19th Century book META data.',
                                         metavar='Book_Meta_File_Path', exists=True,
                                         file_okay=True, dir_okay=False, writable=False,
                                         readable=True, resolve_path=True),
-        fields_to_remove: List[str] = typer.Option(['imgs', 'datefield', 'shelfmarks', 'edition', 'issuance', 'corporate'], '--remove', '-rm', 
-                                                   help='Field/Key not to print')):
+        fields_to_remove: List[str] = typer.Option(['imgs', 'datefield', 'shelfmarks', 'edition', 'issuance', 'corporate'], '--remove', '-rm',
+                                                   help='Field/Key not to print'),
+        index_fp: Optional[Path] = typer.Option(None, '--index', file_okay=True, dir_okay=False, resolve_path=True,
+                                                help='File path to a SQLite index of the META data, if it does not exist it is created from the META data.')):
     '''
-    Given the file path to the British Library 19th Century book Meta data and 
-    the unique identifier of a book it will return that books meta data in 
+    Given the file path to the British Library 19th Century book Meta data and
+    the unique identifier of a book it will return that books meta data in
     a pretty print format.
+
+    If the identifier is `-` the identifiers are read from stdin, one per
+    line, and the meta data of each book is printed with an empty line
+    between books.
+
+    With `--index` the meta data is looked up in a SQLite index, which is
+    created from the meta data the first time it is used, rather than loading
+    all of the meta data for each run.
     '''
-    with book_fp.open('r') as book_json:
-        book_data = json.load(book_json)
-        for book in book_data:
-            _id = book['identifier']
-            if _id == identifier:
-                for key, value in book.items():
-                    if key in fields_to_remove:
-                        continue
-                    else:
-                        key_print = typer.style(f'{key}', fg='bright_blue', bg='black')
-                        break_print = typer.style(' : ', fg='white', bg='black')
-                        value_print = typer.style(f'{value}', fg='yellow', bg='black')
-                        typer.echo(key_print + break_print + value_print)
+    if identifier == '-':
+        identifiers = (line.strip() for line in sys.stdin if line.strip())
+    else:
+        identifiers = iter([identifier])
+
+    if isinstance(index_fp, Path):
+        if not index_fp.exists():
+            create_meta_data_index(book_fp, index_fp)
+        id_meta_data = lookup_meta_data(index_fp, identifiers)
+    else:
+        with book_fp.open('r') as book_json:
+            book_data = {book['identifier']: book for book in json_backend.load(book_json)}
+        id_meta_data = ((_id, book_data.get(_id)) for _id in identifiers)
+
+    for book_number, (_id, book) in enumerate(id_meta_data):
+        if book_number:
+            typer.echo('')
+        if book is None:
+            typer.echo(f'{_id} : not found', err=True)
+            continue
+        for key, value in book.items():
+            if key in fields_to_remove:
+                continue
+            else:
+                key_print = typer.style(f'{key}', fg='bright_blue', bg='black')
+                break_print = typer.style(' : ', fg='white', bg='black')
+                value_print = typer.style(f'{value}', fg='yellow', bg='black')
+                typer.echo(key_print + break_print + value_print)
 
 if __name__ == '__main__':
-    typer.run(main)
\ No newline at end of file
+    typer.run(main)
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+import tempfile
+import time
+from typing import List, Tuple
+
+from spacy.tokens import Doc
+import typer
+import en_core_web_md
+
+from compressed_files import Compression, available_compressions
+from lexicon import Lexicon
+from spacy_tagging import TokenStringCache, TSVBookWriter, text_generator
+
+app = typer.Typer()
+
+# Compression levels compared for each compression.
+BENCHMARK_LEVELS = {Compression.NONE: [0], Compression.GZIP: [1, 6, 9],
+                    Compression.ZSTD: [1, 3, 9, 19]}
+
+@app.command()
+def benchmark(repeats: int = typer.Option(3, help="Number of times to repeat each run, the fastest run is reported.")
+              ) -> None:
+    '''
+    Outputs how long it takes to write the `.tsv` file of pages that have
+    already been tagged, and the size of the file, without compression and
+    with gzip and zstd compression at different compression levels, through
+    `TSVBookWriter`. zstd is only included if zstandard is installed. The
+    pages come from the British Library books in the
+    `./test_data/real_book_data` directory and are tagged with the English
+    medium spaCy model, with the lemmatizer, tagger, and ner components. The
+    output will be in JSON format, for example:
+
+    {"compression": "zstd", "level": 3, "time": 0.0093, "bytes": 18231, "ratio": 6.31}
+
+    Units of time are seconds, `ratio` is the size of the uncompressed `.tsv`
+    file divided by the size of the compressed file.
+    '''
+    real_book_data_directory = Path(__file__, '..', 'test_data', 'real_book_data').resolve()
+    nlp = en_core_web_md.load(exclude=['parser'])
+    lexicon = Lexicon(nlp.vocab.strings)
+    attribute_order = ['token', 'lemma', 'pos', 'ner']
+
+    pages: List[Tuple[Doc, int]] = []
+    for book_file in sorted(real_book_data_directory.iterdir()):
+        if book_file.suffix != '.json':
+            continue
+        pages.extend(nlp.pipe(text_generator(book_file), as_tuples=True))
+
+    # As in a tagging run the token string cache is shared by all books.
+    token_strings = TokenStringCache(lexicon)
+
+    def write_book(output_folder: Path, compression: Compression,
+                   level: int) -> Path:
+        book_writer = TSVBookWriter(Path('benchmark.json'), output_folder,
+                                    attribute_order, lexicon, token_strings,
+                                    compression=compression, compression_level=level)
+        for spacy_doc, page_number in pages:
+            book_writer.add_page(spacy_doc, page_number)
+        book_writer.close()
+        return book_writer.output_file
+
+    uncompressed_size = None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for compression in available_compressions():
+            for level in BENCHMARK_LEVELS[compression]:
+                run_times: List[float] = []
+                for _ in range(repeats):
+                    t = time.perf_counter()
+                    output_file = write_book(Path(temp_dir), compression, level)
+                    run_times.append(time.perf_counter() - t)
+                number_bytes = output_file.stat().st_size
+                if uncompressed_size is None:
+                    uncompressed_size = number_bytes
+                data = {'compression': compression.value, 'level': level,
+                        'time': min(run_times), 'bytes': number_bytes,
+                        'ratio': uncompressed_size / number_bytes}
+                typer.echo(json.dumps(data))
+
+if __name__ == '__main__':
+    app()
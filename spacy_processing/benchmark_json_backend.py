@@ -0,0 +1,103 @@
+import json
+from pathlib import Path
+import time
+from typing import Any, Callable, List, Optional
+
+import typer
+
+import json_backend
+from spacy_tagging import book_file_paths
+
+app = typer.Typer()
+
+def fastest_time(run: Callable[[], Any], repeats: int) -> float:
+    '''
+    :param run: Function to time.
+    :param repeats: Number of times to run the function.
+    :returns: The fastest time, in seconds, it took to run the function.
+    '''
+    run_times: List[float] = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        run()
+        run_times.append(time.perf_counter() - t)
+    return min(run_times)
+
+@app.command()
+def benchmark(books: Optional[Path] = typer.Argument(None, exists=True,
+                                                     dir_okay=True,
+                                                     file_okay=True,
+                                                     resolve_path=True,
+                                                     help="Either a folder of British Library book files or a manifest file that contains one British Library book file path per line. By default the `./test_data/real_book_data` directory."),
+              meta_data_file: Path = typer.Option(Path(__file__, '..', '..', 'batching_files', 'id_date_meta_data.json').resolve(),
+                                                  "--meta-data-file", exists=True, dir_okay=False, file_okay=True,
+                                                  help="The British Library 19th Century book META data, by default the `id_date_meta_data.json` file within this repository."),
+              book_folder: Optional[Path] = typer.Option(None, "--book-folder", help="The folder that relative file paths within the `books` manifest file are relative to, by default this is the folder the manifest file is in."),
+              repeats: int = typer.Option(3, help="Number of times to repeat each run, the fastest run is reported.")
+              ) -> None:
+    '''
+    For each JSON parser installed, see `json_backend.BACKEND_NAMES`, outputs
+    how long it takes to parse the book files (`books`) and the meta data file
+    (`meta_data`) and what share of the time it takes to scan them that the
+    parsing accounts for. Scanning is reading the files, parsing them, and
+    going through the parsed data, for the books counting the characters on
+    each page as `../benchmarking_spacy/character_range.py` does and for the
+    meta data counting the books that have a date. The output is one JSON
+    object per line, for example:
+
+    {"backend": "orjson", "data": "books", "files": 1, "megabytes": 0.0211, "read_time": 0.00002, "parse_time": 0.00003, "scan_time": 0.00006, "parse_share": 0.5, "parse_megabytes_per_second": 703.81}
+
+    Units of time are seconds.
+    '''
+    if not isinstance(books, Path):
+        books = Path(__file__, '..', 'test_data', 'real_book_data').resolve()
+    if not isinstance(book_folder, Path):
+        book_folder = None
+    if not isinstance(meta_data_file, Path):
+        meta_data_file = Path(__file__, '..', '..', 'batching_files', 'id_date_meta_data.json').resolve()
+    book_files = list(book_file_paths(books, book_folder))
+
+    def read_files(files: List[Path]) -> List[bytes]:
+        file_data: List[bytes] = []
+        for a_file in files:
+            with a_file.open('rb') as fp:
+                file_data.append(fp.read())
+        return file_data
+
+    def scan_books() -> int:
+        number_characters = 0
+        for book_file in book_files:
+            with book_file.open('rb') as fp:
+                for page in json_backend.load(fp):
+                    if page[1].strip():
+                        number_characters += len(page[1])
+        return number_characters
+
+    def scan_meta_data() -> int:
+        with meta_data_file.open('rb') as fp:
+            return sum(1 for book in json_backend.load(fp) if book.get('date'))
+
+    default_backend = json_backend.backend
+    try:
+        for backend_name in json_backend.available_backends():
+            json_backend.set_backend(backend_name)
+            for data_name, files, scan in [('books', book_files, scan_books),
+                                           ('meta_data', [meta_data_file], scan_meta_data)]:
+                file_data = read_files(files)
+                megabytes = sum(len(data) for data in file_data) / 1000000
+                read_time = fastest_time(lambda: read_files(files), repeats)
+                parse_time = fastest_time(lambda: [json_backend.loads(data) for data in file_data],
+                                          repeats)
+                scan_time = fastest_time(scan, repeats)
+                results = {'backend': backend_name, 'data': data_name,
+                           'files': len(files), 'megabytes': megabytes,
+                           'read_time': read_time, 'parse_time': parse_time,
+                           'scan_time': scan_time,
+                           'parse_share': parse_time / scan_time,
+                           'parse_megabytes_per_second': megabytes / parse_time}
+                typer.echo(json.dumps(results))
+    finally:
+        json_backend.set_backend(default_backend)
+
+if __name__ == '__main__':
+    app()
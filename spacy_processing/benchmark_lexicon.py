@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+import time
+from typing import Callable, List, Tuple
+
+import typer
+import en_core_web_md
+
+from lexicon import Lexicon, OCRQuality
+from spacy_tagging import text_generator
+
+app = typer.Typer()
+
+@app.command()
+def benchmark() -> None:
+    '''
+    Outputs how many tokens per second can be looked up when measuring the
+    OCR quality, comparing the original approach of looking up each token in
+    a list copy of the English medium spaCy model vocabulary (`list`) against
+    the `Lexicon` (`lexicon`). The tokens come from the 10 pages of a British
+    Library book in the `./test_data/real_book_data` directory. The output
+    will be in JSON format, for example:
+
+    {"lookup": "lexicon", "tokens": 3605, "time": 0.0004, "tokens_per_second": 9012500.0, "ocr_quality": 0.8502}
+
+    Units of time are seconds. Both approaches give the same `ocr_quality`.
+    '''
+    real_book_data_directory = Path(__file__, '..', 'test_data', 'real_book_data').resolve()
+
+    nlp = en_core_web_md.load(exclude=['tagger', 'parser', 'ner',
+                                       'lemmatizer', 'attribute_ruler'])
+    vocab_list = list(nlp.vocab.strings)
+    lexicon = Lexicon(nlp.vocab.strings)
+
+    tokens: List[str] = []
+    for book_file in sorted(real_book_data_directory.iterdir()):
+        if book_file.suffix != '.json':
+            continue
+        for spacy_doc, _ in nlp.pipe(text_generator(book_file), as_tuples=True):
+            for spacy_token in spacy_doc:
+                if not spacy_token.is_space and not spacy_token.is_punct:
+                    tokens.append(spacy_token.text)
+
+    def list_lookup() -> float:
+        number_tokens_found = 0
+        for token in tokens:
+            if token.lower() in vocab_list:
+                number_tokens_found += 1
+        return round(number_tokens_found / len(tokens), 4)
+
+    def lexicon_lookup() -> float:
+        ocr_quality = OCRQuality(lexicon)
+        for token in tokens:
+            ocr_quality.add_token(token)
+        return ocr_quality.quality
+
+    lookups: List[Tuple[str, Callable[[], float]]] = [('list', list_lookup),
+                                                     ('lexicon', lexicon_lookup)]
+    for lookup_name, lookup in lookups:
+        t = time.perf_counter()
+        ocr_quality = lookup()
+        total_time = time.perf_counter() - t
+        data = {'lookup': lookup_name, 'tokens': len(tokens), 'time': total_time,
+                'tokens_per_second': len(tokens) / total_time,
+                'ocr_quality': ocr_quality}
+        typer.echo(json.dumps(data))
+
+if __name__ == '__main__':
+    app()
@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Tuple
+
+import typer
+
+from page_reader import read_pages
+from spacy_tagging import book_file_paths
+
+app = typer.Typer()
+
+@app.command()
+def benchmark(books: Optional[Path] = typer.Argument(None, exists=True,
+                                                     dir_okay=True,
+                                                     file_okay=True,
+                                                     resolve_path=True,
+                                                     help="Either a folder of British Library book files or a manifest file that contains one British Library book file path per line. By default the `./test_data/real_book_data` directory."),
+              book_folder: Optional[Path] = typer.Option(None, "--book-folder", help="The folder that relative file paths within the `books` manifest file are relative to, by default this is the folder the manifest file is in."),
+              repeats: int = typer.Option(3, help="Number of times to repeat each run, the fastest run is reported.")
+              ) -> None:
+    '''
+    Outputs how many megabytes of British Library book files per second can be
+    read into pages, and the peak memory used to read a book, comparing
+    loading the whole book through `json.load` (`json_load`) against reading
+    one page at a time through `page_reader.read_pages` (`read_pages`). The
+    output will be in JSON format, for example:
+
+    {"reader": "read_pages", "books": 1, "pages": 11, "megabytes": 0.0211, "time": 0.0001, "megabytes_per_second": 401.05, "peak_memory": 0.0943}
+
+    Units of time are seconds and peak memory is the largest amount of memory,
+    in megabytes, allocated at once while reading any one book.
+    '''
+    if not isinstance(books, Path):
+        books = Path(__file__, '..', 'test_data', 'real_book_data').resolve()
+    if not isinstance(book_folder, Path):
+        book_folder = None
+    book_files = list(book_file_paths(books, book_folder))
+    megabytes = sum(book_file.stat().st_size for book_file in book_files) / 1000000
+
+    def json_load(book_file: Path) -> int:
+        with book_file.open('r') as book_fp:
+            return sum(1 for _ in json.load(book_fp))
+
+    def page_reader(book_file: Path) -> int:
+        return sum(1 for _ in read_pages(book_file))
+
+    readers: List[Tuple[str, Callable[[Path], int]]] = [('json_load', json_load),
+                                                        ('read_pages', page_reader)]
+    for reader_name, reader in readers:
+        run_times: List[float] = []
+        for _ in range(repeats):
+            number_pages = 0
+            t = time.perf_counter()
+            for book_file in book_files:
+                number_pages += reader(book_file)
+            run_times.append(time.perf_counter() - t)
+        total_time = min(run_times)
+
+        peak_memory = 0
+        for book_file in book_files:
+            tracemalloc.start()
+            reader(book_file)
+            peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        data = {'reader': reader_name, 'books': len(book_files),
+                'pages': number_pages, 'megabytes': megabytes,
+                'time': total_time,
+                'megabytes_per_second': megabytes / total_time,
+                'peak_memory': peak_memory / 1000000}
+        typer.echo(json.dumps(data))
+
+if __name__ == '__main__':
+    app()
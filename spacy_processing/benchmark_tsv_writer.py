@@ -0,0 +1,95 @@
+import csv
+import json
+from pathlib import Path
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+from spacy.tokens import Doc
+import typer
+import en_core_web_md
+
+from lexicon import Lexicon, OCRQuality
+from spacy_tagging import (TokenStringCache, TSVBookWriter,
+                           attribute_to_spacy_mapper, text_generator)
+
+app = typer.Typer()
+
+@app.command()
+def benchmark(repeats: int = typer.Option(3, help="Number of times to repeat each run, the fastest run is reported.")
+              ) -> None:
+    '''
+    Outputs how many `.tsv` rows (tokens) per second can be written from
+    pages that have already been tagged, comparing the original approach of
+    getting each attribute of each token from the Spacy `Token` and writing
+    each token through `csv.writer` (`token`) against `TSVBookWriter`, which
+    gets the attributes of all tokens of a page through `Doc.to_array` and
+    writes them as one string (`array`). Both include measuring the OCR
+    quality. The pages come from the British Library books in the
+    `./test_data/real_book_data` directory and are tagged with the English
+    medium spaCy model, with the lemmatizer, tagger, and ner components. The
+    output will be in JSON format, for example:
+
+    {"extraction": "array", "rows": 4127, "time": 0.0066, "rows_per_second": 625303.03, "ocr_quality": 0.8502}
+
+    Units of time are seconds. Both approaches write the same `.tsv` file. As 
+    the token string cache of `TSVBookWriter` is shared by all runs, as it is 
+    by all books in a tagging run, the fastest `array` run has a warm cache.
+    '''
+    real_book_data_directory = Path(__file__, '..', 'test_data', 'real_book_data').resolve()
+    nlp = en_core_web_md.load(exclude=['parser'])
+    lexicon = Lexicon(nlp.vocab.strings)
+    attribute_order = ['token', 'lemma', 'pos', 'ner']
+
+    pages: List[Tuple[Doc, int]] = []
+    for book_file in sorted(real_book_data_directory.iterdir()):
+        if book_file.suffix != '.json':
+            continue
+        pages.extend(nlp.pipe(text_generator(book_file), as_tuples=True))
+
+    def token_extraction(output_folder: Path) -> Tuple[int, float]:
+        attributes_to_spacy_tags = attribute_to_spacy_mapper()
+        ocr_quality = OCRQuality(lexicon)
+        number_rows = 0
+        with Path(output_folder, 'token.tsv').open('w', newline='') as output_fp:
+            tsv_writer = csv.writer(output_fp, delimiter='\t')
+            for spacy_doc, page_number in pages:
+                for spacy_token in spacy_doc:
+                    if spacy_token.is_space:
+                        continue
+                    if not spacy_token.is_punct:
+                        ocr_quality.add_token(spacy_token.text)
+                    number_rows += 1
+                    token_values = [getattr(spacy_token, attributes_to_spacy_tags[attribute])
+                                    for attribute in attribute_order]
+                    token_values.append(str(page_number))
+                    tsv_writer.writerow(token_values)
+        return number_rows, ocr_quality.quality
+
+    # As in a tagging run the token string cache is shared by all books.
+    token_strings = TokenStringCache(lexicon)
+
+    def array_extraction(output_folder: Path) -> Tuple[int, float]:
+        book_writer = TSVBookWriter(Path('array.json'), output_folder,
+                                    attribute_order, lexicon, token_strings)
+        for spacy_doc, page_number in pages:
+            book_writer.add_page(spacy_doc, page_number)
+        return book_writer.number_tokens, book_writer.close()
+
+    extractions: List[Tuple[str, Callable[[Path], Tuple[int, float]]]] = [('token', token_extraction),
+                                                                         ('array', array_extraction)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for extraction_name, extraction in extractions:
+            run_times: List[float] = []
+            for _ in range(repeats):
+                t = time.perf_counter()
+                number_rows, ocr_quality = extraction(Path(temp_dir))
+                run_times.append(time.perf_counter() - t)
+            total_time = min(run_times)
+            data = {'extraction': extraction_name, 'rows': number_rows,
+                    'time': total_time, 'rows_per_second': number_rows / total_time,
+                    'ocr_quality': ocr_quality}
+            typer.echo(json.dumps(data))
+
+if __name__ == '__main__':
+    app()
@@ -0,0 +1,332 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import typer
+
+from compressed_files import (Compression, available_compressions,
+                              compressed_path, open_output)
+import json_backend
+from tsv_format import (QUALITY_VALUE_WIDTH, ROW_TERMINATORS, TOKEN_COUNT_WIDTH,
+                        RowFormat, add_metadata, header_line, tsv_field)
+
+app = typer.Typer()
+
+# File extension of a binary book file.
+BINARY_BOOK_SUFFIX = '.tokens'
+# The first bytes of every binary book file, followed by the length of the
+# JSON header as an 8 byte little endian unsigned integer.
+MAGIC = b'BLTOKENS'
+VERSION = 1
+# Each column starts at a multiple of this many bytes from the start of the 
+# file so that each column can be memory mapped as a NumPy array.
+ALIGNMENT = 64
+# The string table of each token attribute, the token and lemma attributes
+# share a string table as most lemmas are also tokens.
+ATTRIBUTE_TABLES = {'token': 'word', 'lemma': 'word', 'pos': 'tag', 'ner': 'entity'}
+# The smallest data type of the codes of each string table, a larger data
+# type is used if the string table has more strings than it can code.
+TABLE_DTYPES = {'word': '<u4', 'tag': 'u1', 'entity': 'u1'}
+PAGE_DTYPE = '<u2'
+# Data type of the corpus vocabulary IDs, see `corpus_vocabulary.py`.
+VOCABULARY_ID_DTYPE = '<u4'
+# Number of rows converted to `.tsv` lines at a time.
+TSV_CHUNK_SIZE = 100000
+
+def code_dtype(smallest_dtype: str, largest_code: int) -> str:
+    '''
+    :param smallest_dtype: The smallest unsigned integer data type to use.
+    :param largest_code: The largest value that has to be stored.
+    :returns: The `smallest_dtype`, or the next larger unsigned integer data
+              type if `largest_code` does not fit in the `smallest_dtype`.
+    '''
+    for dtype in ['u1', '<u2', '<u4', '<u8']:
+        if (np.dtype(dtype).itemsize >= np.dtype(smallest_dtype).itemsize 
+            and largest_code <= np.iinfo(dtype).max):
+            return np.dtype(dtype).str
+    raise ValueError(f'{largest_code} is too large to be stored as an unsigned integer')
+
+def _aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+class BinaryBook:
+    '''
+    The tagged tokens of one book, the same content as a `.tsv` file written
+    by `spacy_tagging.py`, stored as integer coded columns, one NumPy array per
+    token attribute plus the page numbers, whereby the i'th element of each
+    column is the i'th token. The value of a token attribute is the string at
+    that code in the attribute's string table, see `ATTRIBUTE_TABLES`, e.g.
+    the token text of the i'th token is
+    `string_tables['word'][columns['token'][i]]`.
+
+    A binary book file is a `MAGIC` header, a JSON header that contains the
+    meta data and string tables, and then the raw bytes of each column, each
+    starting at a multiple of `ALIGNMENT` bytes, therefore the columns are
+    memory mapped when loaded rather than read.
+
+    A book can also have the ID, in a corpus vocabulary, of each string in
+    each of its string tables, see `corpus_vocabulary.py`, so that the
+    tokens of all books can be compared as integers, see `vocabulary_codes`.
+    '''
+    def __init__(self, book_identifier: str, quality: float,
+                 attribute_order: List[str], columns: Dict[str, np.ndarray],
+                 string_tables: Dict[str, List[str]],
+                 vocabulary_identifier: Optional[str] = None,
+                 vocabulary_ids: Optional[Dict[str, np.ndarray]] = None) -> None:
+        '''
+        :param book_identifier: Identifier of the book e.g. `000000037`.
+        :param quality: OCR quality of the book.
+        :param attribute_order: The token attributes in the order they are in
+                                the `.tsv` file e.g. `['token', 'pos']`.
+        :param columns: The codes of each token attribute and the `page`
+                        number of each token.
+        :param string_tables: The strings of each string table used by the
+                              `attribute_order`.
+        :param vocabulary_identifier: Identifier of the corpus vocabulary of
+                                      the `vocabulary_ids`.
+        :param vocabulary_ids: The corpus vocabulary ID of each string in
+                               each string table, indexed by code.
+        '''
+        self.book_identifier = book_identifier
+        self.quality = quality
+        self.attribute_order = attribute_order
+        self.columns = columns
+        self.string_tables = string_tables
+        self.vocabulary_identifier = vocabulary_identifier
+        self.vocabulary_ids = vocabulary_ids if vocabulary_ids is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.columns['page'])
+
+    def attribute_strings(self, attribute: str) -> List[str]:
+        '''
+        :param attribute: A token attribute e.g. `lemma`.
+        :returns: The string table of the token attribute.
+        '''
+        return self.string_tables[ATTRIBUTE_TABLES[attribute]]
+
+    def decode(self, attribute: str) -> List[str]:
+        '''
+        :param attribute: A token attribute e.g. `lemma`.
+        :returns: The value of the token attribute of every token.
+        '''
+        strings = self.attribute_strings(attribute)
+        return [strings[code] for code in self.columns[attribute].tolist()]
+
+    def vocabulary_codes(self, attribute: str) -> np.ndarray:
+        '''
+        :param attribute: A token attribute e.g. `lemma`.
+        :returns: The corpus vocabulary ID of the token attribute of every
+                  token.
+        :raises ValueError: If the book has no corpus vocabulary IDs.
+        '''
+        if self.vocabulary_identifier is None:
+            raise ValueError(f'Book {self.book_identifier} has no corpus vocabulary IDs')
+        return self.vocabulary_ids[ATTRIBUTE_TABLES[attribute]][self.columns[attribute]]
+
+    def save(self, book_file: Path) -> None:
+        '''
+        :param book_file: File to save the book to in the binary book format.
+        '''
+        column_names = self.attribute_order + ['page']
+        # The offset of each column is relative to the start of the columns,
+        # which is the first multiple of `ALIGNMENT` bytes after the header.
+        column_offsets: Dict[str, Dict[str, Any]] = {}
+        position = 0
+        for name in column_names:
+            column_offsets[name] = {'dtype': self.columns[name].dtype.str,
+                                    'offset': position}
+            position = _aligned(position + self.columns[name].nbytes)
+        header = {'version': VERSION, 'book_identifier': self.book_identifier,
+                  'quality': self.quality, 'token_count': len(self),
+                  'attribute_order': self.attribute_order,
+                  'string_tables': self.string_tables, 'columns': column_offsets,
+                  'vocabulary': None}
+        if self.vocabulary_identifier is not None:
+            header['vocabulary'] = {'identifier': self.vocabulary_identifier,
+                                    'ids': {table_name: ids.tolist() for table_name, ids
+                                            in self.vocabulary_ids.items()}}
+        header_bytes = json.dumps(header).encode('utf-8')
+        columns_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+        with book_file.open('wb') as book_fp:
+            book_fp.write(MAGIC)
+            book_fp.write(len(header_bytes).to_bytes(8, 'little'))
+            book_fp.write(header_bytes)
+            for name in column_names:
+                book_fp.write(b'\0' * (columns_start + column_offsets[name]['offset'] - book_fp.tell()))
+                book_fp.write(np.ascontiguousarray(self.columns[name]).tobytes())
+
+    @classmethod
+    def load(cls, book_file: Path, memory_map: bool = True) -> 'BinaryBook':
+        '''
+        :param book_file: File that was created through `BinaryBook.save`.
+        :param memory_map: Whether to memory map the columns, read only,
+                           rather than reading them into memory.
+        :returns: The book saved in the `book_file`.
+        :raises ValueError: If the `book_file` is not a binary book file.
+        '''
+        with book_file.open('rb') as book_fp:
+            if book_fp.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{book_file} is not a binary book file')
+            header_length = int.from_bytes(book_fp.read(8), 'little')
+            header = json_backend.loads(book_fp.read(header_length))
+        columns_start = _aligned(len(MAGIC) + 8 + header_length)
+        if header['version'] != VERSION:
+            raise ValueError(f'{book_file} is version {header["version"]} of the '
+                             f'binary book format, only version {VERSION} can be read')
+
+        number_tokens = header['token_count']
+        columns: Dict[str, np.ndarray] = {}
+        for name, column in header['columns'].items():
+            dtype = np.dtype(column['dtype'])
+            if not number_tokens:
+                # An empty file region cannot be memory mapped.
+                columns[name] = np.zeros(0, dtype=dtype)
+            elif memory_map:
+                columns[name] = np.memmap(book_file, dtype=dtype, mode='r',
+                                          offset=columns_start + column['offset'], shape=(number_tokens,))
+            else:
+                columns[name] = np.fromfile(book_file, dtype=dtype, count=number_tokens,
+                                            offset=columns_start + column['offset'])
+        vocabulary_identifier: Optional[str] = None
+        vocabulary_ids: Dict[str, np.ndarray] = {}
+        if header.get('vocabulary') is not None:
+            vocabulary_identifier = header['vocabulary']['identifier']
+            vocabulary_ids = {table_name: np.array(ids, dtype=VOCABULARY_ID_DTYPE)
+                              for table_name, ids in header['vocabulary']['ids'].items()}
+        return cls(header['book_identifier'], header['quality'],
+                   header['attribute_order'], columns, header['string_tables'],
+                   vocabulary_identifier, vocabulary_ids)
+
+    @classmethod
+    def from_string_ids(cls, book_identifier: str, quality: float,
+                        attribute_order: List[str], string_ids: np.ndarray,
+                        page_numbers: np.ndarray, strings: Mapping[int, str]
+                        ) -> 'BinaryBook':
+        '''
+        :param book_identifier: Identifier of the book e.g. `000000037`.
+        :param quality: OCR quality of the book.
+        :param attribute_order: The token attributes in the order of the
+                                columns of `string_ids`.
+        :param string_ids: An array of shape (number of tokens, number of
+                           attributes) of the string ID of each token
+                           attribute, e.g. Spacy string IDs as returned by
+                           `Doc.to_array`.
+        :param page_numbers: The page number of each token.
+        :param strings: The string of each string ID, e.g. a Spacy
+                        `StringStore`.
+        :returns: The book whereby each string table contains the strings of
+                  the string IDs of its attributes, in string ID order.
+        '''
+        columns: Dict[str, np.ndarray] = {}
+        string_tables: Dict[str, List[str]] = {}
+        for table_name in dict.fromkeys(ATTRIBUTE_TABLES[attribute] for attribute in attribute_order):
+            table_attributes = [attribute_index for attribute_index, attribute in enumerate(attribute_order)
+                                if ATTRIBUTE_TABLES[attribute] == table_name]
+            table_ids, codes = np.unique(string_ids[:, table_attributes], return_inverse=True)
+            codes = codes.reshape(len(string_ids), len(table_attributes))
+            dtype = code_dtype(TABLE_DTYPES[table_name], max(len(table_ids) - 1, 0))
+            for column_index, attribute_index in enumerate(table_attributes):
+                columns[attribute_order[attribute_index]] = codes[:, column_index].astype(dtype)
+            string_tables[table_name] = [strings[string_id] for string_id in table_ids.tolist()]
+        largest_page_number = int(page_numbers.max()) if len(page_numbers) else 0
+        columns['page'] = page_numbers.astype(code_dtype(PAGE_DTYPE, largest_page_number))
+        return cls(book_identifier, quality, attribute_order, columns, string_tables)
+
+def binary_book_files(binary_books: Path) -> List[Path]:
+    '''
+    :param binary_books: A binary book file or a folder of binary book files.
+    :returns: The binary book file, or the binary book files in the folder
+              in file name order.
+    '''
+    if binary_books.is_dir():
+        return sorted(book_file for book_file in binary_books.iterdir()
+                      if book_file.suffix == BINARY_BOOK_SUFFIX)
+    return [binary_books]
+
+def tsv_lines(binary_book: BinaryBook, row_format: RowFormat = RowFormat.CSV
+              ) -> Iterable[str]:
+    '''
+    :param binary_book: A book.
+    :param row_format: The format of the header line and token rows.
+    :returns: Yields the lines of the `.tsv` file of the book, the same as
+              `spacy_tagging.TSVBookWriter` writes, including the line
+              terminators. The token rows are yielded `TSV_CHUNK_SIZE` rows at
+              a time as one string.
+    '''
+    row_terminator = ROW_TERMINATORS[row_format]
+    yield header_line(binary_book.attribute_order, row_format)
+    yield add_metadata("quality", "value", str(binary_book.quality), QUALITY_VALUE_WIDTH) + '\n'
+    yield add_metadata("token", "count", str(len(binary_book)), TOKEN_COUNT_WIDTH) + '\n'
+    yield add_metadata("book", "identifier", str(binary_book.book_identifier)) + '\n'
+
+    # The `.tsv` field of every string in each string table, indexed by code.
+    table_fields = {table_name: np.array([tsv_field(string, row_format) for string in strings], 
+                                         dtype=object)
+                    for table_name, strings in binary_book.string_tables.items()}
+    page_column = binary_book.columns['page']
+    for start in range(0, len(binary_book), TSV_CHUNK_SIZE):
+        end = start + TSV_CHUNK_SIZE
+        columns = [table_fields[ATTRIBUTE_TABLES[attribute]][binary_book.columns[attribute][start:end]].tolist()
+                   for attribute in binary_book.attribute_order]
+        page_numbers, page_codes = np.unique(page_column[start:end], return_inverse=True)
+        page_fields = np.array([str(page_number) for page_number in page_numbers.tolist()], dtype=object)
+        columns.append(page_fields[page_codes].tolist())
+        yield row_terminator.join(map('\t'.join, zip(*columns))) + row_terminator
+
+def write_tsv(binary_book: BinaryBook, tsv_file: Path,
+              compression: Optional[Compression] = None,
+              compression_level: Optional[int] = None,
+              row_format: RowFormat = RowFormat.CSV) -> None:
+    '''
+    :param binary_book: A book.
+    :param tsv_file: File to write the `.tsv` file of the book to, the same
+                     file as `spacy_tagging.py` writes.
+    :param compression: Compression of the `.tsv` file, by default the
+                        compression given by the file extension of the
+                        `tsv_file`, see `compressed_files.open_output`.
+    :param compression_level: Compression level, by default the
+                              `compressed_files.DEFAULT_LEVELS`.
+    :param row_format: The format of the header line and token rows, the same
+                       as the `spacy_tagging.py --row-format` the book was
+                       tagged with.
+    '''
+    with open_output(tsv_file, 'w', compression, compression_level, newline='') as tsv_fp:
+        for lines in tsv_lines(binary_book, row_format):
+            tsv_fp.write(lines)
+
+@app.command()
+def to_tsv(binary_books: Path = typer.Argument(..., exists=True, dir_okay=True, file_okay=True, help=f"A binary book file, or a folder of binary book files (`{BINARY_BOOK_SUFFIX}` files)."),
+           output_folder: Path = typer.Argument(..., help="Folder to write the `.tsv` files to."),
+           memory_map: Optional[bool] = typer.Option(None, "--memory-map/--no-memory-map", help="Whether to memory map the binary book files rather than reading them into memory. By default they are memory mapped."),
+           compression: Compression = typer.Option(Compression.NONE, "--compression", case_sensitive=False, help="Compress each `.tsv` file, `gzip` (`.tsv.gz`) or `zstd` (`.tsv.zst`), zstd requires zstandard to be installed."),
+           compression_level: Optional[int] = typer.Option(None, "--compression-level", help="Compression level of `--compression`, by default 6 for gzip and 3 for zstd."),
+           row_format: RowFormat = typer.Option(RowFormat.CSV, "--row-format", case_sensitive=False, help="Format of the header line and token rows of each `.tsv` file, the same as `spacy_tagging.py --row-format`.")
+           ) -> None:
+    '''
+    Converts binary book files, written by `spacy_tagging.py --output-format
+    binary`, into the `.tsv` files, for the LexiDB database, that
+    `spacy_tagging.py` would have written, each with the same name as the
+    binary book file but with a `.tsv` file extension, and `.gz` or `.zst`
+    with `compression`.
+    '''
+    if not isinstance(memory_map, bool):
+        memory_map = True
+    if not isinstance(compression, Compression):
+        compression = Compression.NONE
+    if not isinstance(compression_level, int):
+        compression_level = None
+    if compression not in available_compressions():
+        raise typer.BadParameter(f'`--compression {compression.value}` requires zstandard to be installed')
+    if not isinstance(row_format, RowFormat):
+        row_format = RowFormat.CSV
+    output_folder.mkdir(parents=True, exist_ok=True)
+    for binary_book_file in binary_book_files(binary_books):
+        tsv_file = compressed_path(Path(output_folder, f'{binary_book_file.stem}.tsv'), compression)
+        write_tsv(BinaryBook.load(binary_book_file, memory_map), tsv_file,
+                  compression, compression_level, row_format)
+
+if __name__ == "__main__":
+    app()
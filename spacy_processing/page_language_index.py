@@ -0,0 +1,126 @@
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+class PageLanguageIndex:
+    '''
+    The language of every page, that contains text, of many book files stored
+    as columns, one NumPy array per field whereby the i'th element of each
+    page array is the i'th page. The pages of a book are stored together in
+    the order they are in the book file. The fields are:
+
+    * `book_names` -- name of each book file e.g. `000228355_01_text`.
+    * `book_codes` -- index of the page's book in `book_names`.
+    * `page_numbers` -- page number of the page.
+    * `label_names` -- the FastText language labels e.g. `__label__en`.
+    * `label_codes` -- index of the page's language label in `label_names`,
+      -1 if the model did not output a label.
+    * `probabilities` -- probability of the page's language label, 0 if the
+      model did not output a label.
+    '''
+    FIELDS = ['book_names', 'book_codes', 'page_numbers', 'label_names',
+              'label_codes', 'probabilities']
+
+    def __init__(self, book_names: np.ndarray, book_codes: np.ndarray,
+                 page_numbers: np.ndarray, label_names: np.ndarray,
+                 label_codes: np.ndarray, probabilities: np.ndarray) -> None:
+        self.book_names = book_names
+        self.book_codes = book_codes
+        self.page_numbers = page_numbers
+        self.label_names = label_names
+        self.label_codes = label_codes
+        self.probabilities = probabilities
+        self._label_names = [str(label_name) for label_name in label_names]
+        self._book_name_codes = {str(book_name): book_code
+                                 for book_code, book_name in enumerate(book_names)}
+        # Start and end, within the page arrays, of the pages of each book.
+        book_range = np.arange(len(book_names))
+        self._book_starts = np.searchsorted(book_codes, book_range, side='left')
+        self._book_ends = np.searchsorted(book_codes, book_range, side='right')
+
+    def __len__(self) -> int:
+        return len(self.page_numbers)
+
+    def __contains__(self, book_name: str) -> bool:
+        return book_name in self._book_name_codes
+
+    def page_languages(self, book_name: str) -> Dict[int, Optional[str]]:
+        '''
+        :param book_name: Name of the book file e.g. `000228355_01_text`.
+        :returns: The page number of each page, that contains text, of the
+                  book and its language label, None if the model did not
+                  output a label. Empty if the book is not in the index.
+        '''
+        if book_name not in self._book_name_codes:
+            return {}
+        book_code = self._book_name_codes[book_name]
+        start, end = self._book_starts[book_code], self._book_ends[book_code]
+        return {int(page_number): self._label_names[label_code] if label_code != -1 else None
+                for page_number, label_code in zip(self.page_numbers[start:end],
+                                                   self.label_codes[start:end])}
+
+    def language_counts(self, book_name: str) -> Counter:
+        '''
+        :param book_name: Name of the book file e.g. `000228355_01_text`.
+        :returns: The number of pages in the book that have been identified as
+                  each language label, the same as
+                  `language_id.identify_language`.
+        '''
+        return Counter(language for language in self.page_languages(book_name).values()
+                       if language is not None)
+
+    def save(self, index_file: Path) -> None:
+        '''
+        :param index_file: File to save the index to in NumPy `.npz` format.
+        '''
+        with index_file.open('wb') as index_fp:
+            np.savez(index_fp, **{field: getattr(self, field)
+                                  for field in self.FIELDS})
+
+    @classmethod
+    def load(cls, index_file: Path) -> 'PageLanguageIndex':
+        '''
+        :param index_file: File that was created through
+                           `PageLanguageIndex.save`.
+        :returns: The index saved in the `index_file`.
+        '''
+        with np.load(index_file, allow_pickle=False) as index_data:
+            return cls(**{field: index_data[field] for field in cls.FIELDS})
+
+    @classmethod
+    def from_page_languages(cls, book_names: List[str],
+                            page_languages: Iterable[Tuple[str, int, Optional[str], float]]
+                            ) -> 'PageLanguageIndex':
+        '''
+        :param book_names: Unique name of each book file that has been
+                           identified, including book files that contain no
+                           text.
+        :param page_languages: The book name, page number, language label
+                               (None if the model did not output a label),
+                               and probability of each page, in book order
+                               whereby the pages of a book are together.
+        :returns: The index of the page languages.
+        '''
+        book_name_codes = {book_name: book_code
+                           for book_code, book_name in enumerate(book_names)}
+        label_name_codes: Dict[str, int] = {}
+        book_codes: List[int] = []
+        page_numbers: List[int] = []
+        label_codes: List[int] = []
+        probabilities: List[float] = []
+        for book_name, page_number, label, probability in page_languages:
+            book_codes.append(book_name_codes[book_name])
+            page_numbers.append(page_number)
+            if label is None:
+                label_codes.append(-1)
+            else:
+                label_codes.append(label_name_codes.setdefault(label, len(label_name_codes)))
+            probabilities.append(probability)
+        return cls(book_names=np.array(book_names, dtype=str),
+                   book_codes=np.array(book_codes, dtype=np.int32),
+                   page_numbers=np.array(page_numbers, dtype=np.int32),
+                   label_names=np.array(list(label_name_codes), dtype=str),
+                   label_codes=np.array(label_codes, dtype=np.int16),
+                   probabilities=np.array(probabilities, dtype=np.float32))
@@ -1,12 +1,49 @@
-import csv
+from collections import Counter
 import enum
+import io
+from itertools import repeat
 import json
-from typing import List, Dict, Iterable, Tuple
+import multiprocessing
+import os
+import resource
+from typing import Any, List, Dict, Iterable, Optional, TextIO, Tuple
 from pathlib import Path
 
+import numpy as np
+from spacy.attrs import ENT_TYPE, IS_PUNCT, IS_SPACE, LEMMA, ORTH, TAG
+from spacy.language import Language
+from spacy.strings import StringStore
+from spacy.tokens import Doc
 import typer
 import en_core_web_md
 
+from binary_book import BINARY_BOOK_SUFFIX, BinaryBook
+from compressed_files import (Compression, available_compressions, 
+                              compressed_path, open_output, stored_frame, 
+                              stream_writer)
+from corpus_source import BookFile, is_corpus_archive, open_corpus_source
+from corpus_vocabulary import CorpusVocabulary
+import json_backend
+from lexicon import Lexicon, OCRQuality
+from page_language_index import PageLanguageIndex
+from page_reader import read_pages
+from scan_cache import ScanCache
+from tsv_format import (QUALITY_VALUE_WIDTH, ROW_TERMINATORS, TOKEN_COUNT_WIDTH,
+                        RowFormat, add_metadata, header_line, tsv_field)
+
+# fastText is only required when identifying the language of the pages 
+# through `--language-model`, and langcodes, which the `language_labels.py` 
+# module uses, only when writing the language of the books through 
+# `--language-output`.
+try:
+    import fasttext
+except ImportError:
+    fasttext = None
+try:
+    from language_labels import language_output
+except ImportError:
+    language_output = None
+
 
 @enum.unique
 class ComponentNames(str, enum.Enum):
@@ -15,23 +52,80 @@ class ComponentNames(str, enum.Enum):
     LEMMA = "lemmatizer"
     #PARSER = "parser" not to be included at the moment
 
+@enum.unique
+class OutputFormat(str, enum.Enum):
+    TSV = "tsv"
+    BINARY = "binary"
+    BOTH = "both"
+
 app = typer.Typer()
 
-def text_generator(book_file: Path) -> Iterable[Tuple[str, int]]:
+# File, within the output folder, that records the book files that have been 
+# tagged when using the `--resume` option.
+FINISHED_BOOKS_FILE_NAME = 'finished_books.jsonl'
+
+# The loaded Spacy pipeline and tagging settings used by the book processes of 
+# `process_text`. They are set before the book processes are forked so that 
+# they all share the one copy of the Spacy pipeline in memory.
+_book_process_settings: Dict[str, Any] = {}
+
+def text_generator(book_file: BookFile) -> Iterable[Tuple[str, int]]:
     '''
-    :param book_file: File path to a British library book file.
+    :param book_file: File path to a British library book file, or a book file 
+                      within an archive file, see `corpus_source.py`.
     :returns: Yields the text of a page and it's associated page number for all 
               pages in the given book file. NOTE, if the page contains NO text 
               it will be skipped and therefore not yielded from this function.
     '''
-    with book_file.open('r') as fp:
-        try:
-            data = json.load(fp) # Error can occur here if no data is given 
-            for page in data:
-                if page[1].strip():
-                    yield (page[1], int(page[0]))
-        except json.decoder.JSONDecodeError:
-            yield ('', 0)
+    try:
+        # Error can occur here if no data is given 
+        for page_number, text in read_pages(book_file):
+            if text.strip():
+                yield (text, int(page_number))
+    except json.decoder.JSONDecodeError:
+        yield ('', 0)
+
+def book_file_paths(books: Path, book_folder: Optional[Path] = None
+                    ) -> Iterable[BookFile]:
+    '''
+    :param books: Either a folder of British Library book files, an archive 
+                  file of the book corpus, see `corpus_source.py`, or a 
+                  manifest file that contains one British Library book file 
+                  path per line.
+    :param book_folder: The folder, or archive file, that relative file paths 
+                        in the manifest file are relative to. If None then it 
+                        is the folder the manifest file is in.
+    :returns: Yields the file path of each book file. For a folder only the 
+              files with a `.json` extension are yielded, in file name order. 
+              For an archive file all of the book files within it are 
+              yielded, in name order. For a manifest file the paths are 
+              yielded in the order they are in the file, empty lines are 
+              skipped.
+    :raises ValueError: If `books`, or `book_folder`, is an archive file that 
+                        cannot be read without being re-packed, see 
+                        `corpus_source.open_corpus_source`.
+    '''
+    if books.is_dir():
+        for book_file in sorted(books.iterdir()):
+            if book_file.suffix == '.json':
+                yield book_file
+    elif is_corpus_archive(books):
+        yield from open_corpus_source(books).book_files()
+    else:
+        if not isinstance(book_folder, Path):
+            book_folder = books.parent
+        archive_source = None
+        if is_corpus_archive(book_folder):
+            archive_source = open_corpus_source(book_folder)
+        with books.open('r') as manifest_fp:
+            for line in manifest_fp:
+                line = line.strip()
+                if not line:
+                    continue
+                if archive_source is not None:
+                    yield archive_source.book_file(line)
+                else:
+                    yield Path(book_folder, line)
 
 def component_to_attribute_mapper() -> Dict[str, str]:
     return {'token': 'token', 'ner': 'ner', 'tagger': 'pos', 'lemmatizer': 'lemma'}
@@ -39,17 +133,540 @@ def component_to_attribute_mapper() -> Dict[str, str]:
 def attribute_to_spacy_mapper() -> List[str]:
     return {'token' : 'text', 'pos' : 'tag_', 'lemma' : 'lemma_', 'ner' : 'ent_type_'}
 
-def add_metadata(node_name: str, attribute_key: str, attribute_value: str
-                 ) -> str:
-    return f"<{node_name} {attribute_key}=\"{attribute_value}\" />"
-    
+def attribute_to_spacy_id_mapper() -> Dict[str, int]:
+    return {'token' : ORTH, 'pos' : TAG, 'lemma' : LEMMA, 'ner' : ENT_TYPE}
+
+class TokenStringCache:
+    '''
+    A cache, shared by all of the books tagged in a run, of Spacy string IDs 
+    (hashes), as returned by `Doc.to_array`, to their `.tsv` field, see 
+    `tsv_field`, and whether their lower cased string is in the lexicon, so 
+    that each string is only resolved, formatted, and looked up once. If the 
+    cache has more than `max_size` strings it is cleared.
+    '''
+    def __init__(self, lexicon: Lexicon, max_size: int = 1000000,
+                 row_format: RowFormat = RowFormat.CSV) -> None:
+        self.lexicon = lexicon
+        self.max_size = max_size
+        self.row_format = row_format
+        self._fields: Dict[int, str] = {}
+        self._in_lexicon: Dict[int, bool] = {}
+
+    def fields(self, string_ids: List[int], strings: StringStore
+               ) -> Dict[int, str]:
+        '''
+        :param string_ids: Spacy string IDs.
+        :param strings: The string store that contains the string IDs.
+        :returns: A dictionary that contains at least the `.tsv` field of 
+                  each of the string IDs.
+        '''
+        if len(self._fields) >= self.max_size:
+            self._fields.clear()
+        for string_id in set(string_ids).difference(self._fields):
+            self._fields[string_id] = tsv_field(strings[string_id], self.row_format)
+        return self._fields
+
+    def in_lexicon(self, string_ids: List[int], strings: StringStore
+                   ) -> Dict[int, bool]:
+        '''
+        :param string_ids: Spacy string IDs of token texts.
+        :param strings: The string store that contains the string IDs.
+        :returns: A dictionary that contains at least whether the lower cased 
+                  text of each of the string IDs is in the lexicon.
+        '''
+        if len(self._in_lexicon) >= self.max_size:
+            self._in_lexicon.clear()
+        for string_id in set(string_ids).difference(self._in_lexicon):
+            self._in_lexicon[string_id] = strings[string_id].lower() in self.lexicon
+        return self._in_lexicon
+
+def book_output_files(book_file: BookFile, output_folder: Path, 
+                      output_format: OutputFormat = OutputFormat.TSV,
+                      compression: Compression = Compression.NONE) -> List[Path]:
+    '''
+    :param book_file: File path to a British library book file.
+    :param output_folder: Folder the tagged book is written to.
+    :param output_format: Format(s) the tagged book is written in.
+    :param compression: Compression of the `.tsv` file.
+    :returns: The files the tagged book is written to, a `.tsv` file and/or a 
+              binary book file, see `binary_book.py`, of the same name as the 
+              book file.
+    '''
+    output_files: List[Path] = []
+    if output_format in (OutputFormat.TSV, OutputFormat.BOTH):
+        output_files.append(compressed_path(Path(output_folder, f'{book_file.stem}.tsv'), 
+                                            compression))
+    if output_format in (OutputFormat.BINARY, OutputFormat.BOTH):
+        output_files.append(Path(output_folder, f'{book_file.stem}{BINARY_BOOK_SUFFIX}'))
+    return output_files
+
+def peak_memory(who: int = resource.RUSAGE_SELF) -> float:
+    '''
+    :param who: `resource.RUSAGE_SELF` for this process or 
+                `resource.RUSAGE_CHILDREN` for the largest of the finished 
+                processes this process created.
+    :returns: The peak memory (RAM) used by the process in MiB, whereby Linux 
+              gives the peak memory in KiB.
+    '''
+    return resource.getrusage(who).ru_maxrss / 1024
+
+def limit_memory(max_memory: float) -> None:
+    '''
+    Limits the virtual memory of this process, and all processes it creates 
+    after this, to `max_memory` MiB, in the same way as the `h_vmem` limit on 
+    the HEC. If a process goes over this limit a `MemoryError` is raised in 
+    that process.
+
+    :param max_memory: Maximum virtual memory in MiB.
+    '''
+    max_memory_bytes = int(max_memory * 1024 * 1024)
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (max_memory_bytes, hard_limit))
+
+class PageLanguageFilter:
+    '''
+    Identifies the language of each page through a FastText language 
+    identification model, in the same way as `language_id.py`, so that only 
+    the pages that are in the given language, or whose language could not be 
+    identified, are tagged. The number of pages identified as each FastText 
+    language label, e.g. `__label__en`, are counted per book so that the 
+    language identification output of the book can be written without 
+    reading the book again.
+    '''
+    def __init__(self, model: Any, language: str, 
+                 model_threshold: Optional[float] = None) -> None:
+        '''
+        :param model: A FastText language identification model.
+        :param language: The language code, as used by the FastText model, of 
+                         the pages to tag e.g. `en`.
+        :param model_threshold: Probability threshold for the model to output 
+                                a label.
+        '''
+        self.model = model
+        self.language_label = f'__label__{language}'
+        self.model_threshold = model_threshold
+
+    def page_language(self, book_file: BookFile, page_number: int, text: str
+                      ) -> Optional[str]:
+        '''
+        :param book_file: File path to the British library book file of the 
+                          page.
+        :param page_number: Page number of the page.
+        :param text: Text of the page.
+        :returns: The FastText language label of the page, None if the model 
+                  did not output a label.
+        '''
+        if not isinstance(self.model_threshold, float):
+            language_labels, _ = self.model.predict(text, k=1)
+        else:
+            language_labels, _ = self.model.predict(text, k=1, threshold=self.model_threshold)
+        if language_labels:
+            return language_labels[0]
+        return None
+
+    def filter_pages(self, book_file: BookFile, pages: Iterable[Tuple[str, int]], 
+                     language_counts: Counter) -> Iterable[Tuple[str, int]]:
+        '''
+        :param book_file: File path to the British library book file of the 
+                          pages.
+        :param pages: The text and page number of each page of the book, see 
+                      `text_generator`.
+        :param language_counts: Updated with the FastText language label of 
+                                each page that contains text.
+        :returns: Yields the pages that are in the language, or whose 
+                  language could not be identified, and pages that contain 
+                  no text.
+        '''
+        for text, page_number in pages:
+            if text.strip():
+                page_language = self.page_language(book_file, page_number, text)
+                if page_language is not None:
+                    language_counts.update([page_language])
+                    if page_language != self.language_label:
+                        continue
+            yield text, page_number
+
+class IndexPageLanguageFilter(PageLanguageFilter):
+    '''
+    The same as `PageLanguageFilter` but the language of each page comes from 
+    a page language index, created through `language_id.py process-pages`, 
+    rather than a FastText model, therefore the language of a page that is 
+    not in the index, e.g. a book that was not indexed, is not identified.
+    '''
+    def __init__(self, page_language_index: PageLanguageIndex, language: str
+                 ) -> None:
+        '''
+        :param page_language_index: The language of each page.
+        :param language: The language code, as used by the FastText model that 
+                         created the index, of the pages to tag e.g. `en`.
+        '''
+        super().__init__(None, language)
+        self.page_language_index = page_language_index
+        self._book_file: Optional[BookFile] = None
+        self._book_page_languages: Dict[int, Optional[str]] = {}
+
+    def page_language(self, book_file: BookFile, page_number: int, text: str
+                      ) -> Optional[str]:
+        if book_file != self._book_file:
+            self._book_file = book_file
+            self._book_page_languages = self.page_language_index.page_languages(book_file.stem)
+        return self._book_page_languages.get(page_number)
+
+class TSVBookWriter:
+    '''
+    Writes the tagged pages of one book file to a `.tsv` file, of the same 
+    name as the book file, in the output folder, see `process_text` for the 
+    format of the `.tsv` file. The tokens are written straight to a 
+    `.tsv.partial` file, the `<quality>` and `<token count>` meta data are 
+    written into the space reserved for them once all pages have been added, 
+    and then the `.tsv.partial` file is renamed to the `.tsv` file.
+
+    The attributes of all tokens of a page are taken from the page's Spacy 
+    `Doc` as one array, through `Doc.to_array`, and written as one string, 
+    rather than one token and attribute at a time.
+
+    With the `binary` or `both` output format the string IDs of the tokens' 
+    attributes are also kept, per page, and once all pages have been added 
+    they are written as a binary book file, see `binary_book.py`, of the same 
+    name as the book file, through a `.tokens.partial` file. With the 
+    `binary` output format no `.tsv` file is written.
+
+    With gzip or zstd `compression` the `.tsv` file is compressed as it is 
+    written, e.g. `.tsv.gz`, whereby the header and the `<quality>` and 
+    `<token count>` meta data are written as their own uncompressed gzip 
+    member or zstd frame, see `compressed_files.stored_frame`, so that they 
+    can be over written once all pages have been added, in the same way as an 
+    uncompressed `.tsv` file, followed by the rest of the file as one 
+    compressed gzip member or zstd frame.
+
+    The header line and token rows are written in the `row_format`, see 
+    `tsv_format.ROW_TERMINATORS`, the `token_strings` cache has to be of the 
+    same row format.
+    '''
+    def __init__(self, book_file: BookFile, output_folder: Path, 
+                 attribute_order: List[str], lexicon: Lexicon,
+                 token_strings: Optional[TokenStringCache] = None,
+                 output_format: OutputFormat = OutputFormat.TSV,
+                 compression: Compression = Compression.NONE,
+                 compression_level: Optional[int] = None,
+                 row_format: RowFormat = RowFormat.CSV) -> None:
+        self.book_file = book_file
+        self.row_format = row_format
+        self.row_terminator = ROW_TERMINATORS[row_format]
+        self.compression = compression
+        self.output_file = compressed_path(Path(output_folder, f'{book_file.stem}.tsv'), 
+                                           compression)
+        # The tokens are written to this file, which is renamed to the 
+        # `output_file` once the book has been tagged, so that an 
+        # `output_file` always contains a completely tagged book.
+        self.partial_output_file = self.output_file.with_name(f'{self.output_file.name}.partial')
+        self.binary_output_file = Path(output_folder, f'{book_file.stem}{BINARY_BOOK_SUFFIX}')
+        self.write_tsv = output_format in (OutputFormat.TSV, OutputFormat.BOTH)
+        self.write_binary = output_format in (OutputFormat.BINARY, OutputFormat.BOTH)
+        # The attribute string IDs and page number of the tokens of each page 
+        # when writing a binary book file.
+        self._page_string_ids: List[np.ndarray] = []
+        self._page_numbers: List[np.ndarray] = []
+        self._strings: Optional[StringStore] = None
+        self.attribute_order = attribute_order
+        attributes_to_spacy_ids = attribute_to_spacy_id_mapper()
+        # The first 3 columns of a page's token array are used to skip space 
+        # tokens and measure the OCR quality, the rest are written.
+        self.spacy_ids = [ORTH, IS_SPACE, IS_PUNCT] + [attributes_to_spacy_ids[attribute] 
+                                                       for attribute in attribute_order]
+        if token_strings is None:
+            token_strings = TokenStringCache(lexicon, row_format=row_format)
+        self.token_strings = token_strings
+        self.number_tokens = 0
+        self.ocr_quality_measure = OCRQuality(lexicon)
+
+        # Getting the identifier of the book
+        self.book_identifier = book_file.stem.split('_')[0]
+
+        if not self.write_tsv:
+            return
+        self.header_line = header_line(self.attribute_order, row_format)
+        if compression == Compression.NONE:
+            self.output_fp = self.partial_output_file.open('w', newline='')
+            self.output_fp.write(self._header('0', '0'))
+        else:
+            raw_output_fp = self.partial_output_file.open('wb')
+            raw_output_fp.write(stored_frame(self._header('0', '0').encode('utf-8'), 
+                                             compression))
+            self.output_fp = io.TextIOWrapper(stream_writer(raw_output_fp, compression, 
+                                                            compression_level),
+                                              encoding='utf-8', newline='')
+        self.output_fp.write(add_metadata("book", "identifier", str(self.book_identifier)))
+        self.output_fp.write('\n')
 
+    def _header(self, ocr_quality: str, number_tokens: str) -> str:
+        '''
+        :returns: The header line followed by the `<quality>` and 
+                  `<token count>` meta data, which is always the same length 
+                  as the values are padded to the space reserved for them.
+        '''
+        value_widths = [(ocr_quality, QUALITY_VALUE_WIDTH), 
+                        (number_tokens, TOKEN_COUNT_WIDTH)]
+        for value, value_width in value_widths:
+            value_error = (f"The meta data value {value} is longer than the "
+                           f"space reserved for it, {value_width}, book file: "
+                           f"{self.book_file}")
+            assert len(value) <= value_width, value_error
+        quality_metadata = add_metadata("quality", "value", ocr_quality, 
+                                        QUALITY_VALUE_WIDTH)
+        token_count_metadata = add_metadata("token", "count", number_tokens, 
+                                            TOKEN_COUNT_WIDTH)
+        return f'{self.header_line}{quality_metadata}\n{token_count_metadata}\n'
+
+    def add_page(self, spacy_doc: Doc, page_number: int) -> None:
+        '''
+        :param spacy_doc: The tagged text of a page.
+        :param page_number: The page number of the tagged text.
+        '''
+        if not len(spacy_doc):
+            return
+        token_array = spacy_doc.to_array(self.spacy_ids)
+        token_array = token_array[token_array[:, 1] == 0]
+        if not len(token_array):
+            return
+        strings = spacy_doc.vocab.strings
+        word_ids = token_array[token_array[:, 2] == 0, 0].tolist()
+        in_lexicon = self.token_strings.in_lexicon(word_ids, strings)
+        self.ocr_quality_measure.add_counts(len(word_ids), 
+                                            sum(map(in_lexicon.__getitem__, word_ids)))
+
+        self.number_tokens += len(token_array)
+        attribute_ids = token_array[:, 3:]
+        if self.write_binary:
+            self._page_string_ids.append(attribute_ids)
+            self._page_numbers.append(np.full(len(attribute_ids), page_number))
+            self._strings = strings
+        if not self.write_tsv:
+            return
+        fields = self.token_strings.fields(attribute_ids.ravel().tolist(), strings)
+        columns = [map(fields.__getitem__, column_ids) 
+                   for column_ids in attribute_ids.T.tolist()]
+        columns.append(repeat(tsv_field(str(page_number), self.row_format), len(token_array)))
+        self.output_fp.write(self.row_terminator.join(map('\t'.join, zip(*columns))))
+        self.output_fp.write(self.row_terminator)
+
+    def close(self) -> float:
+        '''
+        Writes the `<quality>` and `<token count>` meta data and renames the 
+        `.tsv.partial` file to the `.tsv` file, and/or writes the binary book 
+        file, this should be called once all pages of the book file have been 
+        added.
+
+        :returns: The OCR quality of the book.
+        '''
+        # Get the OCR noise level of the book, higher the quality the better.
+        ocr_quality = self.ocr_quality_measure.quality
+        ocr_quality_error = ("OCR Quality should never be above 1.0, currently"
+                            f" {ocr_quality}, book file: {self.book_file}")
+        assert ocr_quality <= 1, ocr_quality_error
+        
+        if self.write_tsv:
+            self.output_fp.close()
+            header = self._header(str(ocr_quality), str(self.number_tokens)).encode('utf-8')
+            if self.compression != Compression.NONE:
+                header = stored_frame(header, self.compression)
+            with self.partial_output_file.open('r+b') as output_fp:
+                output_fp.write(header)
+            os.replace(self.partial_output_file, self.output_file)
+        if self.write_binary:
+            self._write_binary_book(ocr_quality)
+        return ocr_quality
+
+    def _write_binary_book(self, ocr_quality: float) -> None:
+        if self._page_string_ids:
+            string_ids = np.concatenate(self._page_string_ids)
+            page_numbers = np.concatenate(self._page_numbers)
+        else:
+            string_ids = np.zeros((0, len(self.attribute_order)), dtype=np.uint64)
+            page_numbers = np.zeros(0, dtype=np.int64)
+        strings = self._strings if self._strings is not None else StringStore()
+        binary_book = BinaryBook.from_string_ids(self.book_identifier, ocr_quality, 
+                                                 self.attribute_order, string_ids, 
+                                                 page_numbers, strings)
+        partial_binary_output_file = self.binary_output_file.with_name(f'{self.binary_output_file.name}.partial')
+        binary_book.save(partial_binary_output_file)
+        os.replace(partial_binary_output_file, self.binary_output_file)
+
+def tag_books(nlp: Language, book_files: List[BookFile], output_folder: Path,
+              attribute_order: List[str], lexicon: Lexicon, batch_size: int = 1,
+              n_process: int = 1, 
+              page_language_filter: Optional[PageLanguageFilter] = None,
+              output_format: OutputFormat = OutputFormat.TSV,
+              compression: Compression = Compression.NONE,
+              compression_level: Optional[int] = None,
+              row_format: RowFormat = RowFormat.CSV
+              ) -> Iterable[Tuple[Path, float, int, Optional[Counter]]]:
+    '''
+    Tags the pages of all of the book files with the Spacy pipeline, whereby 
+    the pages of all the book files are given to the Spacy pipeline as one 
+    stream of pages, and writes a `.tsv` file, and/or a binary book file, for 
+    each book file to the `output_folder` through `TSVBookWriter`.
+
+    :param nlp: The Spacy pipeline.
+    :param book_files: File paths to British library book files.
+    :param output_folder: Folder to write the `.tsv` files to.
+    :param attribute_order: The token attributes to write to the `.tsv` files 
+                            in order, see `component_to_attribute_mapper`.
+    :param lexicon: Lexicon used to measure the OCR quality.
+    :param batch_size: Number of pages the Spacy pipeline tags at a time.
+    :param n_process: Number of processes the Spacy pipeline uses to tag the 
+                      pages.
+    :param page_language_filter: If given only the pages it does not filter 
+                                 out are tagged.
+    :param output_format: Format(s) each tagged book is written in.
+    :param compression: Compression of the `.tsv` files.
+    :param compression_level: Compression level, by default the 
+                              `compressed_files.DEFAULT_LEVELS`.
+    :param row_format: Format of the rows of the `.tsv` files.
+    :returns: Yields each book file, with its OCR quality, number of tokens, 
+              and the number of pages identified as each language label by 
+              the `page_language_filter` (None without a 
+              `page_language_filter`), once its `.tsv` file has been written, 
+              in the same order as `book_files`.
+    '''
+    # Language counts of each book index, the counts of a book are complete 
+    # once its pages have been read from `book_pages`, which is always before 
+    # its `.tsv` file is written.
+    book_language_counts: Dict[int, Counter] = {}
+
+    def book_pages() -> Iterable[Tuple[str, Tuple[int, int]]]:
+        for book_index, book_file in enumerate(book_files):
+            pages = text_generator(book_file)
+            if page_language_filter is not None:
+                book_language_counts[book_index] = Counter()
+                pages = page_language_filter.filter_pages(book_file, pages, 
+                                                          book_language_counts[book_index])
+            for text, page_number in pages:
+                yield (text, (book_index, page_number))
+
+    token_strings = TokenStringCache(lexicon, row_format=row_format)
+    book_writer: Optional[TSVBookWriter] = None
+    next_book_index = 0
+    for spacy_doc, (book_index, page_number) in nlp.pipe(book_pages(), as_tuples=True,
+                                                         batch_size=batch_size,
+                                                         n_process=n_process):
+        # Pages come back in the order they were given, therefore a new book 
+        # index means all previous books have been tagged, this includes books 
+        # that have no pages with text.
+        while next_book_index <= book_index:
+            if book_writer is not None:
+                ocr_quality = book_writer.close()
+                yield (book_writer.book_file, ocr_quality, book_writer.number_tokens,
+                       book_language_counts.pop(next_book_index - 1, None))
+            book_writer = TSVBookWriter(book_files[next_book_index], output_folder,
+                                        attribute_order, lexicon, token_strings,
+                                        output_format, compression, compression_level,
+                                        row_format)
+            next_book_index += 1
+        book_writer.add_page(spacy_doc, page_number)
+    if book_writer is not None:
+        ocr_quality = book_writer.close()
+        yield (book_writer.book_file, ocr_quality, book_writer.number_tokens,
+               book_language_counts.pop(next_book_index - 1, None))
+    for book_index in range(next_book_index, len(book_files)):
+        book_file = book_files[book_index]
+        ocr_quality = TSVBookWriter(book_file, output_folder, attribute_order, 
+                                    lexicon, token_strings, output_format, compression,
+                                    compression_level, row_format).close()
+        yield book_file, ocr_quality, 0, book_language_counts.pop(book_index, None)
+
+def _book_process_initializer(max_memory: Optional[float]) -> None:
+    if isinstance(max_memory, (int, float)):
+        limit_memory(max_memory)
+
+def _book_process_tag_book(book_file: BookFile
+                           ) -> Tuple[Path, float, int, Optional[Counter], int, float]:
+    '''
+    Tags the book file through `tag_books` using the `_book_process_settings`.
+
+    :returns: The book file, its OCR quality, number of tokens, and language 
+              counts, the process ID, and the peak memory, in MiB, of this 
+              process.
+    '''
+    for _, ocr_quality, number_tokens, language_counts in tag_books(book_files=[book_file], 
+                                                                    **_book_process_settings):
+        pass
+    return (book_file, ocr_quality, number_tokens, language_counts, os.getpid(), 
+            peak_memory())
+
+def book_file_state(book_file: BookFile) -> Dict[str, int]:
+    '''
+    :param book_file: File path to a British library book file.
+    :returns: The size, in bytes, and the modification time, in nanoseconds, 
+              of the book file.
+    '''
+    book_file_stat = book_file.stat()
+    return {'size': book_file_stat.st_size, 'mtime': book_file_stat.st_mtime_ns}
+
+def load_finished_books(finished_books_file: Path) -> Dict[str, Dict[str, int]]:
+    '''
+    :param finished_books_file: A `FINISHED_BOOKS_FILE_NAME` file, each line 
+                                is a JSON object with the keys `book_file`, 
+                                `size`, and `mtime`.
+    :returns: The book file name of each finished book and the book file state, 
+              see `book_file_state`, when it was tagged. If the same book file 
+              is on more than one line the last line is used. A line that is 
+              not valid JSON, e.g. the last line if the process was killed 
+              while writing it, is skipped.
+    '''
+    finished_books: Dict[str, Dict[str, int]] = {}
+    if not finished_books_file.exists():
+        return finished_books
+    with finished_books_file.open('r') as finished_books_fp:
+        for line in finished_books_fp:
+            try:
+                finished_book = json_backend.loads(line)
+            except json.decoder.JSONDecodeError:
+                continue
+            finished_books[finished_book['book_file']] = {'size': finished_book['size'],
+                                                          'mtime': finished_book['mtime']}
+    return finished_books
 
 @app.command()
-def process_text(book_folder: Path = typer.Argument(..., exists=True, dir_okay=True, file_okay=False, help="Book folder"),
+def process_text(book_folder: Path = typer.Argument(..., exists=True, dir_okay=True, file_okay=True, help="Book folder, an archive file of the book corpus, see `corpus_source.py`, or a manifest file that contains one book file path per line."),
                  output_folder: Path = typer.Argument(..., help="Output folder."),
                  components_to_include: List[ComponentNames] = typer.Option(..., "--include", "-i", case_sensitive=False,
-                                                                            help='The NLP components to include from the English Spacy pipeline.')
+                                                                            help='The NLP components to include from the English Spacy pipeline.'),
+                 lexicon_file: Optional[Path] = typer.Option(None, "--lexicon", exists=True, dir_okay=False, file_okay=True,
+                                                             help='Lexicon file, created through `lexicon.py`, used to measure the OCR quality. By default the vocabulary of the English Spacy model is used.'),
+                 batch_size: Optional[int] = typer.Option(None, "--batch-size", min=1,
+                                                          help='Number of pages the Spacy pipeline tags at a time. By default 1.'),
+                 n_process: Optional[int] = typer.Option(None, "--n-process", min=1,
+                                                         help='Number of processes the Spacy pipeline uses to tag the pages of the books. By default 1.'),
+                 book_processes: Optional[int] = typer.Option(None, "--book-processes", min=1,
+                                                              help='Number of processes that tag the books in parallel, each process tags one book at a time. Cannot be used with `--n-process`.'),
+                 max_memory: Optional[float] = typer.Option(None, "--max-memory", min=1,
+                                                            help='Maximum virtual memory, in MiB, of each process that tags the books.'),
+                 manifest_book_folder: Optional[Path] = typer.Option(None, "--book-folder", 
+                                                                     help='The folder, or archive file of the book corpus, that relative file paths within a `book_folder` manifest file are relative to, by default this is the folder the manifest file is in.'),
+                 resume: bool = typer.Option(False, "--resume", 
+                                             help=f'Records each tagged book in `{FINISHED_BOOKS_FILE_NAME}` within the output folder and skips the books that it records as already tagged, unless the book file has changed size or modification time since.'),
+                 cache_file: Optional[Path] = typer.Option(None, "--cache-file", dir_okay=False, file_okay=True,
+                                                           help='Scan cache file, see `scan_cache.py`, if it does not exist it is created. The OCR quality and number of tokens of each tagged book is stored in it.'),
+                 language_model: Optional[Path] = typer.Option(None, "--language-model", exists=True, dir_okay=False, file_okay=True, resolve_path=True,
+                                                               help='File path to a FastText language identification model, if given only the pages identified as `--language`, or whose language could not be identified, are tagged.'),
+                 page_language_index_file: Optional[Path] = typer.Option(None, "--page-language-index", exists=True, dir_okay=False, file_okay=True,
+                                                                         help='Page language index, created through `language_id.py process-pages`, if given only the pages identified as `--language`, or whose language could not be identified, are tagged. Cannot be used with `--language-model`.'),
+                 language: str = typer.Option('en', "--language", help='Language code, as used by the FastText model, of the pages to tag when using `--language-model` or `--page-language-index`.'),
+                 language_threshold: Optional[float] = typer.Option(None, "--language-threshold", 
+                                                                    help='Probability threshold for the FastText model to output a language label when using `--language-model`.'),
+                 language_output_file: Optional[Path] = typer.Option(None, "--language-output", dir_okay=False, file_okay=True,
+                                                                     help='File to append the language identification output of each book to, the same output as `language_id.py`, when using `--language-model` or `--page-language-index`.'),
+                 output_format: OutputFormat = typer.Option(OutputFormat.TSV, "--output-format", case_sensitive=False,
+                                                            help=f'Write each tagged book as a `.tsv` file, a binary book file (`{BINARY_BOOK_SUFFIX}`), see `binary_book.py`, or both.'),
+                 vocabulary_file: Optional[Path] = typer.Option(None, "--vocabulary", dir_okay=False, file_okay=True,
+                                                                help='Corpus vocabulary file, see `corpus_vocabulary.py`, if it does not exist it is created. The strings of each binary book file are added to it and each binary book file stores the vocabulary ID of its strings. Requires `--output-format` `binary` or `both`.'),
+                 compression: Compression = typer.Option(Compression.NONE, "--compression", case_sensitive=False,
+                                                         help='Compress each `.tsv` file as it is written, `gzip` (`.tsv.gz`) or `zstd` (`.tsv.zst`), zstd requires zstandard to be installed.'),
+                 compression_level: Optional[int] = typer.Option(None, "--compression-level",
+                                                                 help='Compression level of `--compression`, by default 6 for gzip and 3 for zstd.'),
+                 row_format: RowFormat = typer.Option(RowFormat.CSV, "--row-format", case_sensitive=False,
+                                                      help='Write the header line and token rows of each `.tsv` file as `csv.writer` does (`csv`), quoting values that contain a tab, quote, or new line and ending each row with `\\r\\n`, or as values joined by tabs ending with `\\n` (`plain`), the format of the HEC 1890 `.tsv` files.')
                  ) -> None:
     '''
     Given a folder/directory, `book_folder`, that contains British Library OCR 
@@ -59,6 +676,17 @@ def process_text(book_folder: Path = typer.Argument(..., exists=True, dir_okay=T
     extension to the `output_folder`. Each output file can be used as an input 
     file to the LexiDB database.
 
+    `book_folder` can instead be a manifest file that contains one book file 
+    path on each new line, e.g. as created by `batch_files.py --method manifest`,
+    whereby relative file paths are relative to `manifest_book_folder`, if 
+    given, else the folder the manifest file is in.
+
+    `book_folder`, or `manifest_book_folder`, can also be an archive file of 
+    the book corpus, e.g. the downloaded tar file after `bzip2 -d` or an 
+    archive file created by `corpus_source.py repack`, whereby the book files 
+    are read directly from the archive file rather than un-compressing the 
+    book corpus to disk.
+
     `book_folder` we ignore all files in this folder that do not have a `.json`
     extension. Each file has to have the following JSON format: An Array whereby 
     each element in that array is another array of length 2, whereby the first 
@@ -73,8 +701,8 @@ def process_text(book_folder: Path = typer.Argument(..., exists=True, dir_okay=T
     The `.tsv` file format of each output file will be the following:
 
     token	lemma	pos	ner	page
-    <quality value="1.0" />
-    <token count="19" />
+    <quality value="1.0"    />
+    <token count="19"           />
     <book identifier="test" />
     This	this	DT		1
     is	be	VBZ		1
@@ -99,11 +727,126 @@ def process_text(book_folder: Path = typer.Argument(..., exists=True, dir_okay=T
     As we can see this is not strict TSV file format as we have some XML under 
     the headers. However these files are the correct input for the LexiDB 
     database, whereby these XML tags/nodes are used as meta data for the file. 
-    Also we can see that we keep the page numbers that the tokens came from.
+    Also we can see that we keep the page numbers that the tokens came from. 
+    The quality value and token count are padded with spaces, as space for 
+    them is reserved at the start of the file before the tokens are written.
+
+    The OCR quality (`<quality value="1.0" />`) is the proportion of tokens, 
+    excluding punctuation, that are in the lexicon, which is by default the 
+    vocabulary of the English Spacy model.
 
     **NOTE** That tokenisation always occurs, does not need to be included in the 
     `components_to_include`
+
+    The pages of all the books are tagged as one stream of pages, `batch_size` 
+    pages at a time, using `n_process` processes. Instead of `n_process` the 
+    books can be tagged in parallel using `book_processes` processes, each 
+    process tags one book at a time. Either way each `.tsv` file is written 
+    in page order. When using more than one process the peak memory of each 
+    process is printed once all books are tagged. If `max_memory` is given 
+    each process that tags the books is limited to that amount of virtual 
+    memory, if this limit is reached a `MemoryError` is raised.
+
+    Each `.tsv` file is first written as a `.tsv.partial` file and is only 
+    renamed to the `.tsv` file once the book has been tagged. With `resume` 
+    each tagged book file, with its size and modification time, is recorded 
+    in the `finished_books.jsonl` file within the `output_folder`, and book 
+    files that are recorded with the same size and modification time, and 
+    whose `.tsv` file exists, are skipped. Therefore if the run is stopped it 
+    can be restarted with `resume` and only untagged books will be tagged.
+
+    With `cache_file` the OCR quality and number of tokens of each tagged book 
+    file are stored in a scan cache, as the `ocr_quality` fact along with the 
+    lexicon used, keyed by the book file's path, size, and modification time. 
+    Other commands can then look up the OCR quality of a book without reading 
+    its `.tsv` file.
+
+    With `language_model` the language of each page is identified, as 
+    `language_id.py` does, before it is tagged, and only the pages identified 
+    as `language`, or whose language could not be identified, are tagged. 
+    Therefore the books do not need to be identified and copied into a 
+    separate folder of English books beforehand. The language identification 
+    output of each book, the same as `language_id.py process-files`, is 
+    appended to `language_output_file`, and with `cache_file` the language 
+    counts are stored as the `language` fact, which `language_id.py 
+    process-files` re-uses.
+
+    With `page_language_index_file` the language of each page instead comes 
+    from a page language index created through `language_id.py 
+    process-pages`, which stores the language of each page, so that the same 
+    identification can be used to tag the pages of each language with a 
+    different pipeline. The language counts of each book are not stored in 
+    the scan cache as the model is not known.
+
+    With `output_format` `binary` each tagged book is instead written as a 
+    binary book file, `binary_book.py`, of the same name as the book file but 
+    with a `.tokens` file extension, which stores each token attribute as an 
+    array of integer codes into a string table of the book, and can be 
+    memory mapped through `binary_book.BinaryBook.load`. The `.tsv` file can 
+    be created from it, when needed, through `binary_book.py`. With `both` 
+    both files are written. With `resume` a book is only skipped if all of 
+    its output files exist.
+
+    With `vocabulary_file` the strings of each binary book file are added to 
+    a corpus vocabulary, which gives every token, lemma, tag, and entity type 
+    of the corpus an ID that never changes, and the binary book file is 
+    re-written with the vocabulary ID of each of its strings, so that the 
+    books can be counted and joined as integers, see `corpus_vocabulary.py`. 
+    The vocabulary is only written to by this process, also when using 
+    `book_processes`.
+
+    With `compression` each `.tsv` file is compressed, with gzip or zstd at 
+    `compression_level`, as it is written, therefore less is written to disk, 
+    and the `.tsv` file name ends in `.gz` or `.zst`. The `language_output_file` 
+    is compressed if its name ends in `.gz` or `.zst`. Decompressing a 
+    compressed `.tsv` file gives the same `.tsv` file as without compression.
+
+    By default the header line and token rows of the `.tsv` files are written 
+    as the `csv.writer` writes them, as shown above but each row ends with 
+    `\\r\\n` and a value that contains a tab, quote, or new line is quoted. 
+    With `row_format` `plain` the values are joined by tabs, without quoting, 
+    and each row ends with `\\n`, which is how the `.tsv` files of the HEC 1890 
+    books were written.
     '''
+    if not isinstance(batch_size, int):
+        batch_size = 1
+    if not isinstance(n_process, int):
+        n_process = 1
+    if isinstance(book_processes, int) and n_process > 1:
+        raise typer.BadParameter('`--n-process` cannot be used with `--book-processes`')
+    if not isinstance(language_model, Path):
+        language_model = None
+    if not isinstance(language, str):
+        language = 'en'
+    if not isinstance(language_threshold, float):
+        language_threshold = None
+    if not isinstance(language_output_file, Path):
+        language_output_file = None
+    if not isinstance(page_language_index_file, Path):
+        page_language_index_file = None
+    if language_model is not None and page_language_index_file is not None:
+        raise typer.BadParameter('`--language-model` cannot be used with `--page-language-index`')
+    if language_model is not None and fasttext is None:
+        raise typer.BadParameter('`--language-model` requires fastText to be installed')
+    if language_output_file is not None and language_output is None:
+        raise typer.BadParameter('`--language-output` requires langcodes to be installed')
+    if language_output_file is not None and language_model is None and page_language_index_file is None:
+        raise typer.BadParameter('`--language-output` requires `--language-model` or `--page-language-index`')
+    if not isinstance(output_format, OutputFormat):
+        output_format = OutputFormat.TSV
+    if not isinstance(vocabulary_file, Path):
+        vocabulary_file = None
+    if vocabulary_file is not None and output_format == OutputFormat.TSV:
+        raise typer.BadParameter('`--vocabulary` requires `--output-format` `binary` or `both`')
+    if not isinstance(compression, Compression):
+        compression = Compression.NONE
+    if not isinstance(compression_level, int):
+        compression_level = None
+    if compression not in available_compressions():
+        raise typer.BadParameter(f'`--compression {compression.value}` requires zstandard to be installed')
+    if not isinstance(row_format, RowFormat):
+        row_format = RowFormat.CSV
+
     expanded_components_to_exclude = [value.value for value in ComponentNames]
     expanded_components_to_exclude.append('attribute_ruler')
     expanded_components_to_exclude.append('parser')
@@ -128,74 +871,122 @@ def process_text(book_folder: Path = typer.Argument(..., exists=True, dir_okay=T
     component_to_attribute = component_to_attribute_mapper()
     attribute_order = [component_to_attribute[component] 
                        for component in component_order]
-    attributes_to_spacy_tags = attribute_to_spacy_mapper() 
 
     nlp = en_core_web_md.load(exclude=expanded_components_to_exclude)
     # If you do not create a copy, vocab.strings will update with new words 
     # each time you run the model.
-    vocab_strings = list(nlp.vocab.strings)
+    if isinstance(lexicon_file, Path):
+        lexicon = Lexicon.load(lexicon_file)
+    else:
+        lexicon = Lexicon(nlp.vocab.strings)
+
+    page_language_filter: Optional[PageLanguageFilter] = None
+    if language_model is not None:
+        page_language_filter = PageLanguageFilter(fasttext.load_model(str(language_model)), 
+                                                  language, language_threshold)
+    elif page_language_index_file is not None:
+        page_language_filter = IndexPageLanguageFilter(PageLanguageIndex.load(page_language_index_file), 
+                                                       language)
 
     # Create the output folder in case it does not exist.
     output_folder.mkdir(parents=True, exist_ok=True)
 
-    for book_file in book_folder.iterdir():
-        if book_file.suffix != '.json':
-            continue
-        
-        # Collecting token level data including the page number the tokens came 
-        # from.
-        import tempfile
-        number_tokens = 0
-        number_tokens_excluding_punctuation = 0
-        number_tokens_found_in_dictionary = 0
-        with tempfile.NamedTemporaryFile('w+', newline='') as temp_file:
-            temp_tsv_writer = csv.writer(temp_file, delimiter='\t')
-            for spacy_doc, page_number in nlp.pipe(text_generator(book_file), 
-                                                as_tuples=True, batch_size=1):
-                
-                for spacy_token in spacy_doc:
-                    if spacy_token.is_space:
-                            continue
-                    if not spacy_token.is_punct:
-                        number_tokens_excluding_punctuation += 1
-                        if spacy_token.text.lower() in vocab_strings:
-                            number_tokens_found_in_dictionary += 1
-                    
-                    number_tokens += 1
-                    token_values = []
-                    for attribute in attribute_order:
-                        spacy_attribute = attributes_to_spacy_tags[attribute]
-                        token_values.append(getattr(spacy_token, spacy_attribute))
-                    token_values.append(str(page_number))
-                    temp_tsv_writer.writerow(token_values)
-                
-            
-            # Getting the identifier of the book
-            book_file_name = book_file.stem
-            book_identifier = book_file_name.split('_')[0]
-
-            # Get the OCR noise level of the book, higher the quality the better.
-            ocr_quality = 0
-            if number_tokens_excluding_punctuation != 0:
-                ocr_quality = round(number_tokens_found_in_dictionary / number_tokens_excluding_punctuation, 4)
-            ocr_quality_error = ("OCR Quality should never be above 1.0, currently"
-                                f" {ocr_quality}, book file: {book_file}")
-            assert ocr_quality <= 1, ocr_quality_error
-            
-            output_file = Path(output_folder, f'{book_file_name}.tsv')
-            with output_file.open('w', newline='') as output_fp:
-                tsv_writer = csv.writer(output_fp, delimiter='\t')
-                headers = attribute_order + ['page']
-                tsv_writer.writerow(headers)
-                output_fp.write(add_metadata("quality", "value", str(ocr_quality)))
-                output_fp.write('\n')
-                output_fp.write(add_metadata("token", "count", str(number_tokens)))
-                output_fp.write('\n')
-                output_fp.write(add_metadata("book", "identifier", str(book_identifier)))
-                output_fp.write('\n')
-                temp_file.seek(0)
-                for line in temp_file:
-                    output_fp.write(line)
+    book_files = list(book_file_paths(book_folder, manifest_book_folder))
+    finished_books_fp: Optional[TextIO] = None
+    if resume is True:
+        finished_books_file = Path(output_folder, FINISHED_BOOKS_FILE_NAME)
+        finished_books = load_finished_books(finished_books_file)
+        book_files = [book_file for book_file in book_files
+                      if finished_books.get(book_file.name) != book_file_state(book_file)
+                      or not all(output_file.exists() for output_file 
+                                 in book_output_files(book_file, output_folder, output_format, 
+                                                      compression))]
+        finished_books_fp = finished_books_file.open('a')
+
+    scan_cache: Optional[ScanCache] = None
+    if isinstance(cache_file, Path):
+        scan_cache = ScanCache(cache_file)
+    # The lexicon is either a lexicon file or the vocabulary of the Spacy model.
+    lexicon_name = str(lexicon_file) if isinstance(lexicon_file, Path) else f"{nlp.meta['lang']}_{nlp.meta['name']}"
+
+    language_output_fp: Optional[TextIO] = None
+    if language_output_file is not None:
+        language_output_fp = open_output(language_output_file, 'a')
+
+    vocabulary: Optional[CorpusVocabulary] = None
+    if vocabulary_file is not None:
+        vocabulary = CorpusVocabulary(vocabulary_file)
+
+    def book_finished(book_file: BookFile, ocr_quality: float, number_tokens: int,
+                      language_counts: Optional[Counter]) -> None:
+        if vocabulary is not None:
+            vocabulary.add_book_file(Path(output_folder, f'{book_file.stem}{BINARY_BOOK_SUFFIX}'))
+        if scan_cache is not None:
+            scan_cache.set(book_file, 'ocr_quality', {'quality': ocr_quality,
+                                                      'token_count': number_tokens,
+                                                      'lexicon': lexicon_name})
+            if language_model is not None:
+                scan_cache.set(book_file, 'language', {'model': str(language_model),
+                                                       'threshold': language_threshold,
+                                                       'language_counts': dict(language_counts)})
+        if language_output_fp is not None:
+            language_output_data = language_output(language_counts, book_file, False)
+            language_output_fp.write(f'{json.dumps(language_output_data)}\n')
+            language_output_fp.flush()
+        if finished_books_fp is not None:
+            finished_book = {'book_file': book_file.name, **book_file_state(book_file)}
+            finished_books_fp.write(f'{json.dumps(finished_book)}\n')
+            finished_books_fp.flush()
+
+    try:
+        if isinstance(book_processes, int):
+            global _book_process_settings
+            _book_process_settings = {'nlp': nlp, 'output_folder': output_folder,
+                                      'attribute_order': attribute_order,
+                                      'lexicon': lexicon, 'batch_size': batch_size,
+                                      'page_language_filter': page_language_filter,
+                                      'output_format': output_format,
+                                      'compression': compression,
+                                      'compression_level': compression_level,
+                                      'row_format': row_format}
+            process_peak_memory: Dict[int, float] = {}
+            try:
+                with multiprocessing.get_context('fork').Pool(book_processes, 
+                                                              _book_process_initializer,
+                                                              (max_memory,)) as pool:
+                    for book_file, ocr_quality, number_tokens, language_counts, process_id, process_memory in pool.imap_unordered(_book_process_tag_book, 
+                                                                                                                                  book_files):
+                        book_finished(book_file, ocr_quality, number_tokens, language_counts)
+                        process_peak_memory[process_id] = process_memory
+            finally:
+                _book_process_settings = {}
+            for process_id, process_memory in sorted(process_peak_memory.items()):
+                typer.echo(f'Peak memory of book process {process_id}: {process_memory:.2f} MiB')
+        else:
+            if isinstance(max_memory, (int, float)):
+                limit_memory(max_memory)
+            for book_file, ocr_quality, number_tokens, language_counts in tag_books(nlp, book_files, output_folder, 
+                                                                                    attribute_order, lexicon, 
+                                                                                    batch_size, n_process,
+                                                                                    page_language_filter,
+                                                                                    output_format, compression,
+                                                                                    compression_level, row_format):
+                book_finished(book_file, ocr_quality, number_tokens, language_counts)
+            if n_process > 1:
+                # Ensures that the finished Spacy processes are included.
+                multiprocessing.active_children()
+                typer.echo(f'Peak memory of this process: {peak_memory():.2f} MiB')
+                typer.echo(f'Peak memory of the largest Spacy process: '
+                           f'{peak_memory(resource.RUSAGE_CHILDREN):.2f} MiB')
+    finally:
+        if finished_books_fp is not None:
+            finished_books_fp.close()
+        if scan_cache is not None:
+            scan_cache.close()
+        if language_output_fp is not None:
+            language_output_fp.close()
+        if vocabulary is not None:
+            vocabulary.close()
             
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+from pathlib import Path
+import tempfile
+
+import numpy as np
+import pytest
+
+from binary_book import BinaryBook, code_dtype, tsv_lines, ALIGNMENT
+from tsv_format import RowFormat
+
+def test_code_dtype() -> None:
+    assert '|u1' == code_dtype('u1', 255)
+    assert '<u2' == code_dtype('u1', 256)
+    assert '<u4' == code_dtype('<u4', 0)
+    assert '<u8' == code_dtype('<u2', 2 ** 32)
+    with pytest.raises(ValueError):
+        code_dtype('u1', 2 ** 64)
+
+def test_from_string_ids() -> None:
+    strings = {0: '', 11: 'The', 12: 'the', 13: 'cat', 21: 'DT', 22: 'NN', 31: 'ANIMAL'}
+    string_ids = np.array([[11, 12, 21, 0], [13, 13, 22, 31], [12, 12, 21, 0]], 
+                          dtype=np.uint64)
+    page_numbers = np.array([1, 1, 70000])
+    binary_book = BinaryBook.from_string_ids('000000037', 0.6667, 
+                                             ['token', 'lemma', 'pos', 'ner'],
+                                             string_ids, page_numbers, strings)
+    assert 3 == len(binary_book)
+    assert {'word': ['The', 'the', 'cat'], 'tag': ['DT', 'NN'], 
+            'entity': ['', 'ANIMAL']} == binary_book.string_tables
+    assert [0, 2, 1] == binary_book.columns['token'].tolist()
+    assert np.uint32 == binary_book.columns['token'].dtype
+    assert np.uint32 == binary_book.columns['lemma'].dtype
+    assert np.uint8 == binary_book.columns['pos'].dtype
+    assert np.uint8 == binary_book.columns['ner'].dtype
+    # Page numbers that do not fit in 16 bits are stored in 32 bits.
+    assert np.uint32 == binary_book.columns['page'].dtype
+    assert ['The', 'cat', 'the'] == binary_book.decode('token')
+    assert ['the', 'cat', 'the'] == binary_book.decode('lemma')
+    assert ['', 'ANIMAL', ''] == binary_book.decode('ner')
+
+@pytest.mark.parametrize("memory_map", [True, False])
+def test_save_load(memory_map: bool) -> None:
+    strings = {0: '', 11: 'tab\\there', 12: 'the', 21: 'DT'}
+    string_ids = np.array([[11, 21], [12, 21], [0, 21]], dtype=np.uint64)
+    binary_book = BinaryBook.from_string_ids('10', 0.5, ['token', 'pos'], string_ids,
+                                             np.array([3, 3, 4]), strings)
+    empty_book = BinaryBook.from_string_ids('11', 0, ['token', 'pos'], 
+                                            np.zeros((0, 2), dtype=np.uint64),
+                                            np.zeros(0, dtype=np.int64), strings)
+    with tempfile.TemporaryDirectory() as tempdir:
+        for book in [binary_book, empty_book]:
+            book_file = Path(tempdir, f'{book.book_identifier}.tokens')
+            book.save(book_file)
+            loaded_book = BinaryBook.load(book_file, memory_map)
+            assert book.book_identifier == loaded_book.book_identifier
+            assert book.quality == loaded_book.quality
+            assert book.attribute_order == loaded_book.attribute_order
+            assert book.string_tables == loaded_book.string_tables
+            assert book.columns.keys() == loaded_book.columns.keys()
+            for name, column in book.columns.items():
+                assert column.dtype == loaded_book.columns[name].dtype
+                assert column.tolist() == loaded_book.columns[name].tolist()
+            if memory_map and len(book):
+                assert isinstance(loaded_book.columns['token'], np.memmap)
+                assert 0 == loaded_book.columns['token'].offset % ALIGNMENT
+
+        not_binary_book_file = Path(tempdir, 'book.tsv')
+        not_binary_book_file.write_text('token\tpage\r\n')
+        with pytest.raises(ValueError):
+            BinaryBook.load(not_binary_book_file)
+
+def test_tsv_lines() -> None:
+    strings = {0: '', 11: 'tab\there', 12: 'the', 21: 'DT'}
+    string_ids = np.array([[11, 21], [12, 21], [0, 21]], dtype=np.uint64)
+    binary_book = BinaryBook.from_string_ids('10', 0.5, ['token', 'pos'], string_ids,
+                                             np.array([3, 3, 4]), strings)
+    assert ('token\tpos\tpage\r\n'
+            '<quality value="0.5"    />\n'
+            '<token count="3"            />\n'
+            '<book identifier="10" />\n'
+            '"tab\there"\tDT\t3\r\n'
+            'the\tDT\t3\r\n'
+            '\tDT\t4\r\n') == ''.join(tsv_lines(binary_book))
+    assert ('token\tpos\tpage\n'
+            '<quality value="0.5"    />\n'
+            '<token count="3"            />\n'
+            '<book identifier="10" />\n'
+            'tab\there\tDT\t3\n'
+            'the\tDT\t3\n'
+            '\tDT\t4\n') == ''.join(tsv_lines(binary_book, RowFormat.PLAIN))
@@ -0,0 +1,70 @@
+import gzip
+from pathlib import Path
+import tempfile
+
+import pytest
+
+from compressed_files import (COMPRESSION_SUFFIXES, Compression, available_compressions,
+                              compressed_path, file_compression, open_input,
+                              open_output, stored_frame, suffix_compression)
+
+def compressions(*compression_types: Compression) -> list:
+    '''
+    :returns: The compressions as test parameters, which are skipped if the
+              compression is not available e.g. zstandard is not installed.
+    '''
+    return [pytest.param(compression, marks=pytest.mark.skipif(compression not in available_compressions(),
+                                                                reason=f'{compression.value} is not available'))
+            for compression in compression_types]
+
+def test_compressed_path() -> None:
+    assert Path('book.tsv') == compressed_path(Path('book.tsv'), Compression.NONE)
+    assert Path('output', 'book.tsv.gz') == compressed_path(Path('output', 'book.tsv'), Compression.GZIP)
+    assert Path('book.tsv.zst') == compressed_path(Path('book.tsv'), Compression.ZSTD)
+    assert Compression.NONE == suffix_compression(Path('results.jsonl'))
+    assert Compression.GZIP == suffix_compression(Path('results.jsonl.gz'))
+    assert Compression.ZSTD == suffix_compression(Path('results.jsonl.zst'))
+
+@pytest.mark.parametrize("compression", compressions(*Compression))
+def test_open_output_input(compression: Compression) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # The compression comes from the file extension.
+        text_file = Path(temp_dir, f'text.jsonl{COMPRESSION_SUFFIXES[compression]}')
+        with open_output(text_file, 'w', newline='') as text_fp:
+            text_fp.write('{"a": "é"}\r\n')
+        # Appending adds a new gzip member or zstd frame.
+        with open_output(text_file, 'a', newline='') as text_fp:
+            text_fp.write('{"b": 2}\n')
+            text_fp.flush()
+            text_fp.write('{"c": 3}\n')
+        assert compression == file_compression(text_file)
+        with open_input(text_file, newline='') as text_fp:
+            assert '{"a": "é"}\r\n{"b": 2}\n{"c": 3}\n' == text_fp.read()
+        with open_input(text_file) as text_fp:
+            assert ['{"a": "é"}\n', '{"b": 2}\n', '{"c": 3}\n'] == text_fp.readlines()
+
+        # The compression can be given rather than coming from the file extension.
+        binary_file = Path(temp_dir, 'binary')
+        with open_output(binary_file, 'wb', compression, level=1) as binary_fp:
+            binary_fp.write(b'line 1\nline 2\n')
+        assert compression == file_compression(binary_file)
+        with open_input(binary_file, 'rb') as binary_fp:
+            assert [b'line 1\n', b'line 2\n'] == binary_fp.readlines()
+
+@pytest.mark.parametrize("compression", compressions(Compression.GZIP, Compression.ZSTD))
+def test_stored_frame(compression: Compression) -> None:
+    # The length only depends on the length of the data.
+    assert len(stored_frame(b'a' * 100, compression)) == len(stored_frame(bytes(range(100)), compression))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        compressed_file = Path(temp_dir, 'compressed')
+        with compressed_file.open('wb') as compressed_fp:
+            compressed_fp.write(stored_frame(b'header 0\n', compression))
+            compressed_fp.write(stored_frame(b'', compression))
+        with open_output(compressed_file, 'a', compression) as compressed_fp:
+            compressed_fp.write('body\n')
+        with compressed_file.open('r+b') as compressed_fp:
+            compressed_fp.write(stored_frame(b'header 1\n', compression))
+        with open_input(compressed_file) as compressed_fp:
+            assert 'header 1\nbody\n' == compressed_fp.read()
+    if compression == Compression.GZIP:
+        assert b'data' == gzip.decompress(stored_frame(b'data', compression))
@@ -0,0 +1,151 @@
+import json
+from pathlib import Path
+import pickle
+import shutil
+import tarfile
+import tempfile
+
+import pytest
+
+from compressed_files import Compression, available_compressions
+from corpus_source import (ArchiveBookFile, ArchiveSource, BookFile, FolderSource,
+                           is_corpus_archive, open_corpus_source,
+                           relative_book_name, repack, stream_book_files)
+from page_reader import read_pages
+
+test_data_dir = Path(__file__, '..', 'test_data').resolve()
+# Test book files to their name within the book corpus.
+CORPUS_BOOK_FILES = {Path(test_data_dir, 'book_folder', 'empty_file.json'): '0000/000057123_01_text.json',
+                     Path(test_data_dir, 'real_book_data', '10_page_example.json'): '0118/011833856_01_text.json',
+                     Path(test_data_dir, 'book_folder', 'test_example.json'): '0118/011834197_01_text.json',
+                     Path(test_data_dir, 'book_folder', 'test_example_1.json'): '0118/011834197_02_text.json'}
+BOOK_NAMES = sorted(CORPUS_BOOK_FILES.values())
+
+def create_corpus(temp_dir: Path) -> Path:
+    '''
+    :param temp_dir: Directory to create the book corpus in.
+    :returns: The top level directory, `json`, of a book corpus of the test
+              book files, with the same structure as the downloaded book
+              corpus, along with files that are not book files.
+    '''
+    corpus_folder = Path(temp_dir, 'json')
+    for book_file, name in CORPUS_BOOK_FILES.items():
+        corpus_book_file = Path(corpus_folder, *name.split('/'))
+        corpus_book_file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(book_file, corpus_book_file)
+    Path(corpus_folder, '0118', 'distraction_file.txt').write_text('not a book')
+    Path(corpus_folder, '0118', '000057124_01_text.json').write_text('[]')
+    Path(corpus_folder, 'README.txt').write_text('not a book')
+    return corpus_folder
+
+def create_tar(corpus_folder: Path, tar_file: Path, mode: str = 'w') -> None:
+    with tarfile.open(tar_file, mode) as tar_fp:
+        tar_fp.add(corpus_folder, arcname='json')
+
+def book_pages(book_file: BookFile, load_size: int) -> list:
+    '''
+    :returns: The pages of the book file, read through `read_pages` 16
+              characters at a time, an empty list if the book file is not a
+              JSON Array e.g. it is empty.
+    '''
+    try:
+        return list(read_pages(book_file, 16, load_size))
+    except json.decoder.JSONDecodeError:
+        return []
+
+def compressions() -> list:
+    return [pytest.param(compression, marks=pytest.mark.skipif(compression not in available_compressions(),
+                                                                reason=f'{compression.value} is not available'))
+            for compression in Compression]
+
+def test_relative_book_name() -> None:
+    assert '0118/011834197_01_text.json' == relative_book_name('json/0118/011834197_01_text.json')
+    assert '0118/011834197_01_text.json' == relative_book_name('0118/011834197_01_text.json')
+    assert relative_book_name('json/0000/011834197_01_text.json') is None
+    assert relative_book_name('json/0118/011834197_01_text.txt') is None
+    assert relative_book_name('011834197_01_text.json') is None
+
+def test_folder_source() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_folder = create_corpus(Path(temp_dir))
+        source = open_corpus_source(corpus_folder)
+        assert isinstance(source, FolderSource)
+        assert BOOK_NAMES == source.book_names()
+        assert Path(corpus_folder, '0118', '011834197_01_text.json') == source.book_file('0118/011834197_01_text.json')
+        assert [Path(corpus_folder, '0118', '011834197_01_text.json'),
+                Path(corpus_folder, '0118', '011834197_02_text.json')] == source.identifier_book_files('011834197')
+        assert [] == source.identifier_book_names('011834222')
+        assert [] == source.identifier_book_names('999999999')
+
+def test_tar_source() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_folder = create_corpus(Path(temp_dir))
+        tar_file = Path(temp_dir, 'books.tar')
+        create_tar(corpus_folder, tar_file)
+        assert is_corpus_archive(tar_file)
+        assert not is_corpus_archive(Path(test_data_dir, 'book_folder', 'test_example.json'))
+        source = open_corpus_source(tar_file)
+        assert isinstance(source, ArchiveSource)
+        assert Compression.NONE == source.compression
+        assert BOOK_NAMES == source.book_names()
+        assert ['0118/011834197_01_text.json', '0118/011834197_02_text.json'] == source.identifier_book_names('011834197')
+
+        for book_file, name in CORPUS_BOOK_FILES.items():
+            archive_book_file = source.book_file(name)
+            assert isinstance(archive_book_file, ArchiveBookFile)
+            assert book_file.read_bytes() == archive_book_file.open('rb').read()
+            with archive_book_file.open('r') as book_fp:
+                assert book_file.read_text() == book_fp.read()
+            assert name.split('/')[-1] == archive_book_file.name
+            assert Path(name).stem == archive_book_file.stem
+            assert '.json' == archive_book_file.suffix
+            assert book_file.stat().st_size == archive_book_file.stat().st_size
+            assert f'{tar_file}/{name}' == str(archive_book_file)
+            # Read whole and one page at a time.
+            for load_size in [0, 1048576]:
+                assert book_pages(book_file, load_size) == book_pages(archive_book_file, load_size)
+        with pytest.raises(FileNotFoundError):
+            source.book_file('0118/000000000_01_text.json')
+
+        # The index can be saved so that the headers are not read again.
+        source.save_index()
+        indexed_source = open_corpus_source(tar_file)
+        assert source.entries == indexed_source.entries
+
+@pytest.mark.parametrize("compression", compressions())
+def test_repack(compression: Compression) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_folder = create_corpus(Path(temp_dir))
+        bzip2_tar_file = Path(temp_dir, 'books.tar.bz2')
+        create_tar(corpus_folder, bzip2_tar_file, 'w:bz2')
+        assert is_corpus_archive(bzip2_tar_file)
+        # A compressed tar file cannot be read without reading it from the start.
+        with pytest.raises(ValueError):
+            open_corpus_source(bzip2_tar_file)
+        assert BOOK_NAMES == sorted(name for name, _, _, _ in stream_book_files(bzip2_tar_file))
+
+        archive_file = Path(temp_dir, 'books.archive')
+        repack(bzip2_tar_file, archive_file, compression, 1)
+        assert not Path(temp_dir, 'books.archive.partial').exists()
+        assert Path(temp_dir, 'books.archive.index.json').exists()
+        source = open_corpus_source(archive_file)
+        assert isinstance(source, ArchiveSource)
+        assert compression == source.compression
+        assert BOOK_NAMES == source.book_names()
+        for book_file, name in CORPUS_BOOK_FILES.items():
+            archive_book_file = source.book_file(name)
+            assert book_file.read_bytes() == archive_book_file.open('rb').read()
+            assert book_pages(book_file, 0) == book_pages(archive_book_file, 0)
+            # Book files can be given to other processes.
+            assert archive_book_file == pickle.loads(pickle.dumps(archive_book_file))
+        assert [source.book_file('0118/011834197_01_text.json'),
+                source.book_file('0118/011834197_02_text.json')] == source.identifier_book_files('011834197')
+
+        # Re-packing the archive file, or the corpus folder, gives the same
+        # book files.
+        for books in [archive_file, corpus_folder]:
+            other_archive_file = Path(temp_dir, 'other_books.archive')
+            other_source = repack(books, other_archive_file, Compression.NONE)
+            for name in BOOK_NAMES:
+                assert (source.book_file(name).open('rb').read()
+                        == other_source.book_file(name).open('rb').read())
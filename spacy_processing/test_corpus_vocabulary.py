@@ -0,0 +1,136 @@
+import json
+import multiprocessing
+from pathlib import Path
+import tempfile
+from typing import List
+
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+
+from binary_book import BinaryBook
+from corpus_vocabulary import CorpusVocabulary, app
+
+def binary_book(book_identifier: str, tokens: list, pos_tags: list) -> BinaryBook:
+    strings = dict(enumerate(sorted(set(tokens + pos_tags))))
+    string_ids = {string: string_id for string_id, string in strings.items()}
+    token_ids = [[string_ids[token], string_ids[pos_tag]] 
+                 for token, pos_tag in zip(tokens, pos_tags)]
+    return BinaryBook.from_string_ids(book_identifier, 1.0, ['token', 'pos'],
+                                      np.array(token_ids, dtype=np.uint64).reshape(-1, 2),
+                                      np.ones(len(tokens), dtype=np.int64), strings)
+
+def test_corpus_vocabulary() -> None:
+    with tempfile.TemporaryDirectory() as tempdir:
+        vocabulary_file = Path(tempdir, 'vocabulary.jsonl')
+        with CorpusVocabulary(vocabulary_file) as vocabulary:
+            identifier = vocabulary.identifier
+            assert [0, 1, 0] == vocabulary.ids('word', ['the', 'cat', 'the']).tolist()
+            assert [0] == vocabulary.ids('tag', ['NN']).tolist()
+            assert [2, 1] == vocabulary.ids('word', ['"\n', 'cat']).tolist()
+            assert 1 == vocabulary.string_id('word', 'cat')
+            assert vocabulary.string_id('word', 'dog') is None
+        # The IDs are the same once loaded and new strings are added after them.
+        with CorpusVocabulary(vocabulary_file) as vocabulary:
+            assert identifier == vocabulary.identifier
+            assert ['the', 'cat', '"\n'] == vocabulary.strings('word')
+            assert ['NN'] == vocabulary.strings('tag')
+            assert [3, 0] == vocabulary.ids('word', ['dog', 'the']).tolist()
+        # An incomplete last line is removed.
+        with vocabulary_file.open('a') as vocabulary_fp:
+            vocabulary_fp.write('["word", "mo')
+        with CorpusVocabulary(vocabulary_file) as vocabulary:
+            assert ['the', 'cat', '"\n', 'dog'] == vocabulary.strings('word')
+            assert [4] == vocabulary.ids('word', ['mouse']).tolist()
+        with CorpusVocabulary(vocabulary_file) as vocabulary:
+            assert ['the', 'cat', '"\n', 'dog', 'mouse'] == vocabulary.strings('word')
+
+        not_vocabulary_file = Path(tempdir, 'not_vocabulary.jsonl')
+        not_vocabulary_file.write_text('["word", "the"]\n')
+        with pytest.raises(ValueError):
+            CorpusVocabulary(not_vocabulary_file)
+
+        # Read only vocabularies give new strings IDs in memory only.
+        vocabulary_text = vocabulary_file.read_text()
+        with CorpusVocabulary(vocabulary_file, read_only=True) as vocabulary:
+            assert [5, 0] == vocabulary.ids('word', ['bird', 'the']).tolist()
+            assert ['the', 'cat', '"\n', 'dog', 'mouse', 'bird'] == vocabulary.strings('word')
+        assert vocabulary_text == vocabulary_file.read_text()
+        empty_file = Path(tempdir, 'empty.jsonl')
+        empty_file.touch()
+        with pytest.raises(ValueError):
+            CorpusVocabulary(empty_file, read_only=True)
+
+def add_strings(vocabulary_file: Path, strings: List[str]) -> List[int]:
+    with CorpusVocabulary(vocabulary_file) as vocabulary:
+        string_ids = []
+        for string in strings:
+            string_ids.extend(vocabulary.ids('word', [string]).tolist())
+        # The IDs given out by the other processes are read before the
+        # vocabulary is re-loaded.
+        assert string_ids == vocabulary.ids('word', strings).tolist()
+        return string_ids
+
+def test_shared_vocabulary_file() -> None:
+    with tempfile.TemporaryDirectory() as tempdir:
+        vocabulary_file = Path(tempdir, 'vocabulary.jsonl')
+        vocabulary_1 = CorpusVocabulary(vocabulary_file)
+        vocabulary_2 = CorpusVocabulary(vocabulary_file)
+        assert vocabulary_1.identifier == vocabulary_2.identifier
+        assert [0, 1] == vocabulary_1.ids('word', ['the', 'cat']).tolist()
+        # The strings added through the other vocabulary are read before new
+        # strings are given IDs.
+        assert [2, 0] == vocabulary_2.ids('word', ['dog', 'the']).tolist()
+        assert [2, 3] == vocabulary_1.ids('word', ['dog', 'mouse']).tolist()
+        vocabulary_1.close()
+        vocabulary_2.close()
+        with CorpusVocabulary(vocabulary_file) as vocabulary:
+            assert ['the', 'cat', 'dog', 'mouse'] == vocabulary.strings('word')
+
+        # Processes adding the same strings at the same time.
+        vocabulary_file = Path(tempdir, 'processes_vocabulary.jsonl')
+        CorpusVocabulary(vocabulary_file).close()
+        process_strings = [[f'{string_index}' for string_index in range(process_index, 400, 2)]
+                           + [f'{string_index}' for string_index in range(400)]
+                           for process_index in range(4)]
+        with multiprocessing.Pool(4) as pool:
+            process_string_ids = pool.starmap(add_strings, [(vocabulary_file, strings)
+                                                            for strings in process_strings])
+        with CorpusVocabulary(vocabulary_file) as vocabulary:
+            assert 400 == len(vocabulary.strings('word'))
+            for strings, string_ids in zip(process_strings, process_string_ids):
+                assert vocabulary.ids('word', strings).tolist() == string_ids
+
+def test_add_book_file() -> None:
+    with tempfile.TemporaryDirectory() as tempdir:
+        book_1_file = Path(tempdir, 'book_1.tokens')
+        binary_book('1', ['The', 'cat', 'sat'], ['DT', 'NN', 'VBD']).save(book_1_file)
+        book_2_file = Path(tempdir, 'book_2.tokens')
+        binary_book('2', ['A', 'cat', 'The', 'cat'], ['DT', 'NN', 'DT', 'NN']).save(book_2_file)
+        with CorpusVocabulary(Path(tempdir, 'vocabulary.jsonl')) as vocabulary:
+            assert vocabulary.add_book_file(book_1_file)
+            assert vocabulary.add_book_file(book_2_file)
+            assert not vocabulary.add_book_file(book_2_file)
+            book_1 = BinaryBook.load(book_1_file)
+            book_2 = BinaryBook.load(book_2_file)
+            assert vocabulary.identifier == book_2.vocabulary_identifier
+            assert ['The', 'cat', 'sat', 'A'] == vocabulary.strings('word')
+            assert [0, 1, 2] == book_1.vocabulary_codes('token').tolist()
+            assert [3, 1, 0, 1] == book_2.vocabulary_codes('token').tolist()
+            assert [0, 1, 0, 1] == book_2.vocabulary_codes('pos').tolist()
+            assert ['A', 'cat', 'The', 'cat'] == book_2.decode('token')
+        with pytest.raises(ValueError):
+            binary_book('3', ['The'], ['DT']).vocabulary_codes('token')
+
+        # Book 3 has not been added to the vocabulary, its strings are
+        # counted but are not added to the vocabulary file.
+        binary_book('3', ['cat', 'dog'], ['NN', 'NN']).save(Path(tempdir, 'book_3.tokens'))
+        vocabulary_text = Path(tempdir, 'vocabulary.jsonl').read_text()
+        result = CliRunner().invoke(app, ['frequencies', tempdir, 
+                                          str(Path(tempdir, 'vocabulary.jsonl')),
+                                          '--top', '3'])
+        assert 0 == result.exit_code
+        assert [{'token': 'cat', 'count': 4}, {'token': 'The', 'count': 2},
+                {'token': 'sat', 'count': 1}] == \
+            [json.loads(line) for line in result.output.splitlines()]
+        assert vocabulary_text == Path(tempdir, 'vocabulary.jsonl').read_text()
@@ -26,11 +26,11 @@ def create_tests(output_folder: Path, include_lemma: bool) -> None:
             else:
                 output_fp.write('token\tpos\tner\tpage\n')
             if index == 0:
-                output_fp.write('<quality value="1.0" />\n')
-                output_fp.write('<token count="19" />\n')
+                output_fp.write('<quality value="1.0"    />\n')
+                output_fp.write('<token count="19"           />\n')
             elif index == 1:
                 output_fp.write('<quality value="0.7143" />\n')
-                output_fp.write('<token count="8" />\n')
+                output_fp.write('<token count="8"            />\n')
             output_fp.write('<book identifier="test" />\n')
             with test_file.open('r') as test_fp:
                 test_document = json.load(test_fp)
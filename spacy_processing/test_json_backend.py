@@ -0,0 +1,31 @@
+import io
+import json
+
+import pytest
+
+import json_backend
+
+def test_json_backend() -> None:
+    default_backend = json_backend.backend
+    available_backends = json_backend.available_backends()
+    assert 'json' == available_backends[-1]
+    data = '[[1, "some text"], [2, "\\u00a7 more text"]]'
+    try:
+        for backend_name in available_backends:
+            json_backend.set_backend(backend_name)
+            assert backend_name == json_backend.backend
+            assert json.loads(data) == json_backend.loads(data)
+            assert json.loads(data) == json_backend.loads(data.encode('utf-8'))
+            assert json.loads(data) == json_backend.load(io.StringIO(data))
+            assert json.loads(data) == json_backend.load(io.BytesIO(data.encode('utf-8')))
+            # A lone surrogate escape, which orjson does not accept.
+            surrogate_data = '[[1, "\\ud800 OCR text"]]'
+            assert [[1, '\ud800 OCR text']] == json_backend.loads(surrogate_data)
+            assert [[1, '\ud800 OCR text']] == json_backend.load(io.BytesIO(surrogate_data.encode('utf-8')))
+            for invalid_data in ['', '[[1, "text"]']:
+                with pytest.raises(json.JSONDecodeError):
+                    json_backend.loads(invalid_data)
+        with pytest.raises(ValueError):
+            json_backend.set_backend('not a backend')
+    finally:
+        json_backend.set_backend(default_backend)
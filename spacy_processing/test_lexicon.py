@@ -0,0 +1,36 @@
+import tempfile
+from pathlib import Path
+
+from lexicon import Lexicon, OCRQuality
+
+def test_lexicon() -> None:
+    words = ['this', 'is', 'London']
+    lexicon = Lexicon(words)
+    words.append('text')
+    assert 3 == len(lexicon)
+    assert 'London' in lexicon
+    assert 'london' not in lexicon
+    assert 'text' not in lexicon
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        lexicon_file = Path(temp_dir, 'lexicon.json')
+        lexicon.save(lexicon_file)
+        loaded_lexicon = Lexicon.load(lexicon_file)
+        assert set(lexicon) == set(loaded_lexicon)
+
+def test_ocr_quality() -> None:
+    ocr_quality = OCRQuality(Lexicon(['this', 'is', 'some', 'text']))
+    assert 0 == ocr_quality.quality
+    for token in ['This', 'is', 'sorne', 'text']:
+        ocr_quality.add_token(token)
+    assert 0.75 == ocr_quality.quality
+    ocr_quality.add_text('This is, sorne text.')
+    assert 8 == ocr_quality.number_tokens
+    assert 6 == ocr_quality.number_tokens_found
+    assert 0.75 == ocr_quality.quality
+    ocr_quality.add_token('tcxt')
+    assert 0.6667 == ocr_quality.quality
+    ocr_quality.add_counts(3, 3)
+    assert 12 == ocr_quality.number_tokens
+    assert 9 == ocr_quality.number_tokens_found
+    assert 0.75 == ocr_quality.quality
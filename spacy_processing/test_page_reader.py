@@ -0,0 +1,51 @@
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from page_reader import read_pages
+
+def test_read_pages() -> None:
+    real_book_data_directory = Path(__file__, '..', 'test_data', 'real_book_data').resolve()
+    book_folder = Path(__file__, '..', 'test_data', 'book_folder').resolve()
+    book_files = [Path(real_book_data_directory, '10_page_example.json'),
+                  Path(book_folder, 'test_example.json'),
+                  Path(book_folder, 'test_example_1.json')]
+    for book_file in book_files:
+        with book_file.open('r') as book_fp:
+            expected_pages = [tuple(page) for page in json.load(book_fp)]
+        # A read size of 1 means every page is larger than the read size, and 
+        # a load size of 0 means that the book is never loaded whole.
+        assert expected_pages == list(read_pages(book_file))
+        for read_size in [1, 7, 65536]:
+            assert expected_pages == list(read_pages(book_file, read_size, 0))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        book_file = Path(temp_dir, 'book.json')
+        pages = [[1, ''], [2, 'text with "quotes", [brackets] and \\ § '],
+                 ['3', '\n']]
+        for indent in [None, 2]:
+            book_file.write_text(json.dumps(pages, indent=indent))
+            assert [tuple(page) for page in pages] == list(read_pages(book_file))
+            for read_size in [1, 3, 65536]:
+                assert [tuple(page) for page in pages] == list(read_pages(book_file, read_size, 0))
+        
+        # A page with a lone surrogate escape, as can occur in the OCR text.
+        book_file.write_text('[[1, "\\ud800 text"], [2, "more"]]')
+        assert [(1, '\ud800 text'), (2, 'more')] == list(read_pages(book_file))
+        assert [(1, '\ud800 text'), (2, 'more')] == list(read_pages(book_file, 1, 0))
+
+        for text in [' [ ] ', '[]']:
+            book_file.write_text(text)
+            assert [] == list(read_pages(book_file))
+            assert [] == list(read_pages(book_file, 1, 0))
+        
+        for text in ['', '{}', '[[1, "text"]', '[[1, "text"] [2, "more"]]', 
+                     '[[1, "text"],]', '[[1, "text"], [2, "mo']:
+            book_file.write_text(text)
+            with pytest.raises(json.decoder.JSONDecodeError):
+                list(read_pages(book_file))
+            for read_size in [1, 65536]:
+                with pytest.raises(json.decoder.JSONDecodeError):
+                    list(read_pages(book_file, read_size, 0))
@@ -0,0 +1,42 @@
+import os
+import tempfile
+from pathlib import Path
+
+from scan_cache import ScanCache
+
+def test_scan_cache() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        book_file = Path(temp_dir, 'book.json')
+        book_file.write_text('[[1, "text"]]')
+        other_book_file = Path(temp_dir, 'other_book.json')
+        other_book_file.write_text('[]')
+        cache_file = Path(temp_dir, 'cache.db')
+
+        with ScanCache(cache_file, commit_every=1) as scan_cache:
+            assert scan_cache.get(book_file, 'statistics') is None
+            scan_cache.set(book_file, 'statistics', {'pages': 1})
+            scan_cache.set(book_file, 'language', 'English')
+            scan_cache.set(other_book_file, 'statistics', {'pages': 0})
+            assert {'pages': 1} == scan_cache.get(book_file, 'statistics')
+            assert 'English' == scan_cache.get(book_file, 'language')
+            assert scan_cache.get(other_book_file, 'language') is None
+
+        # The facts persist
+        with ScanCache(cache_file) as scan_cache:
+            assert {'pages': 1} == scan_cache.get(Path(temp_dir, '.', 'book.json'), 'statistics')
+            books = list(scan_cache.books())
+            assert [str(book_file.resolve()), str(other_book_file.resolve())] == [book['path'] for book in books]
+            assert {'statistics': {'pages': 1}, 'language': 'English'} == books[0]['facts']
+
+            # Changing the book file removes its facts
+            book_file.write_text('[[1, "text"], [2, "more text"]]')
+            assert scan_cache.get(book_file, 'statistics') is None
+            scan_cache.set(book_file, 'statistics', {'pages': 2})
+            assert scan_cache.get(book_file, 'language') is None
+            assert {'pages': 2} == scan_cache.get(book_file, 'statistics')
+
+            # A change in modification time alone also removes its facts
+            book_file_stat = book_file.stat()
+            os.utime(book_file, ns=(book_file_stat.st_atime_ns, book_file_stat.st_mtime_ns + 1000))
+            assert scan_cache.get(book_file, 'statistics') is None
+            assert {'pages': 0} == scan_cache.get(other_book_file, 'statistics')
@@ -1,10 +1,24 @@
+from collections import Counter
+import csv
+import json
+import os
+import shutil
+import tarfile
 import tempfile
 from pathlib import Path
 import filecmp
+from typing import Dict, Optional
 
 import pytest
 
-from spacy_tagging import process_text, ComponentNames
+from spacy_tagging import (process_text, ComponentNames, FINISHED_BOOKS_FILE_NAME,
+                           book_file_paths, PageLanguageFilter, IndexPageLanguageFilter,
+                           OutputFormat, RowFormat)
+from binary_book import ATTRIBUTE_TABLES, BinaryBook, write_tsv
+from compressed_files import Compression, open_input
+from corpus_source import open_corpus_source, repack
+from corpus_vocabulary import CorpusVocabulary
+from page_language_index import PageLanguageIndex
 
 def compare_files(file_1: Path, file_2: Path) -> None:
     '''
@@ -18,21 +32,46 @@ def compare_files(file_1: Path, file_2: Path) -> None:
             for index, line_1 in enumerate(lines_1):
                 assert line_1 == lines_2[index] 
 
+def test_book_file_paths() -> None:
+    book_folder = Path(__file__, '..', 'test_data', 'book_folder').resolve()
+    expected_book_files = [Path(book_folder, 'empty_file.json'), 
+                           Path(book_folder, 'test_example.json'),
+                           Path(book_folder, 'test_example_1.json')]
+    assert expected_book_files == list(book_file_paths(book_folder))
+    with tempfile.TemporaryDirectory() as tempdir:
+        manifest_file = Path(tempdir, 'manifest.txt')
+        manifest_file.write_text(f'test_example_1.json\n\n{expected_book_files[0]}\n')
+        assert [expected_book_files[2], expected_book_files[0]] == list(book_file_paths(manifest_file, book_folder))
+        assert [Path(tempdir, 'test_example_1.json'), expected_book_files[0]] == list(book_file_paths(manifest_file))
+
+@pytest.mark.parametrize("use_manifest", [False, True])
+@pytest.mark.parametrize("tagging_options", [{}, 
+                                             {'batch_size': 16, 'n_process': 2},
+                                             {'batch_size': 4, 'book_processes': 2}])
 @pytest.mark.parametrize("include_lemma", [False, True])
-def test_process_text(include_lemma: bool) -> None:
+def test_process_text(include_lemma: bool, tagging_options: Dict[str, int],
+                      use_manifest: bool) -> None:
     test_data_dir = Path(__file__, '..', 'test_data').resolve()
     book_folder = Path(test_data_dir, 'book_folder')
     expected_output_folder = Path(test_data_dir, 'expected_output_1')
     if include_lemma:
         expected_output_folder = Path(test_data_dir, 'expected_output')
 
-    with tempfile.TemporaryDirectory() as tempdir:
+    with tempfile.TemporaryDirectory() as tempdir, tempfile.TemporaryDirectory() as manifest_dir:
         tempdir_path = Path(tempdir)
+        if use_manifest:
+            manifest_file = Path(manifest_dir, 'manifest.txt')
+            book_file_names = ['empty_file.json', 'test_example.json', 'test_example_1.json']
+            manifest_file.write_text(''.join(f'{Path(book_folder, book_file_name)}\n' 
+                                             for book_file_name in book_file_names))
+            book_folder = manifest_file
         
         if include_lemma:
-            process_text(book_folder, tempdir_path, list(ComponentNames))
+            process_text(book_folder, tempdir_path, list(ComponentNames), 
+                         **tagging_options)
         else:
-            process_text(book_folder, tempdir_path, [ComponentNames.POS, ComponentNames.NER])
+            process_text(book_folder, tempdir_path, [ComponentNames.POS, ComponentNames.NER],
+                         **tagging_options)
         test_files = list(tempdir_path.iterdir())
         assert 3 == len(test_files)
 
@@ -52,4 +91,190 @@ def test_process_text(include_lemma: bool) -> None:
         matches, mis_matches, errors = file_difference_results
         assert 3 == len(matches)
         assert not mis_matches
-        assert not errors
\ No newline at end of file
+        assert not errors
+
+def test_process_text_resume() -> None:
+    test_data_dir = Path(__file__, '..', 'test_data').resolve()
+    with tempfile.TemporaryDirectory() as tempdir:
+        book_folder = Path(tempdir, 'book_folder')
+        shutil.copytree(Path(test_data_dir, 'book_folder'), book_folder)
+        output_folder = Path(tempdir, 'output')
+        components = [ComponentNames.POS, ComponentNames.NER]
+        process_text(book_folder, output_folder, components, resume=True)
+
+        finished_books_file = Path(output_folder, FINISHED_BOOKS_FILE_NAME)
+        with finished_books_file.open('r') as finished_books_fp:
+            finished_books = [json.loads(line)['book_file'] 
+                              for line in finished_books_fp]
+        assert ['empty_file.json', 'test_example.json', 
+                'test_example_1.json'] == finished_books
+        output_file_names = sorted(output_file.name for output_file in output_folder.iterdir())
+        assert sorted([FINISHED_BOOKS_FILE_NAME, 'empty_file.tsv', 'test_example.tsv', 
+                       'test_example_1.tsv']) == output_file_names
+        
+        test_example_output = Path(output_folder, 'test_example.tsv')
+        expected_test_example_output = test_example_output.read_text()
+        test_example_1_output = Path(output_folder, 'test_example_1.tsv')
+        expected_test_example_1_output = test_example_1_output.read_text()
+        empty_file_output = Path(output_folder, 'empty_file.tsv')
+
+        # Finished books are not tagged again, unless their output does not 
+        # exist or the book file has changed.
+        empty_file_output.write_text('finished')
+        test_example_output.unlink()
+        test_example_1_output.write_text('finished')
+        test_example_1_book = Path(book_folder, 'test_example_1.json')
+        test_example_1_stat = test_example_1_book.stat()
+        os.utime(test_example_1_book, ns=(test_example_1_stat.st_atime_ns, 
+                                          test_example_1_stat.st_mtime_ns + 1))
+        process_text(book_folder, output_folder, components, resume=True)
+
+        assert 'finished' == empty_file_output.read_text()
+        assert expected_test_example_output == test_example_output.read_text()
+        assert expected_test_example_1_output == test_example_1_output.read_text()
+        assert 4 == len(list(output_folder.iterdir()))
+
+def test_process_text_binary() -> None:
+    book_folder = Path(__file__, '..', 'test_data', 'book_folder').resolve()
+    with tempfile.TemporaryDirectory() as tempdir:
+        both_folder = Path(tempdir, 'both')
+        process_text(book_folder, both_folder, list(ComponentNames), 
+                     output_format=OutputFormat.BOTH)
+        binary_folder = Path(tempdir, 'binary')
+        vocabulary_file = Path(tempdir, 'vocabulary.jsonl')
+        process_text(book_folder, binary_folder, list(ComponentNames), 
+                     output_format=OutputFormat.BINARY, vocabulary_file=vocabulary_file)
+        assert ['empty_file.tokens', 'test_example.tokens', 
+                'test_example_1.tokens'] == sorted(output_file.name for output_file in binary_folder.iterdir())
+        # The `.tsv` file converted from the binary book file is the same as 
+        # the `.tsv` file written whilst tagging.
+        for book_name in ['empty_file', 'test_example', 'test_example_1']:
+            binary_book = BinaryBook.load(Path(binary_folder, f'{book_name}.tokens'))
+            converted_tsv_file = Path(tempdir, f'{book_name}.tsv')
+            write_tsv(binary_book, converted_tsv_file)
+            assert Path(both_folder, f'{book_name}.tsv').read_bytes() == converted_tsv_file.read_bytes()
+        test_example = BinaryBook.load(Path(binary_folder, 'test_example.tokens'))
+        assert 'London' == test_example.decode('token')[-2]
+        assert 'GPE' == test_example.decode('ner')[-2]
+        assert 2 == test_example.columns['page'][-2]
+        # Each binary book file has the corpus vocabulary ID of each string.
+        with CorpusVocabulary(vocabulary_file) as vocabulary:
+            for book_name in ['test_example', 'test_example_1']:
+                binary_book = BinaryBook.load(Path(binary_folder, f'{book_name}.tokens'))
+                assert vocabulary.identifier == binary_book.vocabulary_identifier
+                for attribute in binary_book.attribute_order:
+                    table_name = ATTRIBUTE_TABLES[attribute]
+                    assert binary_book.decode(attribute) == [vocabulary.strings(table_name)[string_id] for string_id 
+                                                             in binary_book.vocabulary_codes(attribute).tolist()]
+
+def test_process_text_compressed() -> None:
+    book_folder = Path(__file__, '..', 'test_data', 'book_folder').resolve()
+    with tempfile.TemporaryDirectory() as tempdir:
+        tsv_folder = Path(tempdir, 'tsv')
+        process_text(book_folder, tsv_folder, list(ComponentNames))
+        gzip_folder = Path(tempdir, 'gzip')
+        process_text(book_folder, gzip_folder, list(ComponentNames), 
+                     compression=Compression.GZIP, compression_level=1)
+        assert ['empty_file.tsv.gz', 'test_example.tsv.gz', 
+                'test_example_1.tsv.gz'] == sorted(output_file.name for output_file in gzip_folder.iterdir())
+        # The uncompressed content, including the metadata lines at the start 
+        # of the file, is the same as the `.tsv` file.
+        for book_name in ['empty_file', 'test_example', 'test_example_1']:
+            with open_input(Path(gzip_folder, f'{book_name}.tsv.gz'), 'rb') as gzip_fp:
+                assert Path(tsv_folder, f'{book_name}.tsv').read_bytes() == gzip_fp.read()
+
+def test_process_text_plain_rows() -> None:
+    book_folder = Path(__file__, '..', 'test_data', 'book_folder').resolve()
+    with tempfile.TemporaryDirectory() as tempdir:
+        csv_folder = Path(tempdir, 'csv')
+        process_text(book_folder, csv_folder, list(ComponentNames))
+        plain_folder = Path(tempdir, 'plain')
+        process_text(book_folder, plain_folder, list(ComponentNames), 
+                     output_format=OutputFormat.BOTH, row_format=RowFormat.PLAIN)
+        for book_name in ['empty_file', 'test_example', 'test_example_1']:
+            with Path(csv_folder, f'{book_name}.tsv').open('r', newline='') as csv_fp:
+                csv_lines = csv_fp.readlines()
+            # The metadata lines are the same, the header line and token rows 
+            # are the values joined by tabs with a `\n` line terminator.
+            header, *rows = csv.reader(csv_lines[:1] + csv_lines[4:], delimiter='\t')
+            expected_lines = (['\t'.join(header) + '\n'] + csv_lines[1:4]
+                              + ['\t'.join(row) + '\n' for row in rows])
+            plain_tsv_file = Path(plain_folder, f'{book_name}.tsv')
+            assert ''.join(expected_lines) == plain_tsv_file.read_text()
+            converted_tsv_file = Path(tempdir, f'{book_name}.tsv')
+            write_tsv(BinaryBook.load(Path(plain_folder, f'{book_name}.tokens')), 
+                      converted_tsv_file, row_format=RowFormat.PLAIN)
+            assert plain_tsv_file.read_bytes() == converted_tsv_file.read_bytes()
+
+def test_process_text_archive() -> None:
+    book_folder = Path(__file__, '..', 'test_data', 'book_folder').resolve()
+    corpus_names = {'test_example': '011834197_01_text', 'test_example_1': '011834197_02_text'}
+    with tempfile.TemporaryDirectory() as tempdir:
+        # An un-compressed tar file with the same structure as the downloaded 
+        # book corpus, and the archive file it is re-packed into.
+        tar_file = Path(tempdir, 'books.tar')
+        with tarfile.open(tar_file, 'w') as tar_fp:
+            for book_name, corpus_name in corpus_names.items():
+                tar_fp.add(Path(book_folder, f'{book_name}.json'), 
+                           arcname=f'json/0118/{corpus_name}.json')
+        archive_file = Path(tempdir, 'books.archive')
+        repack(tar_file, archive_file, Compression.GZIP)
+
+        manifest_file = Path(tempdir, 'manifest.txt')
+        manifest_file.write_text('0118/011834197_02_text.json\n')
+        assert [open_corpus_source(archive_file).book_file('0118/011834197_02_text.json')] == list(book_file_paths(manifest_file, archive_file))
+
+        tsv_folder = Path(tempdir, 'tsv')
+        process_text(book_folder, tsv_folder, list(ComponentNames))
+        for books, tagging_options in [(tar_file, {}), (archive_file, {'book_processes': 2})]:
+            archive_output_folder = Path(tempdir, f'{books.name}_output')
+            process_text(books, archive_output_folder, list(ComponentNames), **tagging_options)
+            assert sorted(f'{corpus_name}.tsv' for corpus_name in corpus_names.values()) == sorted(output_file.name for output_file in archive_output_folder.iterdir())
+            # The books are tagged the same as when they are read from a folder, 
+            # the book identifier comes from the name of the book file.
+            for book_name, corpus_name in corpus_names.items():
+                expected_output = Path(tsv_folder, f'{book_name}.tsv').read_bytes().replace(b'<book identifier="test" />', 
+                                                                                           b'<book identifier="011834197" />')
+                assert expected_output == Path(archive_output_folder, f'{corpus_name}.tsv').read_bytes()
+
+class FrenchPageModel:
+    '''
+    Labels pages that contain `le` as French and all other pages, with a 
+    lower probability, as English, like a FastText language identification 
+    model.
+    '''
+    def predict(self, text: str, k: int = 1, threshold: float = 0.0):
+        label, probability = ('__label__en', 0.6)
+        if 'le' in text.split():
+            label, probability = ('__label__fr', 0.9)
+        if probability < threshold:
+            return (), ()
+        return (label,), (probability,)
+
+@pytest.mark.parametrize("model_threshold", [None, 0.7])
+def test_page_language_filter(model_threshold: Optional[float]) -> None:
+    pages = [('the page', 1), ('le page', 2), ('', 3), ('the end', 4)]
+    page_language_filter = PageLanguageFilter(FrenchPageModel(), 'en', model_threshold)
+    language_counts = Counter()
+    filtered_pages = list(page_language_filter.filter_pages(Path('book.json'), pages, language_counts))
+    # Pages whose language could not be identified are kept.
+    assert [('the page', 1), ('', 3), ('the end', 4)] == filtered_pages
+    if model_threshold is None:
+        assert Counter({'__label__en': 2, '__label__fr': 1}) == language_counts
+    else:
+        assert Counter({'__label__fr': 1}) == language_counts
+
+def test_index_page_language_filter() -> None:
+    page_languages = [('book', 1, '__label__en', 0.6), ('book', 2, '__label__fr', 0.9),
+                      ('book', 4, None, 0.0)]
+    page_language_index = PageLanguageIndex.from_page_languages(['book'], page_languages)
+    page_language_filter = IndexPageLanguageFilter(page_language_index, 'en')
+    pages = [('the page', 1), ('le page', 2), ('', 3), ('the end', 4), ('not indexed', 5)]
+    language_counts = Counter()
+    filtered_pages = list(page_language_filter.filter_pages(Path('book.json'), pages, language_counts))
+    assert [('the page', 1), ('', 3), ('the end', 4), ('not indexed', 5)] == filtered_pages
+    assert Counter({'__label__en': 1, '__label__fr': 1}) == language_counts
+    # Pages of books that are not in the index are all kept.
+    language_counts = Counter()
+    assert pages == list(page_language_filter.filter_pages(Path('other_book.json'), pages, language_counts))
+    assert Counter() == language_counts
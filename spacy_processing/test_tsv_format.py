@@ -0,0 +1,19 @@
+import csv
+import io
+
+from tsv_format import RowFormat, add_metadata, header_line, tsv_field
+
+def test_tsv_field() -> None:
+    for value in ['token', '', 'a"b', 'a\tb', 'new\nline', '"', ' space ']:
+        csv_output = io.StringIO()
+        csv.writer(csv_output, delimiter='\t').writerow([value, '1'])
+        assert csv_output.getvalue() == f'{tsv_field(value)}\t1\r\n'
+        assert value == tsv_field(value, RowFormat.PLAIN)
+
+def test_header_line() -> None:
+    assert 'token\tpos\tpage\r\n' == header_line(['token', 'pos'])
+    assert 'token\tpos\tpage\n' == header_line(['token', 'pos'], RowFormat.PLAIN)
+
+def test_add_metadata() -> None:
+    assert '<quality value="0.5" />' == add_metadata('quality', 'value', '0.5')
+    assert '<quality value="0.5"    />' == add_metadata('quality', 'value', '0.5', 6)
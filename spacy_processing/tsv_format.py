@@ -0,0 +1,61 @@
+import csv
+import enum
+import io
+from typing import List
+
+
+@enum.unique
+class RowFormat(str, enum.Enum):
+    CSV = "csv"
+    PLAIN = "plain"
+
+# The `<quality>` and `<token count>` values in the `.tsv` files are only known
+# once the whole book has been tagged, therefore space is reserved for them,
+# of these widths, at the start of the file and the values are written into
+# that space at the end.
+QUALITY_VALUE_WIDTH = 6
+TOKEN_COUNT_WIDTH = 12
+# The line terminator of the header line and token rows of each row format.
+# `csv` rows are written the same as the `csv.writer` writes them, `plain` rows
+# are the values joined by tabs, without quoting, as the `.tsv` files of the
+# HEC 1890 books were written.
+ROW_TERMINATORS = {RowFormat.CSV: '\r\n', RowFormat.PLAIN: '\n'}
+
+def tsv_field(value: str, row_format: RowFormat = RowFormat.CSV) -> str:
+    '''
+    :param value: A value to write to a `.tsv` file.
+    :param row_format: The format of the rows of the `.tsv` file.
+    :returns: The value as it would be written to a `.tsv` file by the
+              `csv.writer`, which quotes values that contain a tab, quote, or
+              new line character. With the `plain` row format the value is
+              never quoted.
+    '''
+    if row_format == RowFormat.PLAIN:
+        return value
+    if not any(character in value for character in '\t"\r\n'):
+        return value
+    field_buffer = io.StringIO()
+    csv.writer(field_buffer, delimiter='\t').writerow([value])
+    return field_buffer.getvalue()[:-len('\r\n')]
+
+def header_line(attribute_order: List[str],
+                row_format: RowFormat = RowFormat.CSV) -> str:
+    '''
+    :param attribute_order: The token attributes written to the `.tsv` file in
+                            order e.g. `['token', 'pos']`.
+    :param row_format: The format of the rows of the `.tsv` file.
+    :returns: The first line of the `.tsv` file, the name of each column,
+              including the line terminator of the `row_format`.
+    '''
+    return ('\t'.join(tsv_field(header, row_format) for header in attribute_order + ['page'])
+            + ROW_TERMINATORS[row_format])
+
+def add_metadata(node_name: str, attribute_key: str, attribute_value: str,
+                 value_width: int = 0) -> str:
+    '''
+    :param value_width: The `attribute_value` is padded with spaces after the
+                        closing quote so that the value and padding together
+                        are at least this many characters long.
+    '''
+    padding = ' ' * (value_width - len(attribute_value))
+    return f"<{node_name} {attribute_key}=\"{attribute_value}\"{padding} />"
@@ -0,0 +1,96 @@
+from pathlib import Path
+import shutil
+from typing import Dict, List, Tuple
+
+import typer
+
+app = typer.Typer()
+
+# The scripts in each folder import the modules they use from the same folder,
+# so that a folder can be copied to the HEC on its own. The modules shared by
+# more than one folder are therefore copied into each of those folders. Each
+# shared module, to the folder of the copy that is tested, which is the copy
+# that is edited, and the folders the copies are made in, all relative to the
+# top level directory of this repository.
+HEC_SPACY_FOLDER = 'HEC_Processing/1890_files/spacy_processing'
+HEC_LANGUAGE_FOLDER = 'HEC_Processing/language_identification'
+SHARED_MODULES: Dict[str, Tuple[str, List[str]]] = {
+    'compressed_files.py': ('spacy_processing',
+                            ['language_identification', 'batching_files',
+                             'benchmarking_spacy', HEC_LANGUAGE_FOLDER, HEC_SPACY_FOLDER]),
+    'corpus_source.py': ('spacy_processing',
+                         ['language_identification', 'batching_files',
+                          'benchmarking_spacy', HEC_LANGUAGE_FOLDER, HEC_SPACY_FOLDER]),
+    'json_backend.py': ('spacy_processing',
+                        ['.', 'language_identification', 'batching_files',
+                         'benchmarking_spacy', HEC_LANGUAGE_FOLDER, HEC_SPACY_FOLDER]),
+    'page_reader.py': ('spacy_processing',
+                       ['language_identification', 'benchmarking_spacy',
+                        HEC_LANGUAGE_FOLDER, HEC_SPACY_FOLDER]),
+    'scan_cache.py': ('spacy_processing',
+                      ['language_identification', 'benchmarking_spacy',
+                       HEC_LANGUAGE_FOLDER, HEC_SPACY_FOLDER]),
+    'page_language_index.py': ('language_identification',
+                               ['spacy_processing', HEC_LANGUAGE_FOLDER, HEC_SPACY_FOLDER]),
+    'language_id.py': ('language_identification', [HEC_LANGUAGE_FOLDER]),
+    'language_labels.py': ('language_identification',
+                           ['spacy_processing', HEC_LANGUAGE_FOLDER, HEC_SPACY_FOLDER]),
+    'lexicon.py': ('spacy_processing',
+                   ['language_identification', HEC_LANGUAGE_FOLDER, HEC_SPACY_FOLDER]),
+    'binary_book.py': ('spacy_processing', [HEC_SPACY_FOLDER]),
+    'corpus_vocabulary.py': ('spacy_processing', [HEC_SPACY_FOLDER]),
+    'tsv_format.py': ('spacy_processing', [HEC_SPACY_FOLDER]),
+    'spacy_tagging.py': ('spacy_processing', [HEC_SPACY_FOLDER]),
+}
+
+REPOSITORY_FOLDER = Path(__file__).resolve().parent
+
+def module_copies(repository_folder: Path = REPOSITORY_FOLDER
+                  ) -> List[Tuple[Path, Path]]:
+    '''
+    :param repository_folder: Top level directory of this repository.
+    :returns: The tested module and the copy of it, for every copy of every
+              shared module in `SHARED_MODULES`.
+    '''
+    copies: List[Tuple[Path, Path]] = []
+    for module_name, (tested_folder, copy_folders) in SHARED_MODULES.items():
+        tested_module = Path(repository_folder, tested_folder, module_name)
+        for copy_folder in copy_folders:
+            copies.append((tested_module, Path(repository_folder, copy_folder, module_name)))
+    return copies
+
+def out_of_sync_copies(repository_folder: Path = REPOSITORY_FOLDER
+                       ) -> List[Tuple[Path, Path]]:
+    '''
+    :param repository_folder: Top level directory of this repository.
+    :returns: The tested module and the copy of it, for every copy of a shared
+              module that does not exist or is not the same, byte for byte,
+              as the tested module.
+    '''
+    return [(tested_module, module_copy)
+            for tested_module, module_copy in module_copies(repository_folder)
+            if not module_copy.exists()
+            or module_copy.read_bytes() != tested_module.read_bytes()]
+
+@app.command()
+def sync(check: bool = typer.Option(False, "--check", help="Only list the copies that are out of sync, exiting with an error if there are any, rather than copying the tested modules over them.")
+         ) -> None:
+    '''
+    Copies each shared module, see `SHARED_MODULES`, from the folder where it
+    is tested to the other folders that use it. A shared module should only
+    be edited in the folder where it is tested, and then this script run,
+    rather than editing the copies.
+    '''
+    copies = out_of_sync_copies()
+    for tested_module, module_copy in copies:
+        relative_copy = module_copy.relative_to(REPOSITORY_FOLDER)
+        if check:
+            typer.echo(f'Out of sync: {relative_copy}')
+        else:
+            shutil.copyfile(tested_module, module_copy)
+            typer.echo(f'Copied {tested_module.relative_to(REPOSITORY_FOLDER)} to {relative_copy}')
+    if check and copies:
+        raise typer.Exit(code=1)
+
+if __name__ == "__main__":
+    app()
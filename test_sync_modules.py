@@ -0,0 +1,31 @@
+from pathlib import Path
+import shutil
+import tempfile
+
+from sync_modules import REPOSITORY_FOLDER, SHARED_MODULES, module_copies, out_of_sync_copies
+
+
+def test_copies_are_in_sync() -> None:
+    # If this fails run `python sync_modules.py` after editing a shared module
+    # in the folder where it is tested.
+    assert [] == [module_copy.relative_to(REPOSITORY_FOLDER)
+                  for _, module_copy in out_of_sync_copies()]
+
+def test_out_of_sync_copies() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for tested_module, _ in module_copies():
+            temp_tested_module = Path(temp_dir, tested_module.relative_to(REPOSITORY_FOLDER))
+            temp_tested_module.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(tested_module, temp_tested_module)
+        # None of the copies exist.
+        copies = out_of_sync_copies(Path(temp_dir))
+        assert sum(len(copy_folders) for _, copy_folders in SHARED_MODULES.values()) == len(copies)
+
+        for tested_module, module_copy in copies:
+            module_copy.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(tested_module, module_copy)
+        assert [] == out_of_sync_copies(Path(temp_dir))
+
+        edited_copy = Path(temp_dir, 'batching_files', 'json_backend.py')
+        edited_copy.write_text(edited_copy.read_text() + '\n')
+        assert [edited_copy] == [module_copy for _, module_copy in out_of_sync_copies(Path(temp_dir))]